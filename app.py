@@ -1,119 +1,98 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, Response, g, make_response, render_template, request, jsonify, redirect, url_for
 from flask_cors import CORS
+from game.ai_player import AIPlayer
 from game.controller import GameController
-import os
-import json
+from game.log import configure_logging
+from game.persistence import StateFileWriter
+from game.sessions import GameRegistry
+from game.state_store import StaleStateError
+import atexit
+import logging
 
 app = Flask(__name__)
 CORS(app)
 
-# 游戏状态文件路径
-GAME_STATE_FILE = 'game_state.json'
+# 游戏日志：级别和格式可通过GAME_LOG_LEVEL、GAME_LOG_LEVELS、GAME_LOG_FORMAT配置
+configure_logging()
+logger = logging.getLogger('game.api')
 
-# 加载游戏状态
-def load_game_state():
-    try:
-        if os.path.exists(GAME_STATE_FILE):
-            with open(GAME_STATE_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
-            # 如果文件不存在，初始化游戏状态
-            return init_game_state()
-    except Exception as e:
-        print(f"加载游戏状态失败: {str(e)}")
-        return init_game_state()
+# 游戏会话注册表，游戏状态保存在各工作进程共享的状态存储中
+registry = GameRegistry.get_instance()
 
-# 保存游戏状态
-def save_game_state(game_state):
-    try:
-        with open(GAME_STATE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(game_state, f, ensure_ascii=False, indent=2)
-        return True
-    except Exception as e:
-        print(f"保存游戏状态失败: {str(e)}")
-        return False
+# 后台写入游戏状态文件，进程退出前写完剩余的状态
+state_writer = StateFileWriter()
+atexit.register(state_writer.close)
 
-# 初始化游戏状态
-def init_game_state():
-    """初始化一个新的游戏状态"""
-    try:
-        # 创建基本游戏状态结构
-        game_state = {
-            "round": 1,
-            "phase": "保护期",
-            "current_player": "德军",
-            "war_declared": False,
-            "war_countdown": 0,
-            "regions": [],
-            "players": {
-                "德军": {
-                    "gdp": 200,
-                    "population": 0
-                },
-                "协约国": {
-                    "gdp": 200,
-                    "population": 0
-                }
-            },
-            # 定义势力划分
-            "factions": {
-                "德军": ["德国", "比利时"],  # 德意志帝国包括德国和比利时
-                "协约国": ["法国"]           # 协约国包括法国
-            },
-            # 定义冲突地区
-            "conflict_regions": {
-                "德军": "GE-3",    # 德意志帝国冲突地区
-                "协约国": "FR-3"   # 协约国冲突地区
-            }
-        }
-        
-        # 使用游戏控制器获取新的地图数据
-        controller = GameController.get_instance()
-        controller.reset_game()  # 重置游戏状态
-        
-        # 转换成JSON兼容格式
-        regions_data = []
-        for region_id, region in controller.game_state.regions.items():
-            # 区域基本信息
-            region_data = {
-                "id": region.id,
-                "name": region.name,
-                "towns": [],
-                "railways": [],
-                "hex_tiles": []
-            }
-            
-            # 添加区域内的六边形格子
-            for hex_tile in region.hex_tiles:
-                region_data["hex_tiles"].append({
-                    "q": hex_tile.q,
-                    "r": hex_tile.r,
-                    "s": hex_tile.s
-                })
+# 不要求绑定游戏的接口（静态地图数据各局共享）
+GAME_OPTIONAL_ENDPOINTS = {'get_map_data', 'get_map_data_version'}
+
+# 获取请求对应的游戏ID：依次查找查询参数、请求体和Cookie
+def current_game_id():
+    game_id = request.args.get('game_id')
+    if not game_id:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            game_id = data.get('game_id')
+    return game_id or request.cookies.get('game_id')
+
+# 获取当前请求所属游戏的控制器
+def current_controller():
+    return g.game_session.controller
+
+@app.before_request
+def bind_game_session():
+    """把API请求绑定到对应的游戏，请求期间持有该局游戏的锁"""
+    if not request.path.startswith('/api/'):
+        return None
+        
+    session = registry.acquire(current_game_id())
+    if session is None:
+        if request.endpoint == 'reset_game':
+            # 没有进行中的游戏时，重置即开始一局新游戏
+            session = registry.create_game()
+            g.new_game = True
+        elif request.endpoint not in GAME_OPTIONAL_ENDPOINTS:
+            return jsonify({"error": "游戏不存在或已结束"}), 404
+    g.game_session = session
+    return None
+
+@app.after_request
+def commit_game_session(response):
+    """修改类请求结束后提交游戏状态，新开的游戏通过Cookie告知客户端游戏ID"""
+    session = g.get('game_session')
+    if session is None:
+        return response
+        
+    if request.method != 'GET':
+        try:
+            registry.commit(session)
+        except StaleStateError:
+            # 其他工作进程先提交了这局游戏，本次修改作废
+            response = jsonify({"error": "游戏状态已被其他请求修改，请重试"})
+            response.status_code = 409
+        else:
+            # 提交成功后才保存存档，作废的修改不会覆盖存档
+            if g.get('save_game_state'):
+                write_saved_state(session)
             
-            # 添加区域到游戏状态
-            regions_data.append(region_data)
-        
-        game_state["regions"] = regions_data
-        
-        print("游戏状态初始化成功")
-        return game_state
-        
-    except Exception as e:
-        print(f"初始化游戏状态失败: {str(e)}")
-        # 返回最小游戏状态
-        return {
-            "round": 1,
-            "phase": "保护期",
-            "current_player": "德军",
-            "war_declared": False,
-            "war_countdown": 0,
-            "regions": [],
-            "players": {
-                "德军": {"gdp": 200, "population": 0},
-                "协约国": {"gdp": 200, "population": 0}
-            }
-        }
+    if g.get('new_game'):
+        response.set_cookie('game_id', session.game_id, httponly=True, samesite='Lax')
+    return response
+
+@app.teardown_request
+def release_game_session(exc):
+    """请求结束时释放游戏锁"""
+    session = g.pop('game_session', None)
+    if session is not None:
+        registry.release(session)
+
+# 保存游戏存档（交给后台线程写入，不阻塞请求），状态存储丢失时可据此恢复游戏
+def write_saved_state(session):
+    state_writer.save(registry.saved_state_path(session.game_id), session.controller.get_saved_state())
+
+# 标记本次请求需要保存游戏存档，由commit_game_session在状态提交成功后保存
+def save_game_state():
+    g.save_game_state = True
 
 @app.route('/')
 def index():
@@ -145,63 +124,92 @@ def game():
     if not faction:
         return redirect(url_for('choose_faction'))
     
-    # 获取游戏控制器实例
-    controller = GameController.get_instance()
-    
     # 设置当前玩家
     if faction == 'entente':
         current_player = "协约国"
     else:
         current_player = "德军"
     
-    # 重置游戏状态并设置当前玩家
-    controller.reset_game()
-    controller.game_state.current_player = current_player
-    
-    # 保存初始游戏状态
-    game_state = controller.get_game_state()
-    save_game_state(game_state)
+    # 开始一局新游戏，当前玩家随第一份快照一起保存
+    session = registry.create_game(current_player)
+    try:
+        # 保存初始游戏存档（create_game已提交第一份快照）
+        write_saved_state(session)
+    finally:
+        registry.release(session)
     
-    return render_template('game.html')
+    # 通过Cookie把游戏ID交给客户端，后续API请求据此找到这局游戏
+    response = make_response(render_template('game.html'))
+    response.set_cookie('game_id', session.game_id, httponly=True, samesite='Lax')
+    return response
 
 @app.route('/api/game-state', methods=['GET'])
 def get_game_state():
     try:
         # 使用GameController中的状态
-        controller = GameController.get_instance()
+        controller = current_controller()
         game_state = controller.get_game_state()
         return jsonify(game_state)
     except Exception as e:
-        print(f"获取游戏状态失败: {str(e)}")
+        logger.exception("获取游戏状态失败: %s", e)
         return jsonify({"error": "获取游戏状态失败"}), 500
 
+@app.route('/api/game-state/delta', methods=['GET'])
+def get_game_state_delta():
+    """获取自客户端版本以来发生变化的游戏状态，版本无效时返回完整状态"""
+    try:
+        controller = current_controller()
+        since = request.args.get('since', type=int)
+        state_id = request.args.get('state_id')
+        return jsonify(controller.get_game_state_delta(since, state_id))
+    except Exception as e:
+        logger.exception("获取增量游戏状态失败: %s", e)
+        return jsonify({"error": "获取增量游戏状态失败"}), 500
+
+def current_static_map():
+    """获取请求对应游戏的静态地图，未绑定游戏时使用默认地图"""
+    session = g.get('game_session')
+    if session is not None:
+        return session.controller.get_static_map()
+    return default_static_map
+
+def static_map_response(static_map, cache_control):
+    """返回预编码的静态地图数据，支持ETag协商缓存和gzip预压缩"""
+    # 按Accept-Encoding的q值选择gzip或原始内容，两种编码的ETag不同
+    use_gzip = request.accept_encodings['gzip'] > 0
+    etag = f'{static_map.etag}-gz' if use_gzip else static_map.etag
+    
+    # 客户端缓存仍然有效
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    elif use_gzip:
+        response = Response(static_map.gzip_body, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(static_map.body, mimetype='application/json')
+        
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
 @app.route('/api/map-data', methods=['GET'])
 def get_map_data():
-    """专门为地图显示提供区域坐标的API"""
+    """专门为地图显示提供区域坐标的API（静态拓扑，每次按ETag重新验证）"""
     try:
-        # 直接从GameController获取游戏状态
-        controller = GameController.get_instance()
-        game_state = controller.get_game_state()
-        
-        # 提取地图数据 - 包含区域和六边形坐标
-        map_data = {
-            "regions": []
-        }
-        
-        for region in game_state.get("regions", []):
-            map_region = {
-                "id": region.get("id", ""),
-                "name": region.get("name", ""),
-                "hex_tiles": region.get("hex_tiles", []),
-                "faction": "协约国" if region["id"].startswith("FR") else "德军"  # 添加阵营信息
-            }
-            map_data["regions"].append(map_region)
-        
-        return jsonify(map_data)
+        return static_map_response(current_static_map(), 'no-cache')
     except Exception as e:
-        print(f"获取地图数据失败: {str(e)}")
+        logger.exception("获取地图数据失败: %s", e)
         return jsonify({"error": "获取地图数据失败"}), 500
 
+@app.route('/api/map-data/<map_version>', methods=['GET'])
+def get_map_data_version(map_version):
+    """按内容哈希提供的静态地图数据，内容不会变化，可永久缓存"""
+    static_map = current_static_map()
+    if map_version != static_map.etag:
+        return jsonify({"error": "地图版本不存在"}), 404
+    return static_map_response(static_map, 'public, max-age=31536000, immutable')
+
 @app.route('/api/next-round', methods=['POST'])
 def next_round():
     try:
@@ -215,7 +223,13 @@ def next_round():
             }), 400
         
         # 获取游戏控制器实例
-        controller = GameController.get_instance()
+        controller = current_controller()
+        
+        # 电脑玩家控制其余阵营，在进入下一回合之前行动
+        ai_actions = []
+        for player in controller.game_state.players:
+            if player != current_faction:
+                ai_actions.extend(AIPlayer(player).take_turn(controller))
         
         # 进入下一回合，但保持当前玩家不变
         result = controller.next_round(current_faction)
@@ -227,22 +241,23 @@ def next_round():
         game_state['current_player'] = current_faction
         
         # 保存游戏状态到文件
-        save_game_state(game_state)
+        save_game_state()
         
         return jsonify({
             "success": True,
             "result": result,
+            "ai_actions": ai_actions,
             "game_state": game_state
         })
     except Exception as e:
-        print(f"进入下一回合失败: {str(e)}")
+        logger.exception("进入下一回合失败: %s", e)
         return jsonify({"error": "进入下一回合失败"}), 500
 
 @app.route('/api/reset-game', methods=['POST'])
 def reset_game():
     try:
         # 获取游戏控制器实例
-        controller = GameController.get_instance()
+        controller = current_controller()
         
         # 获取请求数据，如果没有数据则使用空字典
         data = request.get_json(silent=True) or {}
@@ -261,15 +276,15 @@ def reset_game():
         game_state = controller.get_game_state()
         
         # 保存到文件
-        save_game_state(game_state)
+        save_game_state()
         
-        print("游戏重置成功")
+        logger.info("游戏重置成功", extra={"game_id": g.game_session.game_id})
         return jsonify({
             "success": True,
             "game_state": game_state
         })
     except Exception as e:
-        print(f"重置游戏失败: {str(e)}")
+        logger.exception("重置游戏失败: %s", e)
         return jsonify({
             "success": False,
             "error": str(e)
@@ -278,19 +293,19 @@ def reset_game():
 @app.route('/api/build-town', methods=['POST'])
 def build_town():
     try:
-        print("收到建造城镇请求:", request.json)
+        logger.debug("收到建造城镇请求: %s", request.json)
         data = request.json
         
         # 检查是否提供了必要的参数
         if not all(key in data for key in ['region_id', 'q', 'r', 's', 'town_name', 'player']):
-            print("参数不完整:", data)
+            logger.info("参数不完整: %s", data)
             return jsonify({
                 'success': False,
                 'message': '参数不完整'
             }), 400
         
         # 获取游戏控制器实例
-        controller = GameController.get_instance()
+        controller = current_controller()
         
         # 建造城镇
         success = controller.build_town(
@@ -309,45 +324,19 @@ def build_town():
         # 获取最新游戏状态
         game_state = controller.get_game_state()
         
-        print(f"成功建造城镇 {data['town_name']} 在坐标 ({data['q']},{data['r']},{data['s']})")
+        logger.debug("成功建造城镇 %s 在坐标 (%s,%s,%s)", data['town_name'], data['q'], data['r'], data['s'])
         return jsonify({
             'success': True,
             'game_state': game_state
         })
         
     except Exception as e:
-        print(f"建造城镇时发生错误: {str(e)}")
+        logger.exception("建造城镇时发生错误: %s", e)
         return jsonify({
             'success': False,
             'message': f'发生错误: {str(e)}'
         }), 500
 
-def are_hexes_adjacent(start_q, start_r, end_q, end_r):
-    """检查两个六边形是否相邻"""
-    # 获取起点的所有相邻坐标
-    neighbors = []
-    if start_q % 2 == 0:  # 偶数列
-        neighbors = [
-            (start_q, start_r-1),     # 上
-            (start_q, start_r+1),     # 下
-            (start_q-1, start_r),     # 左上
-            (start_q+1, start_r),     # 右上
-            (start_q-1, start_r+1),   # 左下
-            (start_q+1, start_r+1)    # 右下
-        ]
-    else:  # 奇数列
-        neighbors = [
-            (start_q, start_r-1),     # 上
-            (start_q, start_r+1),     # 下
-            (start_q-1, start_r-1),   # 左上
-            (start_q+1, start_r-1),   # 右上
-            (start_q-1, start_r),     # 左下
-            (start_q+1, start_r)      # 右下
-        ]
-    
-    # 检查终点是否在相邻坐标列表中
-    return (end_q, end_r) in neighbors
-
 @app.route('/api/build-railway', methods=['POST'])
 def build_railway():
     """建设铁路"""
@@ -357,16 +346,18 @@ def build_railway():
         # 检查参数完整性
         required_params = ['region_id', 'start_q', 'start_r', 'start_s', 'end_q', 'end_r', 'end_s', 'player']
         if not all(key in data for key in required_params):
-            print("缺少参数:", [key for key in required_params if key not in data])
+            logger.info("缺少参数: %s", [key for key in required_params if key not in data])
             return jsonify({
                 'success': False,
                 'message': '参数不完整'
             }), 400
         
-        print(f"开始建造铁路: 从({data['start_q']},{data['start_r']},{data['start_s']})到({data['end_q']},{data['end_r']},{data['end_s']}), 区域: {data['region_id']}, 玩家: {data['player']}")
+        logger.debug("开始建造铁路: 从(%s,%s,%s)到(%s,%s,%s), 区域: %s, 玩家: %s",
+                     data['start_q'], data['start_r'], data['start_s'],
+                     data['end_q'], data['end_r'], data['end_s'], data['region_id'], data['player'])
         
         # 获取游戏控制器实例
-        controller = GameController.get_instance()
+        controller = current_controller()
         
         # 建造铁路
         success = controller.build_railway(
@@ -385,14 +376,15 @@ def build_railway():
         # 获取最新游戏状态
         game_state = controller.get_game_state()
         
-        print(f"成功建造铁路从({data['start_q']},{data['start_r']},{data['start_s']})到({data['end_q']},{data['end_r']},{data['end_s']})")
+        logger.debug("成功建造铁路从(%s,%s,%s)到(%s,%s,%s)", data['start_q'], data['start_r'], data['start_s'],
+                     data['end_q'], data['end_r'], data['end_s'])
         return jsonify({
             'success': True,
             'game_state': game_state
         })
         
     except Exception as e:
-        print(f"建造铁路时发生错误: {str(e)}")
+        logger.exception("建造铁路时发生错误: %s", e)
         return jsonify({
             'success': False,
             'message': f'发生错误: {str(e)}'
@@ -402,7 +394,7 @@ def build_railway():
 def mobilize_troops():
     try:
         data = request.json
-        controller = GameController.get_instance()
+        controller = current_controller()
         
         # 检查是否是区域动员
         is_region_mobilization = data.get('is_region_mobilization', False)
@@ -440,7 +432,7 @@ def mobilize_troops():
                 "game_state": controller.get_game_state()
             })
     except Exception as e:
-        print(f"动员军队失败: {str(e)}")
+        logger.exception("动员军队失败: %s", e)
         return jsonify({"error": "动员军队失败", "message": str(e)}), 500
 
 @app.route('/api/declare-war', methods=['POST'])
@@ -453,18 +445,17 @@ def declare_war():
         if not player:
             return jsonify({"error": "缺少玩家信息"}), 400
             
-        controller = GameController.get_instance()
+        controller = current_controller()
         success = controller.declare_war(player)
         
         if success:
-            game_state = controller.get_game_state()
-            save_game_state(game_state)
+            save_game_state()
             return jsonify({"success": True, "message": "宣战成功"})
         else:
             return jsonify({"error": "宣战失败"}), 400
             
     except Exception as e:
-        print(f"宣战失败: {str(e)}")
+        logger.exception("宣战失败: %s", e)
         return jsonify({"error": "宣战失败"}), 500
 
 @app.route('/api/upgrade-town', methods=['POST'])
@@ -490,7 +481,7 @@ def upgrade_town():
             return jsonify({"error": "缺少必要参数"}), 400
             
         # 获取游戏控制器
-        controller = GameController.get_instance()
+        controller = current_controller()
         
         # 创建坐标对象
         town1_coords = (town1_q, town1_r, town1_s)
@@ -502,7 +493,7 @@ def upgrade_town():
         if success:
             # 获取并保存更新后的游戏状态
             game_state = controller.get_game_state()
-            save_game_state(game_state)
+            save_game_state()
             return jsonify({
                 "success": True,
                 "message": "城镇升级成功",
@@ -512,8 +503,11 @@ def upgrade_town():
             return jsonify({"error": "城镇升级失败"}), 400
             
     except Exception as e:
-        print(f"升级城镇失败: {str(e)}")
+        logger.exception("升级城镇失败: %s", e)
         return jsonify({"error": "升级城镇失败"}), 500
 
+# 启动时生成并预编码静态地图数据
+default_static_map = GameController().get_static_map()
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0') 
\ No newline at end of file
@@ -0,0 +1 @@
+"""pytest配置：把项目根目录加入模块搜索路径，测试中可以直接导入game包"""
@@ -0,0 +1,522 @@
+"""
+电脑玩家
+按AI_Strategy_Logic.md的阶段策略为非人类阵营选择每回合的行动：
+1-10回合建设村落网络，11-30回合升级城镇并把铁路延伸到冲突区，31-40回合动员并择机宣战。
+候选行动直接在地图索引和铁路网络上评估，不复制游戏状态；每回合有时间预算，超时即停止行动
+"""
+
+import time
+from collections import deque
+
+from .models import Army, GameState, Town, Railway
+
+
+class MapIndex:
+    """地图的静态索引（以坐标为键），同一地图的各局游戏共享"""
+    
+    def __init__(self, game_state):
+        """根据游戏状态的格子索引建立地图索引
+        
+        Args:
+            game_state (GameState): 任意一局使用该地图的游戏状态
+        """
+        self.region_of = {}  # 坐标(q,r,s) -> 区域ID
+        for hex_tile, region in game_state.hex_regions.items():
+            self.region_of[(hex_tile.q, hex_tile.r, hex_tile.s)] = region.id
+            
+        self.neighbors = {}  # 坐标 -> 地图内相邻格子的坐标
+        for hex_tile in game_state.hex_regions:
+            self.neighbors[(hex_tile.q, hex_tile.r, hex_tile.s)] = [
+                (neighbor.q, neighbor.r, neighbor.s) for neighbor in hex_tile.neighbors()
+                if neighbor in game_state.hex_regions
+            ]
+        self.distances = {}  # 区域ID -> {坐标 -> 到该区域的格子步数}
+        
+    def distance_to(self, region_id):
+        """各格子到某个区域的最短格子步数（多源广度优先搜索，结果缓存）"""
+        distance = self.distances.get(region_id)
+        if distance is not None:
+            return distance
+            
+        distance = {coords: 0 for coords, owner in self.region_of.items() if owner == region_id}
+        queue = deque(distance)
+        while queue:
+            current = queue.popleft()
+            for neighbor in self.neighbors[current]:
+                if neighbor not in distance:
+                    distance[neighbor] = distance[current] + 1
+                    queue.append(neighbor)
+        self.distances[region_id] = distance
+        return distance
+
+
+class AITurn:
+    """电脑玩家一回合的决策上下文
+    
+    回合开始时从游戏状态收集一次己方格子、铁路图和到冲突区的距离，
+    之后执行的建造同步更新铁路图，候选行动的评估不再扫描整个游戏状态
+    """
+    
+    def __init__(self, controller, player, index, deadline):
+        """初始化回合上下文
+        
+        Args:
+            controller (GameController): 游戏控制器
+            player (str): 电脑玩家的阵营
+            index (MapIndex): 地图索引
+            deadline (float): 本回合的截止时间（time.perf_counter）
+        """
+        self.controller = controller
+        self.game_state = controller.game_state
+        self.player = player
+        self.index = index
+        self.deadline = deadline
+        self.actions = []  # 本回合执行成功的行动 [命令名, 参数...]
+        
+        self.regions = self.game_state.get_player_regions(player)
+        self.conflict_id = self.game_state.conflict_regions.get(player)
+        self.goal = index.distance_to(self.conflict_id)
+        self.own = {
+            coords for coords, region_id in index.region_of.items()
+            if region_id in {region.id for region in self.regions}
+        }
+        
+        # 铁路图（含建设中的铁路）：坐标 -> 相连格子的坐标
+        self.rails = {}
+        for railway in self.game_state.railway_network.railways:
+            self.add_rail(self.coords(railway.start_hex), self.coords(railway.end_hex))
+            
+    @staticmethod
+    def coords(hex_tile):
+        """格子的(q,r,s)坐标"""
+        return (hex_tile.q, hex_tile.r, hex_tile.s)
+        
+    @property
+    def gdp(self):
+        """当前可用的GDP"""
+        return self.controller.player_resources[self.player]["gdp"]
+        
+    def expired(self):
+        """是否已用完本回合的时间预算"""
+        return time.perf_counter() >= self.deadline
+        
+    def add_rail(self, start, end):
+        """在铁路图中登记一段铁路"""
+        self.rails.setdefault(start, set()).add(end)
+        self.rails.setdefault(end, set()).add(start)
+        
+    def has_rail(self, start, end):
+        """两个格子之间是否已有铁路（含建设中）"""
+        return end in self.rails.get(start, ())
+        
+    def town_at(self, coords):
+        """格子上的己方城镇，没有则返回None"""
+        hex_tile = self.game_state.get_hex(coords)
+        town = hex_tile.town if hex_tile else None
+        return town if town and town.owner == self.player else None
+        
+    def own_towns(self):
+        """己方全部城镇"""
+        return [town for region in self.regions for town in region.towns if town.owner == self.player]
+
+
+class AIPlayer:
+    """电脑玩家
+    
+    只通过控制器的命令行动，每条命令照常记入操作日志，
+    因此电脑玩家的行动与人类玩家的行动一样可以提交、重放和恢复
+    """
+    
+    # 阶段划分（各阶段的最后一个回合）
+    EARLY_ROUNDS = 10
+    MID_ROUNDS = 20
+    LATE_ROUNDS = 30
+    
+    TARGET_VILLAGES = 12  # 早期村落数量目标
+    WAR_ADVANTAGE = 1.6  # 宣战所需的兵力优势
+    MAX_IDLE_POTENTIAL = 0.2  # 宣战时允许的未动员潜在兵力比例
+    TROOP_VALUE = 2  # 评估升级时每1万兵力折合的GDP
+    MOVES_PER_ROUND = Army.MOVES_PER_ROUND  # 军队每回合最多前进的格数
+    CONFLICT_ENTRIES = 3  # 后期希望冲突区拥有的铁路入口数量
+    
+    _map_indexes = {}  # 地图名称 -> MapIndex，所有对局共享
+    
+    def __init__(self, player, time_budget=0.03):
+        """初始化电脑玩家
+        
+        Args:
+            player (str): 电脑玩家的阵营
+            time_budget (float): 每回合的时间预算（秒）
+        """
+        self.player = player
+        self.time_budget = time_budget
+        
+    @classmethod
+    def map_index(cls, controller):
+        """获取控制器所用地图的索引"""
+        index = cls._map_indexes.get(controller.map_name)
+        if index is None:
+            index = MapIndex(controller.game_state)
+            AIPlayer._map_indexes[controller.map_name] = index
+        return index
+        
+    def take_turn(self, controller):
+        """执行电脑玩家本回合的行动（在进入下一回合之前调用）
+        
+        Args:
+            controller (GameController): 游戏控制器
+            
+        Returns:
+            list: 执行成功的行动 [命令名, 参数...]
+        """
+        game_state = controller.game_state
+        if game_state.game_ended:
+            return []
+            
+        deadline = time.perf_counter() + self.time_budget
+        turn = AITurn(controller, self.player, self.map_index(controller), deadline)
+        if not turn.regions:
+            return []
+            
+        if game_state.round <= self.EARLY_ROUNDS:
+            self._early_game(turn)
+        elif game_state.round <= self.MID_ROUNDS:
+            self._mid_game(turn)
+        elif game_state.round <= self.LATE_ROUNDS:
+            self._late_game(turn)
+        else:
+            self._war_phase(turn)
+        return turn.actions
+        
+    def _early_game(self, turn):
+        """早期发展：建立村落网络，连接相邻村落形成小型互联网"""
+        villages = sum(1 for town in turn.own_towns() if town.level == Town.VILLAGE)
+        self._build_villages(turn, self.TARGET_VILLAGES - villages)
+        self._link_towns(turn)
+        self._upgrade_towns(turn, Town.VILLAGE)
+        
+    def _mid_game(self, turn):
+        """中期扩张：升级已互联的村落，连接所有村落并开始向冲突区延伸铁路"""
+        self._upgrade_towns(turn, Town.VILLAGE)
+        self._link_towns(turn)
+        self._extend_to_conflict(turn)
+        self._build_villages(turn, 1)
+        
+    def _late_game(self, turn):
+        """后期战备：确保冲突区有多条铁路路径，升级战略位置的城镇，补建最后的村落"""
+        self._extend_to_conflict(turn)
+        self._add_conflict_entries(turn)
+        self._upgrade_towns(turn, Town.SMALL_CITY)
+        self._upgrade_towns(turn, Town.VILLAGE)
+        self._link_towns(turn)
+        self._build_villages(turn, 2)
+        
+    def _war_phase(self, turn):
+        """战争阶段：剩余GDP用于关键铁路，动员全部兵力，兵力占优时宣战"""
+        self._extend_to_conflict(turn)
+        self._mobilize(turn)
+        self._consider_war(turn)
+        
+    def _build_villages(self, turn, count):
+        """在价值最高的位置建设村落
+        
+        Args:
+            count (int): 最多建设的数量
+        """
+        cost = Town.TOWN_CONFIG[Town.VILLAGE]["cost"]
+        while count > 0 and turn.gdp >= cost and not turn.expired():
+            sites = self._village_sites(turn)
+            if not sites:
+                return
+            _, region, coords = max(sites, key=lambda site: site[0])
+            name = f"{region.name}({coords[0]},{coords[1]})"
+            if not turn.controller.build_town(region.id, coords, name, turn.player):
+                return
+            turn.actions.append(["build_town", region.id, coords, name])
+            count -= 1
+            
+    def _village_sites(self, turn):
+        """评估可建设村落的空格子
+        
+        靠近冲突区、紧邻己方城镇（一段铁路即可互联，之后可合并升级）、
+        已有铁路经过的格子价值更高；冲突区内城镇动员的军队无需运输也不计入抵达兵力
+        
+        Returns:
+            list: (价值, 区域, 坐标)
+        """
+        sites = []
+        for region in turn.regions:
+            villages = sum(1 for town in region.towns if town.level == Town.VILLAGE)
+            if villages >= 4:
+                continue
+            for hex_tile in region.hex_tiles:
+                if hex_tile.town:
+                    continue
+                coords = turn.coords(hex_tile)
+                distance = turn.goal.get(coords, 10)
+                if distance == 0:
+                    value = -4
+                else:
+                    value = max(0, 8 - distance)
+                neighbors = [turn.town_at(neighbor) for neighbor in turn.index.neighbors[coords]]
+                if any(town and town.region is region for town in neighbors):
+                    value += 4
+                if coords in turn.rails:
+                    value += 2
+                sites.append((value, region, coords))
+        return sites
+        
+    def _link_towns(self, turn):
+        """用铁路连接同一区域内相邻但尚未互联的己方城镇"""
+        cost = Railway.RAILWAY_CONFIG[Railway.LEVEL_1]["cost"]
+        for region in turn.regions:
+            for town in region.towns:
+                if town.owner != turn.player:
+                    continue
+                for hex_tile in town.hex_tiles:
+                    start = turn.coords(hex_tile)
+                    for end in turn.index.neighbors[start]:
+                        if turn.gdp < cost or turn.expired():
+                            return
+                        other = turn.town_at(end)
+                        if (other is None or other is town or other.region is not region
+                                or region.are_towns_connected(town, other)
+                                or turn.has_rail(start, end)):
+                            continue
+                        self._build_railway(turn, start, end)
+                        
+    def _build_railway(self, turn, start, end):
+        """建造一段铁路并登记到铁路图"""
+        region_id = turn.index.region_of[start]
+        if not turn.controller.build_railway(region_id, start, end, turn.player):
+            return False
+        turn.add_rail(start, end)
+        turn.actions.append(["build_railway", region_id, start, end])
+        return True
+        
+    def _route_costs(self, turn, blocked=()):
+        """各己方格子到冲突区还需新建的铁路段数（0-1广度优先搜索）
+        
+        沿已有铁路前进不需要新建，否则每走一格需要新建一段
+        
+        Args:
+            blocked (set): 不允许使用的(格子, 下一跳)
+            
+        Returns:
+            tuple: (坐标 -> 新建段数, 坐标 -> 朝冲突区的下一跳坐标)
+        """
+        cost = {}
+        next_hop = {}
+        queue = deque()
+        for coords, distance in turn.goal.items():
+            if distance == 0:
+                cost[coords] = 0
+                next_hop[coords] = None
+                queue.append(coords)
+                
+        while queue:
+            current = queue.popleft()
+            rails = turn.rails.get(current, ())
+            for neighbor in turn.index.neighbors[current]:
+                if neighbor not in turn.own or (neighbor, current) in blocked:
+                    continue
+                step = 0 if neighbor in rails else 1
+                new_cost = cost[current] + step
+                if new_cost < cost.get(neighbor, new_cost + 1):
+                    cost[neighbor] = new_cost
+                    next_hop[neighbor] = current
+                    if step:
+                        queue.append(neighbor)
+                    else:
+                        queue.appendleft(neighbor)
+        return cost, next_hop
+        
+    def _troop_potential(self, town):
+        """城镇建成后区域动员可提供的兵力"""
+        population = Town.TOWN_CONFIG[town.level]["population"]
+        return int(population * Town.MOBILIZATION_RATE.get(town.level, 0))
+        
+    def _extend_to_conflict(self, turn, blocked=(), max_routes=None):
+        """为尚未接入冲突区的城镇补建铁路
+        
+        按每段铁路可运送的兵力从高到低依次处理城镇，沿新建段数最少的路线补齐缺口，
+        从冲突区一端开始建造，使多个城镇共用的干线优先完工
+        
+        Args:
+            blocked (set): 路线不允许使用的(格子, 下一跳)
+            max_routes (int): 最多处理的城镇数量
+            
+        Returns:
+            int: 新建的铁路段数
+        """
+        cost = Railway.RAILWAY_CONFIG[Railway.LEVEL_1]["cost"]
+        if turn.gdp < cost or turn.expired():
+            return 0
+        route_costs, next_hop = self._route_costs(turn, blocked)
+        
+        candidates = []
+        for town in turn.own_towns():
+            start = turn.coords(town.hex_tiles[0])  # 军队从城镇的第一个格子出发
+            missing = route_costs.get(start)
+            if not missing or turn.goal.get(start) == 0:
+                continue
+            candidates.append((self._troop_potential(town) / (missing + 1), start))
+        candidates.sort(reverse=True)
+        
+        built = 0
+        for _, start in candidates[:max_routes]:
+            path = []
+            current = start
+            while next_hop[current] is not None:
+                path.append((current, next_hop[current]))
+                current = next_hop[current]
+            for segment_start, segment_end in reversed(path):
+                if turn.has_rail(segment_start, segment_end):
+                    continue
+                if turn.gdp < cost or turn.expired() or not self._build_railway(turn, segment_start, segment_end):
+                    return built
+                built += 1
+        return built
+        
+    @staticmethod
+    def _conflict_entries(turn):
+        """进入冲突区的铁路段（含建设中），返回{(区外格子, 区内格子)}"""
+        entries = set()
+        for coords, distance in turn.goal.items():
+            if distance != 1 or coords not in turn.own:
+                continue
+            for neighbor in turn.rails.get(coords, ()):
+                if turn.goal.get(neighbor) == 0:
+                    entries.add((coords, neighbor))
+        return entries
+        
+    def _add_conflict_entries(self, turn):
+        """冲突区的铁路入口不足时，修建不经过现有入口的路线（每段铁路的运力按回合计算）"""
+        while not turn.expired():
+            entries = self._conflict_entries(turn)
+            if not entries or len(entries) >= self.CONFLICT_ENTRIES:
+                return
+            if not self._extend_to_conflict(turn, blocked=entries, max_routes=1):
+                return
+                
+    def _upgrade_towns(self, turn, level, count=None):
+        """合并升级价值最高的已互联城镇
+        
+        升级价值 = GDP增益 × 剩余回合 + 腾出的村落名额价值 - 损失的兵力折算 - 升级成本；
+        合并后动员的军队超过铁路运力时无法上路，相应兵力全部计为损失
+        
+        Args:
+            level (str): 参与合并的城镇等级，Town.VILLAGE或Town.SMALL_CITY
+            count (int): 最多合并的次数，None表示不限
+        """
+        cost = Town.MERGE_COST[level]
+        next_level = Town.UPGRADE_PATH[level]
+        gdp = Town.TOWN_CONFIG
+        horizon = max(0, self.LATE_ROUNDS + 10 - turn.game_state.round - 1)
+        capacity = Railway.RAILWAY_CONFIG[Railway.LEVEL_1]["capacity"]
+        
+        while turn.gdp >= cost and count != 0 and not turn.expired():
+            best = None
+            for region in turn.regions:
+                if sum(1 for town in region.towns if town.level == next_level) >= (2 if next_level == Town.SMALL_CITY else 1):
+                    continue
+                towns = [
+                    town for town in region.towns
+                    if town.owner == turn.player and town.level == level
+                    and not town.is_under_construction and not town.mobilized
+                ]
+                free_tiles = sum(1 for hex_tile in region.hex_tiles if not hex_tile.town)
+                for i, town1 in enumerate(towns):
+                    for town2 in towns[i + 1:]:
+                        if not region.are_towns_connected(town1, town2):
+                            continue
+                        merged = Town(town1.name, next_level, turn.player)
+                        troops = self._troop_potential(merged)
+                        if troops > capacity:
+                            troops = 0
+                        troop_loss = self._troop_potential(town1) + self._troop_potential(town2) - troops
+                        value = (gdp[next_level]["gdp"] - 2 * gdp[level]["gdp"]) * horizon - cost
+                        value -= troop_loss * self.TROOP_VALUE
+                        if level == Town.VILLAGE and free_tiles:
+                            # 合并腾出村落名额，可再建一个村落
+                            value += gdp[Town.VILLAGE]["gdp"] * (horizon - 1) - gdp[Town.VILLAGE]["cost"]
+                        if best is None or value > best[0]:
+                            best = (value, region, town1, town2)
+            if best is None or best[0] <= 0:
+                return
+            _, region, town1, town2 = best
+            coords1 = turn.coords(town1.hex_tiles[0])
+            coords2 = turn.coords(town2.hex_tiles[0])
+            if not turn.controller.upgrade_town(region.id, coords1, coords2, turn.player, level):
+                return
+            turn.actions.append(["upgrade_town", region.id, coords1, coords2, level])
+            if count is not None:
+                count -= 1
+            
+    def _mobilize(self, turn):
+        """动员冲突区以外所有区域的可用兵力（冲突区内的军队不计入抵达兵力）"""
+        for region in turn.regions:
+            if region.id == turn.conflict_id or turn.expired():
+                continue
+            if not any(
+                town.owner == turn.player and not town.is_under_construction
+                and int(town.population * Town.MOBILIZATION_RATE.get(town.level, 0)) > town.mobilized
+                for town in region.towns
+            ):
+                continue
+            result = turn.controller.mobilize_troops(region.id, None, None, turn.player, True)
+            if result.get("success") and result.get("total_mobilized"):
+                turn.actions.append(["mobilize_troops", region.id, result["total_mobilized"]])
+                
+    def _expected_forces(self, turn, player, rounds):
+        """某阵营已抵达冲突区的兵力加上预计在若干回合内抵达的兵力
+        
+        按距离场估算在途军队到冲突区的铁路段数，不考虑运力竞争
+        """
+        game_state = turn.game_state
+        forces = game_state.arrived_forces.get(player, 0)
+        target_id = game_state.conflict_regions.get(player)
+        target = game_state.regions.get(target_id)
+        if target is None:
+            return forces
+        field = game_state.railway_network.route_field(target_id, target.hex_tiles)
+        for army in game_state.armies:
+            if army.owner != player or army.status == army.ARRIVED or army.current_position is None:
+                continue
+            # 动员后第三个回合才开始运输
+            moving_rounds = rounds - max(0, 2 - (game_state.round - army.generation_time))
+            distance = field.distance.get(army.current_position)
+            if distance is not None and 0 < distance <= moving_rounds * self.MOVES_PER_ROUND:
+                forces += army.amount
+        return forces
+        
+    def _consider_war(self, turn):
+        """评估是否宣战
+        
+        结算前能抵达的兵力达到对手的1.6倍且大部分潜在兵力已动员时宣战；
+        紧张期最后一回合只要兵力占优也宣战
+        """
+        game_state = turn.game_state
+        if game_state.phase != GameState.TENSION_PHASE or game_state.war_declared:
+            return
+            
+        own = self._expected_forces(turn, turn.player, 3)
+        enemy = max(
+            (self._expected_forces(turn, player, 3) for player in game_state.players if player != turn.player),
+            default=0
+        )
+        
+        potential = 0
+        mobilized = 0
+        for town in turn.own_towns():
+            if town.is_under_construction or town.region.id == turn.conflict_id:
+                continue
+            potential += max(0, int(town.population * Town.MOBILIZATION_RATE.get(town.level, 0)) - town.mobilized)
+            mobilized += town.mobilized
+        idle_ratio = potential / (potential + mobilized) if potential + mobilized else 1
+        
+        last_chance = game_state.round >= self.LATE_ROUNDS + 10
+        if ((own >= self.WAR_ADVANTAGE * max(enemy, 1) and idle_ratio <= self.MAX_IDLE_POTENTIAL)
+                or (last_chance and own > enemy)):
+            if turn.controller.declare_war(turn.player):
+                turn.actions.append(["declare_war"])
@@ -3,13 +3,51 @@
 负责游戏核心逻辑和流程控制
 """
 
-from .models import GameState, Town, Railway, Army
-from .map_generator import create_demo_game_map
+import functools
+import logging
+
+from .models import GameState, RegionBorders, Town, Railway, Army
+from .map_generator import MapGenerator, ProceduralMapGenerator
+from .troop_routing import TroopRouter
+from .static_map import build_static_map
+
+logger = logging.getLogger(__name__)
+# 军队状态和逐格移动的记录，每支军队每步都会产生，默认级别下不输出
+movement_logger = logging.getLogger("game.movement")
+
+# 记入操作日志、可以重放的命令
+JOURNALED_COMMANDS = {
+    "next_round", "build_town", "build_railway",
+    "mobilize_troops", "declare_war", "upgrade_town"
+}
+
+def journaled(method):
+    """把修改了游戏状态的控制器命令及其参数记入操作日志，恢复游戏时按顺序重放
+    
+    被拒绝（没有修改状态版本号）或抛出异常的命令不记录；
+    命令内部再调用其他命令时只记录最外层的命令
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._journal_depth:
+            return method(self, *args, **kwargs)
+        version = self.game_state.version
+        self._journal_depth += 1
+        try:
+            result = method(self, *args, **kwargs)
+        finally:
+            self._journal_depth -= 1
+        if self.game_state.version != version:
+            self.journal.append([method.__name__, list(args), kwargs])
+        return result
+    return wrapper
 
 class GameController:
     """游戏控制器"""
     
     _instance = None
+    _static_maps = {}  # 地图名称 -> 预编码的静态地图数据，所有对局共享
+    _region_borders = {}  # 地图名称 -> 区域边界（以格子编号记录），所有对局共享
     
     @classmethod
     def get_instance(cls):
@@ -17,58 +55,309 @@ class GameController:
         if cls._instance is None:
             cls._instance = GameController()
         return cls._instance
+        
+    @classmethod
+    def get_region_borders(cls, map_name, hex_grid):
+        """获取地图的区域边界，同一地图只在第一次建立时计算
+        
+        Args:
+            map_name (str): 地图名称
+            hex_grid (HexGrid): 该地图的格子相邻表（格子须已加入区域）
+            
+        Returns:
+            RegionBorders: 区域边界
+        """
+        borders = cls._region_borders.get(map_name)
+        if borders is None:
+            borders = cls._region_borders[map_name] = RegionBorders(hex_grid)
+        return borders
     
-    def __init__(self):
-        """初始化游戏控制器"""
+    @classmethod
+    def from_saved_state(cls, saved):
+        """从get_saved_state生成的存档恢复游戏控制器
+        
+        重新生成地图后按存档放回城镇、铁路和军队，格子引用与新地图共享
+        
+        Args:
+            saved (dict): 存档数据
+            
+        Returns:
+            GameController: 恢复的游戏控制器
+        """
+        map_options = saved.get("map_options")
+        controller = cls(ProceduralMapGenerator(**map_options) if map_options else None)
+        game_state = controller.game_state
+        
+        # 回合、阶段和战争等基本信息
+        for key in ("round", "phase", "current_player", "war_declared", "war_countdown",
+                    "game_ended", "winner", "final_forces", "arrived_forces", "factions",
+                    "conflict_regions", "max_rounds", "state_id", "version"):
+            if key in saved:
+                setattr(game_state, key, saved[key])
+        if saved.get("conflict_region") in game_state.regions:
+            game_state.conflict_region = game_state.regions[saved["conflict_region"]]
+        controller.player_resources = saved["player_resources"]
+        
+        # 先放回全部城镇，再放回铁路，铁路登记时据此恢复城镇连通性
+        for region_data in saved["regions"]:
+            controller._restore_towns(game_state.regions[region_data["id"]], region_data["towns"])
+        for region_data in saved["regions"]:
+            controller._restore_railways(game_state.regions[region_data["id"]], region_data["railways"])
+            
+        # 军队
+        towns = {town.name: town for region in game_state.regions.values() for town in region.towns}
+        for army_data in saved["armies"]:
+            source_town = towns.get(army_data["source_town_name"])
+            if source_town is None:
+                # 来源城镇已被合并，只保留名称
+                source_town = Town(army_data["source_town_name"], Town.VILLAGE, army_data["owner"])
+            army = Army(source_town, army_data["amount"], army_data["owner"])
+            army.status = army_data["status"]
+            army.target_region_id = army_data["target_region_id"]
+            army.generation_time = army_data["generation_time"]
+            if army_data["current_position"]:
+                army.current_position = game_state.get_hex(controller._coords(army_data["current_position"]))
+            army.path_to_conflict = [
+                game_state.get_hex(controller._coords(coords)) for coords in army_data["path_to_conflict"]
+            ]
+            game_state.armies.append(army)
+            
+        # 存档不含变更记录：把全部内容登记为在恢复的版本上变化，持有旧版本的客户端据此取回完整内容
+        for key in [("region", region_id) for region_id in game_state.regions] + [("armies",), ("players",)]:
+            game_state.changes[key] = game_state.version
+            
+        return controller
+        
+    @staticmethod
+    def _coords(coords):
+        """{"q", "r", "s"}字典转为坐标元组"""
+        return (coords["q"], coords["r"], coords["s"])
+        
+    def _restore_towns(self, region, towns_data):
+        """按存档把城镇放回区域"""
+        for town_data in towns_data:
+            town = Town(town_data["name"], town_data["level"], town_data["owner"])
+            tiles = [self.game_state.get_hex(self._coords(coords)) for coords in town_data["tiles"]]
+            region.add_town(town, tiles[0])
+            
+            # 合并后的城镇占据多个格子
+            for hex_tile in tiles[1:]:
+                hex_tile.town = town
+                town.hex_tiles.append(hex_tile)
+                
+            before = town.get_economy()
+            town.population = town_data["population"]
+            town.mobilized = town_data["mobilized"]
+            town.is_under_construction = town_data["is_under_construction"]
+            region.update_economy(town.owner, before, town.get_economy())
+            
+    def _restore_railways(self, region, railways_data):
+        """按存档把铁路放回区域，已建成的铁路同时加入铁路网络"""
+        ledger = self.game_state.railway_network.ledger
+        for railway_data in railways_data:
+            start_hex = self.game_state.get_hex(self._coords(railway_data["start"]))
+            end_hex = self.game_state.get_hex(self._coords(railway_data["end"]))
+            railway = Railway(start_hex, end_hex, railway_data["level"])
+            railway.is_under_construction = railway_data["is_under_construction"]
+            region.add_railway(railway)
+            if railway_data["troops"]:
+                ledger.add(railway, railway_data["troops"])
+                
+    def __init__(self, generator=None):
+        """初始化游戏控制器
+        
+        Args:
+            generator (MapGenerator): 地图生成器，默认生成演示地图
+        """
         self.game_state = None
-        self.reset_game()
+        self.map_name = "demo"  # 地图名称；同名地图每局拓扑相同，静态地图数据可在对局间共享
+        self.map_options = None  # 重新生成地图的参数（ProceduralMapGenerator），演示地图为None
+        self.journal = []  # 尚未提交的命令 [命令名, 位置参数, 关键字参数]
+        self._journal_depth = 0
+        self.reset_game(generator)
         
-    def reset_game(self):
-        """重置游戏状态"""
-        self.game_state = GameState()
+    def reset_game(self, generator=None):
+        """重置游戏状态
         
-        # 初始化地图
-        regions = create_demo_game_map()
+        Args:
+            generator (MapGenerator): 地图生成器，默认生成演示地图
+        """
+        self.game_state = GameState()
+        self.needs_snapshot = True  # 重置不是可重放的命令，提交时需要保存完整快照
+        
+        # 初始化地图，复用生成器的坐标索引作为全局格子索引
+        generator = generator or MapGenerator()
+        regions = generator.generate_map()
+        self.map_name = generator.map_name
+        self.map_options = generator.get_options()
+        generator.configure(self.game_state)
+        self.game_state.use_hex_index(
+            generator.hex_tiles, generator.grid, self.get_region_borders(self.map_name, generator.grid)
+        )
         for region in regions.values():
             self.game_state.add_region(region)
             
+        # 军队批量调度器
+        self.troop_router = TroopRouter(self.game_state)
+            
         # 初始化玩家资源：只在游戏开始时给予初始GDP 200
         self.player_resources = {
-            "德军": {"gdp": 200, "population": 0},
-            "协约国": {"gdp": 200, "population": 0}
+            player: {"gdp": 200, "population": 0} for player in self.game_state.players
         }
     
+    def take_journal(self):
+        """取出尚未提交的命令并清空"""
+        journal = self.journal
+        self.journal = []
+        return journal
+        
+    def replay(self, actions):
+        """按顺序重放操作日志中的命令（恢复游戏时使用），重放的命令不再记入日志
+        
+        日志中只有原始执行时成功的命令，重放时抛出的异常说明状态已不一致，直接向上抛出
+        
+        Args:
+            actions (list): [命令名, 位置参数, 关键字参数]，来自take_journal
+        """
+        for name, args, kwargs in actions:
+            if name not in JOURNALED_COMMANDS:
+                raise ValueError(f"未知的命令: {name}")
+            # 坐标在日志中以列表保存，还原为元组
+            args = [tuple(arg) if isinstance(arg, list) else arg for arg in args]
+            getattr(self, name)(*args, **kwargs)
+        self.journal = []
+        
+    def get_static_map(self):
+        """获取预编码的静态地图数据（区域、格子、阵营、相邻区域）"""
+        static_map = self._static_maps.get(self.map_name)
+        if static_map is None:
+            static_map = build_static_map(self.game_state)
+            GameController._static_maps[self.map_name] = static_map
+        return static_map
+    
     def get_game_state(self):
-        """获取当前游戏状态"""
-        state_dict = {
+        """获取当前游戏状态
+        
+        不包含地图格子，格子等静态拓扑通过get_static_map单独提供
+        """
+        state_dict = self._serialize_meta()
+        state_dict.update({
+            # 静态地图版本号，客户端据此判断缓存的地图是否可用
+            "map_version": self.get_static_map().etag,
+            "regions": [self._serialize_region(region) for region in self.game_state.regions.values()],
+            "players": self._serialize_players(),
+            # 添加势力划分信息
+            "factions": self.game_state.factions,
+            # 添加冲突地区信息
+            "conflict_regions": self.game_state.conflict_regions,
+            # 添加军队信息
+            "armies": self._serialize_armies()
+        })
+        return state_dict
+    
+    def get_game_state_delta(self, since, state_id=None):
+        """获取自客户端版本以来发生变化的游戏状态
+        
+        只返回发生变化的区域（城镇和铁路）、军队和玩家资源；
+        版本号无效或不属于当前这局游戏时退回完整状态
+        
+        Args:
+            since (int): 客户端已有的状态版本号
+            state_id (str, optional): 客户端状态所属的游戏标识
+            
+        Returns:
+            dict: 增量状态（"full"为False）或完整状态（"full"为True）
+        """
+        game_state = self.game_state
+        if (since is None or since < 0 or since > game_state.version or
+                (state_id is not None and state_id != game_state.state_id)):
+            state_dict = self.get_game_state()
+            state_dict["full"] = True
+            return state_dict
+        
+        changed = game_state.changed_since(since)
+        state_dict = self._serialize_meta()
+        state_dict["full"] = False
+        state_dict["regions"] = [
+            self._serialize_region(game_state.regions[key[1]])
+            for key in changed if key[0] == "region" and key[1] in game_state.regions
+        ]
+        if ("players",) in changed:
+            state_dict["players"] = self._serialize_players()
+        if ("armies",) in changed:
+            state_dict["armies"] = self._serialize_armies()
+        return state_dict
+    
+    def get_saved_state(self):
+        """获取可以用from_saved_state完整恢复的存档
+        
+        在完整游戏状态的基础上补充恢复所需的数据：全部军队及其行军路线和生成回合、
+        玩家资源、冲突区域、回合上限和生成地图的参数
+        """
+        game_state = self.game_state
+        conflict_region = getattr(game_state, 'conflict_region', None)
+        state_dict = self.get_game_state()
+        state_dict.update({
+            "max_rounds": game_state.max_rounds,
+            "conflict_region": conflict_region.id if conflict_region else None,
+            "player_resources": self.player_resources,
+            "map_options": self.map_options,
+            "armies": [
+                {
+                    "owner": army.owner,
+                    "amount": army.amount,
+                    "status": army.status,
+                    "source_town_name": army.source_town_name,
+                    "current_position": self._serialize_coords(army.current_position),
+                    "target_region_id": army.target_region_id,
+                    "generation_time": army.generation_time,
+                    "path_to_conflict": [self._serialize_coords(t) for t in army.path_to_conflict]
+                }
+                for army in game_state.armies
+            ]
+        })
+        return state_dict
+    
+    @staticmethod
+    def _serialize_coords(hex_tile):
+        """格子坐标转为{"q", "r", "s"}字典"""
+        if hex_tile is None:
+            return None
+        return {"q": hex_tile.q, "r": hex_tile.r, "s": hex_tile.s}
+    
+    def _serialize_meta(self):
+        """序列化回合、阶段、战争和版本等基本信息"""
+        return {
+            "version": self.game_state.version,
+            "state_id": self.game_state.state_id,
             "round": self.game_state.round,
             "phase": self.game_state.phase,
             "current_player": self.game_state.current_player,
             "war_declared": self.game_state.war_declared,
             "war_countdown": self.game_state.war_countdown,
-            "regions": [],
-            "players": {
-                player: {
-                    "gdp": self.player_resources[player]["gdp"],
-                    "population": self.player_resources[player]["population"]
-                }
-                for player in self.game_state.players
-            },
-            # 添加势力划分信息
-            "factions": self.game_state.factions,
-            # 添加冲突地区信息
-            "conflict_regions": self.game_state.conflict_regions,
             # 添加游戏结束相关信息
             "game_ended": self.game_state.game_ended,
             "winner": self.game_state.winner,
             "final_forces": self.game_state.final_forces,
             # 添加已到达冲突区域的兵力信息
-            "arrived_forces": self.game_state.arrived_forces,
-            # 添加军队信息
-            "armies": []
+            "arrived_forces": self.game_state.arrived_forces
         }
-        
-        # 添加军队信息
+    
+    def _serialize_players(self):
+        """序列化玩家资源"""
+        return {
+            player: {
+                "gdp": self.player_resources[player]["gdp"],
+                "population": self.player_resources[player]["population"],
+                "mobilized": self.game_state.economy[player]["mobilized"],
+                "towns": self.game_state.economy[player]["towns"]
+            }
+            for player in self.game_state.players
+        }
+    
+    def _serialize_armies(self):
+        """序列化军队信息"""
+        armies = []
         for army in self.game_state.armies:
             if not army.current_position:
                 continue
@@ -85,64 +374,52 @@ class GameController:
                 },
                 "target_region_id": army.target_region_id
             }
-            state_dict["armies"].append(army_dict)
+            armies.append(army_dict)
+        return armies
+    
+    def _serialize_region(self, region):
+        """序列化区域的城镇和铁路信息"""
+        region_dict = {
+            "id": region.id,
+            "name": region.name,
+            "towns": [],
+            "railways": []
+        }
         
-        # 添加区域信息
-        for region in self.game_state.regions.values():
-            region_dict = {
-                "id": region.id,
-                "name": region.name,
-                "towns": [],
-                "railways": [],
-                "hex_tiles": []  # 添加格子信息
-            }
-            
-            # 添加六边形格子信息
-            for hex_tile in region.hex_tiles:
-                hex_dict = {
-                    "q": hex_tile.q,
-                    "r": hex_tile.r,
-                    "s": hex_tile.s
-                }
-                region_dict["hex_tiles"].append(hex_dict)
-            
-            # 添加城镇信息
-            for town in region.towns:
-                # 寻找城镇所在的格子
-                hex_coords = None
-                for hex_tile in region.hex_tiles:
-                    if hex_tile.town == town:
-                        hex_coords = {"q": hex_tile.q, "r": hex_tile.r, "s": hex_tile.s}
-                        break
-                
-                town_dict = {
-                    "name": town.name,
-                    "level": town.level,
-                    "owner": town.owner,
-                    "population": town.population,
-                    "mobilized": town.mobilized,
-                    "gdp": town.get_gdp(),
-                    "coords": hex_coords,  # 添加城镇坐标
-                    "is_under_construction": town.is_under_construction  # 添加建设状态
-                }
-                region_dict["towns"].append(town_dict)
+        # 添加城镇信息
+        for town in region.towns:
+            # 城镇所在的格子（合并后的城镇占据原有城镇的全部格子）
+            tiles = [{"q": hex_tile.q, "r": hex_tile.r, "s": hex_tile.s} for hex_tile in town.hex_tiles]
+            hex_coords = tiles[0] if tiles else None
             
-            # 添加铁路信息
-            for railway in region.railways:
-                railway_dict = {
-                    "level": railway.level,
-                    "capacity": railway.get_capacity(),
-                    "troops": railway.troops,
-                    "start": {"q": railway.start_hex.q, "r": railway.start_hex.r, "s": railway.start_hex.s},
-                    "end": {"q": railway.end_hex.q, "r": railway.end_hex.r, "s": railway.end_hex.s},
-                    "is_under_construction": railway.is_under_construction  # 添加建设状态
-                }
-                region_dict["railways"].append(railway_dict)
-            
-            state_dict["regions"].append(region_dict)
+            town_dict = {
+                "name": town.name,
+                "level": town.level,
+                "owner": town.owner,
+                "population": town.population,
+                "mobilized": town.mobilized,
+                "gdp": town.get_gdp(),
+                "coords": hex_coords,  # 添加城镇坐标
+                "tiles": tiles,  # 城镇占据的全部格子
+                "is_under_construction": town.is_under_construction  # 添加建设状态
+            }
+            region_dict["towns"].append(town_dict)
+        
+        # 添加铁路信息
+        for railway in region.railways:
+            railway_dict = {
+                "level": railway.level,
+                "capacity": railway.get_capacity(),
+                "troops": railway.troops,
+                "start": {"q": railway.start_hex.q, "r": railway.start_hex.r, "s": railway.start_hex.s},
+                "end": {"q": railway.end_hex.q, "r": railway.end_hex.r, "s": railway.end_hex.s},
+                "is_under_construction": railway.is_under_construction  # 添加建设状态
+            }
+            region_dict["railways"].append(railway_dict)
         
-        return state_dict
+        return region_dict
     
+    @journaled
     def next_round(self, current_faction):
         """进入下一回合
         
@@ -152,25 +429,37 @@ class GameController:
         # 先计算资源（建设中的单位不会产生GDP）
         self._calculate_resources()
         
+        # 本回合发生变化的状态，用于增量状态接口
+        changed = {("players",)}
+        
         # 然后完成建设（这些单位要到下一回合才会产生GDP）
         for region in self.game_state.regions.values():
             # 完成城镇建设
             for town in region.towns:
                 if town.is_under_construction:
                     town.complete_construction()
+                    changed.add(("region", region.id))
             
             # 完成铁路建设
             for railway in region.railways:
                 if railway.is_under_construction:
                     railway.complete_construction()
+                    changed.add(("region", region.id))
         
         # 进入下一回合，但保持当前玩家不变
         self.game_state.round += 1
         self.game_state.phase = self.game_state.get_phase()
         self.game_state.current_player = current_faction
         
-        # 更新军队状态和位置
+        # 更新军队状态和位置，运量清零和新增运量的铁路所在区域都发生了变化
+        ledger = self.game_state.railway_network.ledger
+        railways = ledger.loaded_railways()
         self._update_armies()
+        railways.extend(ledger.loaded_railways())
+        changed.update(("region", railway.region.id) for railway in railways if railway.region)
+        if self.game_state.armies:
+            changed.add(("armies",))
+        self.game_state.touch(*changed)
         
         # 战争倒计时
         if self.game_state.war_declared:
@@ -187,48 +476,29 @@ class GameController:
             # 计算当前回合的GDP产出
             round_gdp = 0
             
-            # 按区域计算GDP
+            # 按区域汇总GDP
             for region in self.game_state.regions.values():
                 # 只计算该玩家在此区域的城镇GDP
-                region_gdp = 0
-                player_towns = [town for town in region.towns if town.owner == player]
-                if player_towns:
-                    # 计算该玩家在此区域的基础GDP
-                    base_gdp = sum(town.get_gdp() for town in player_towns)
-                    
-                    # 如果区域内该玩家的所有城镇都互联，加成20%
-                    if len(player_towns) > 1:
-                        # 检查所有城镇是否互联
-                        all_connected = True
-                        for i in range(len(player_towns)):
-                            for j in range(i + 1, len(player_towns)):
-                                if not region.are_towns_connected(player_towns[i], player_towns[j]):
-                                    all_connected = False
-                                    break
-                            if not all_connected:
-                                break
-                        
-                        if all_connected:
-                            region_gdp = base_gdp * 1.2
-                        else:
-                            region_gdp = base_gdp
-                    else:
-                        region_gdp = base_gdp
+                economy = region.economy.get(player)
+                if not economy or not economy["towns"]:
+                    continue
+                base_gdp = economy["gdp"]
+                
+                # 如果区域内该玩家的所有城镇都互联，加成20%
+                if economy["towns"] > 1:
+                    player_towns = [town for town in region.towns if town.owner == player]
+                    if region.connectivity.all_connected(player_towns):
+                        base_gdp = base_gdp * 1.2
                         
-                round_gdp += region_gdp
+                round_gdp += base_gdp
             
             # 更新玩家资源：保留上回合剩余GDP，加上本回合产出
             self.player_resources[player]["gdp"] += round_gdp
             
-            # 更新人口：将所有城镇的人口加到玩家总人口中
-            total_population = 0
-            for region in self.game_state.regions.values():
-                for town in region.towns:
-                    if town.owner == player and not town.is_under_construction:
-                        total_population += town.population
-            
-            self.player_resources[player]["population"] = total_population
+            # 更新人口：所有已建成城镇的人口总和
+            self.player_resources[player]["population"] = self.game_state.economy[player]["population"]
     
+    @journaled
     def build_town(self, region_id, hex_coords, town_name, player):
         """建造城镇
         
@@ -249,12 +519,10 @@ class GameController:
         if not region:
             return False
         
-        # 找到对应的格子
-        hex_tile = None
-        for tile in region.hex_tiles:
-            if (tile.q, tile.r, tile.s) == hex_coords:
-                hex_tile = tile
-                break
+        # 找到对应的格子（必须属于该区域）
+        hex_tile = self.game_state.get_hex(hex_coords)
+        if hex_tile and self.game_state.get_hex_region(hex_tile) is not region:
+            hex_tile = None
         
         if not hex_tile or hex_tile.town:
             return False
@@ -268,10 +536,12 @@ class GameController:
             self.player_resources[player]["gdp"] -= Town.TOWN_CONFIG[Town.VILLAGE]["cost"]
             # 增加人口资源
             self.player_resources[player]["population"] += town.population
+            self.game_state.touch(("region", region.id), ("players",))
             return True
         
         return False
     
+    @journaled
     def build_railway(self, region_id, start_coords, end_coords, player):
         """建造铁路
         
@@ -286,44 +556,31 @@ class GameController:
         """
         # 检查是否有足够资源
         if self.player_resources[player]["gdp"] < Railway.RAILWAY_CONFIG[Railway.LEVEL_1]["cost"]:
-            print(f"GDP不足，需要{Railway.RAILWAY_CONFIG[Railway.LEVEL_1]['cost']}，当前{self.player_resources[player]['gdp']}")
+            logger.info("GDP不足，需要%s，当前%s", Railway.RAILWAY_CONFIG[Railway.LEVEL_1]['cost'], self.player_resources[player]['gdp'])
             return False
         
         # 找到对应的格子（可能在不同区域）
-        start_hex = None
-        end_hex = None
-        start_region = None
-        end_region = None
-        
-        # 遍历所有区域寻找起点和终点格子
-        for region_id, region in self.game_state.regions.items():
-            for tile in region.hex_tiles:
-                if (tile.q, tile.r, tile.s) == start_coords:
-                    start_hex = tile
-                    start_region = region
-                elif (tile.q, tile.r, tile.s) == end_coords:
-                    end_hex = tile
-                    end_region = region
-                
-                # 如果两个格子都找到了，可以提前结束循环
-                if start_hex and end_hex:
-                    break
-            
-            # 如果两个格子都找到了，可以提前结束外层循环
-            if start_hex and end_hex:
-                break
+        start_hex = self.game_state.get_hex(start_coords)
+        end_hex = self.game_state.get_hex(end_coords)
+        start_region = self.game_state.get_hex_region(start_hex)
+        end_region = self.game_state.get_hex_region(end_hex)
         
         if not start_hex:
-            print(f"找不到起点格子: {start_coords}")
+            logger.info("找不到起点格子: %s", start_coords)
             return False
             
         if not end_hex:
-            print(f"找不到终点格子: {end_coords}")
+            logger.info("找不到终点格子: %s", end_coords)
             return False
         
         # 使用二维奇偶性检查相邻
         if not start_hex.is_adjacent(end_hex):
-            print(f"格子不相邻: 起点=({start_hex.q},{start_hex.r})，终点=({end_hex.q},{end_hex.r})")
+            logger.info("格子不相邻: 起点=%s，终点=%s", start_hex, end_hex)
+            return False
+            
+        # 每条边只能有一条铁路（含建设中）
+        if self.game_state.railway_network.find_railway(start_hex, end_hex):
+            logger.info("格子之间已有铁路: 起点=%s，终点=%s", start_hex, end_hex)
             return False
         
         # 创建新铁路
@@ -335,17 +592,20 @@ class GameController:
             
             # 输出跨区域信息
             if start_region.id != end_region.id:
-                print(f"成功建造跨区域铁路：从{start_region.id}区域到{end_region.id}区域")
+                logger.info("成功建造跨区域铁路：从%s区域到%s区域", start_region.id, end_region.id)
             
             # 扣除资源
             self.player_resources[player]["gdp"] -= Railway.RAILWAY_CONFIG[Railway.LEVEL_1]["cost"]
+            self.game_state.touch(("region", start_region.id), ("players",))
             
-            print(f"成功建造铁路: 从({start_hex.q},{start_hex.r})到({end_hex.q},{end_hex.r})")
+            logger.info("成功建造铁路: 从%s到%s", start_hex, end_hex,
+                        extra={"event": "build_railway", "player": player, "region": start_region.id})
             return True
         except Exception as e:
-            print(f"建造铁路失败: {str(e)}")
+            logger.exception("建造铁路失败: %s", e)
             return False
     
+    @journaled
     def mobilize_troops(self, region_id, town_name=None, amount=None, player=None, is_region_mobilization=False):
         """动员军队
         
@@ -376,14 +636,8 @@ class GameController:
             
             # 对每个城镇进行动员
             for town in player_towns:
-                # 根据城镇等级确定动员率
-                mobilization_rate = 0
-                if town.level == Town.VILLAGE:
-                    mobilization_rate = 0.5  # 村落动员率50%
-                elif town.level == Town.SMALL_CITY:
-                    mobilization_rate = 0.4  # 小城市动员率40%
-                elif town.level == Town.LARGE_CITY:
-                    mobilization_rate = 0.3  # 大城市动员率30%
+                # 根据城镇等级确定动员率（村落50%，小城市40%，大城市30%）
+                mobilization_rate = Town.MOBILIZATION_RATE.get(town.level, 0)
                 
                 # 计算最大可动员数量
                 max_mobilization = int(town.population * mobilization_rate)
@@ -391,7 +645,7 @@ class GameController:
                 
                 if available_pop > 0:
                     # 执行动员
-                    town.mobilized += available_pop
+                    town.mobilize(available_pop)
                     self.player_resources[player]["population"] -= available_pop
                     total_mobilized += available_pop
                     
@@ -402,11 +656,9 @@ class GameController:
                     # 设置创建回合
                     army.generation_time = self.game_state.round
                     
-                    # 找到城镇所在的格子
-                    for hex_tile in region.hex_tiles:
-                        if hex_tile.town == town:
-                            army.current_position = hex_tile
-                            break
+                    # 军队从城镇所在的格子出发
+                    if town.hex_tiles:
+                        army.current_position = town.hex_tiles[0]
                     
                     # 添加到游戏状态
                     self.game_state.armies.append(army)
@@ -417,6 +669,9 @@ class GameController:
                         "mobilized": available_pop
                     })
             
+            if total_mobilized > 0:
+                self.game_state.touch(("region", region.id), ("armies",), ("players",))
+            
             return {
                 "success": True,
                 "total_mobilized": total_mobilized,
@@ -444,7 +699,7 @@ class GameController:
             actual_amount = min(amount, available_pop)
             
             # 执行动员
-            town.mobilized += actual_amount
+            town.mobilize(actual_amount)
             self.player_resources[player]["population"] -= actual_amount
             
             # 创建军队单位
@@ -455,17 +710,17 @@ class GameController:
                 # 设置创建回合
                 army.generation_time = self.game_state.round
                 
-                # 找到城镇所在的格子
-                for hex_tile in region.hex_tiles:
-                    if hex_tile.town == town:
-                        army.current_position = hex_tile
-                        break
+                # 军队从城镇所在的格子出发
+                if town.hex_tiles:
+                    army.current_position = town.hex_tiles[0]
                 
                 # 添加到游戏状态
                 self.game_state.armies.append(army)
+                self.game_state.touch(("region", region.id), ("armies",), ("players",))
             
             return actual_amount
     
+    @journaled
     def declare_war(self, player):
         """宣战
         
@@ -479,8 +734,12 @@ class GameController:
             return False
             
         # 使用新的宣战机制
-        return self.game_state.declare_war(player)
+        if self.game_state.declare_war(player):
+            self.game_state.touch()
+            return True
+        return False
     
+    @journaled
     def upgrade_town(self, region_id, town1_coords, town2_coords, player, upgrade_type):
         """升级城镇（合并两个城镇）
         
@@ -497,69 +756,69 @@ class GameController:
         # 获取区域
         region = self.game_state.regions.get(region_id)
         if not region:
-            print(f"找不到区域: {region_id}")
+            logger.info("找不到区域: %s", region_id)
             return False
             
-        # 查找两个城镇
+        # 查找两个城镇（格子必须属于该区域）
         town1 = None
         town2 = None
-        town1_hex = None
-        town2_hex = None
-        
-        for hex_tile in region.hex_tiles:
-            # 查找第一个城镇
-            if (hex_tile.q, hex_tile.r, hex_tile.s) == town1_coords and hex_tile.town:
-                town1 = hex_tile.town
-                town1_hex = hex_tile
-            # 查找第二个城镇
-            elif (hex_tile.q, hex_tile.r, hex_tile.s) == town2_coords and hex_tile.town:
-                town2 = hex_tile.town
-                town2_hex = hex_tile
+        town1_hex = self.game_state.get_hex(town1_coords)
+        town2_hex = self.game_state.get_hex(town2_coords)
+        
+        if town1_hex and self.game_state.get_hex_region(town1_hex) is region:
+            town1 = town1_hex.town
+        if town2_hex and self.game_state.get_hex_region(town2_hex) is region:
+            town2 = town2_hex.town
         
         # 检查两个城镇是否存在
         if not town1 or not town2:
-            print(f"找不到要合并的城镇")
+            logger.info("找不到要合并的城镇")
             return False
         
+        # 同一坐标或已合并城镇的两个格子指向同一个城镇
+        if town1 is town2:
+            logger.info("不能将城镇与自身合并")
+            return False
+            
         # 检查城镇所有权
         if town1.owner != player or town2.owner != player:
-            print(f"城镇不属于玩家{player}")
+            logger.info("城镇不属于玩家%s", player)
             return False
         
         # 检查城镇是否在建设中
         if town1.is_under_construction or town2.is_under_construction:
-            print(f"城镇正在建设中，无法合并")
+            logger.info("城镇正在建设中，无法合并")
             return False
             
         # 检查城镇是否已动员兵力（已动员的区域不能建设）
         if town1.mobilized > 0 or town2.mobilized > 0:
-            print(f"已动员兵力的城镇不能进行建设")
+            logger.info("已动员兵力的城镇不能进行建设")
             return False
         
         # 检查城镇等级是否符合升级类型
         if upgrade_type == 'village' and (town1.level != 'village' or town2.level != 'village'):
-            print(f"只能合并两个村落升级为小城市")
+            logger.info("只能合并两个村落升级为小城市")
             return False
         elif upgrade_type == 'small_city' and (town1.level != 'small_city' or town2.level != 'small_city'):
-            print(f"只能合并两个小城市升级为大城市")
+            logger.info("只能合并两个小城市升级为大城市")
             return False
         
         # 检查两个城镇是否通过铁路互联
         if not region.are_towns_connected(town1, town2):
-            print(f"城镇{town1.name}和{town2.name}必须通过铁路互联才能合并升级")
+            logger.info("城镇%s和%s必须通过铁路互联才能合并升级", town1.name, town2.name)
             return False
         
         # 确定升级成本和新城镇等级
         if upgrade_type == 'village':
-            upgrade_cost = 150
+            upgrade_cost = Town.MERGE_COST[Town.VILLAGE]
             next_level = 'small_city'
         else:  # small_city
-            upgrade_cost = 400
+            upgrade_cost = Town.MERGE_COST[Town.SMALL_CITY]
             next_level = 'large_city'
         
         # 检查玩家资源是否足够
         if self.player_resources[player]["gdp"] < upgrade_cost:
-            print(f"GDP不足，需要{upgrade_cost}，当前{self.player_resources[player]['gdp']}")
+            logger.info("GDP不足，需要%s，当前%s", upgrade_cost, self.player_resources[player]['gdp'])
             return False
         
         # 检查区域容量限制
@@ -569,10 +828,10 @@ class GameController:
         }
         
         if next_level == 'small_city' and town_counts['small_city'] >= 2:
-            print(f"区域{region.name}已达到小城市数量上限(2)")
+            logger.info("区域%s已达到小城市数量上限(2)", region.name)
             return False
         elif next_level == 'large_city' and town_counts['large_city'] >= 1:
-            print(f"区域{region.name}已达到大城市数量上限(1)")
+            logger.info("区域%s已达到大城市数量上限(1)", region.name)
             return False
         
         # 扣除资源
@@ -590,18 +849,12 @@ class GameController:
         # 新城镇处于建设状态
         new_town.is_under_construction = True
         
-        # 从区域中移除原有城镇
-        region.towns.remove(town1)
-        region.towns.remove(town2)
-        
-        # 将新城镇添加到区域
-        region.towns.append(new_town)
+        # 用新城镇替换原有城镇，更新格子引用和连通关系
+        region.merge_towns(town1, town2, new_town)
+        self.game_state.touch(("region", region.id), ("players",))
         
-        # 更新所有相关格子，它们现在都指向同一个城镇实例
-        town1_hex.town = new_town
-        town2_hex.town = new_town
-        
-        print(f"成功将城镇{town1.name}和{town2.name}合并升级为{next_level}，新名称为{new_town_name}")
+        logger.info("成功将城镇%s和%s合并升级为%s，新名称为%s", town1.name, town2.name, next_level, new_town_name,
+                    extra={"event": "upgrade_town", "player": player, "region": region.id})
         return True
     
     def _resolve_conflict(self):
@@ -632,14 +885,23 @@ class GameController:
             "message": f"{winner}胜利！战争结束！"
         }
         
-        print(f"战争结束，{winner}胜利！")
-        print(f"冲突区域兵力情况: {forces}")
+        logger.info("战争结束，%s胜利！冲突区域兵力情况: %s", winner, forces,
+                    extra={"event": "war_resolved", "winner": winner, "forces": forces})
         
         return result
     
     def _update_armies(self):
         """更新所有军队的状态和位置"""
-        print(f"开始更新军队状态和位置，当前军队数量: {len(self.game_state.armies)}")
+        # 逐军队的记录在循环中产生，只在DEBUG级别开启时才格式化
+        debug = movement_logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            movement_logger.debug("开始更新军队状态和位置，当前军队数量: %d", len(self.game_state.armies))
+        
+        # 铁路运力按回合计算，开始新回合的运量记账
+        self.game_state.railway_network.ledger.reset()
+        
+        # 本回合需要移动的军队，统一调度后再移动
+        transporting = []
         
         for army in self.game_state.armies:
             rounds_since_creation = self.game_state.round - army.generation_time
@@ -647,35 +909,32 @@ class GameController:
             # 根据创建时间更新状态
             if rounds_since_creation == 0:
                 # 刚刚动员，保持GENERATING状态
-                print(f"{army.owner}的{army.amount}万军队从{army.source_town_name}刚刚动员，状态：{army.status}")
+                if debug:
+                    movement_logger.debug("%s的%s万军队从%s刚刚动员，状态：%s",
+                                          army.owner, army.amount, army.source_town_name, army.status)
             elif rounds_since_creation == 1:
                 # 第二回合，进入装载状态
                 army.status = Army.LOADING
-                print(f"{army.owner}的{army.amount}万军队从{army.source_town_name}开始装载，状态：{army.status}")
+                if debug:
+                    movement_logger.debug("%s的%s万军队从%s开始装载，状态：%s",
+                                          army.owner, army.amount, army.source_town_name, army.status)
             elif rounds_since_creation >= 2:
                 # 第三回合及以后，进入运输状态
                 if army.status != Army.ARRIVED:
                     army.status = Army.TRANSPORTING
-                    print(f"{army.owner}的{army.amount}万军队从{army.source_town_name}正在运输中，状态：{army.status}")
+                    if debug:
+                        movement_logger.debug("%s的%s万军队从%s正在运输中，状态：%s",
+                                              army.owner, army.amount, army.source_town_name, army.status)
                     
                     # 如果军队还没有确定路径，尝试查找到冲突区域的路径
                     if not army.path_to_conflict and army.current_position:
                         # 找到当前格子所在的区域
-                        current_region = None
-                        for region_id, region in self.game_state.regions.items():
-                            for hex_tile in region.hex_tiles:
-                                if (hex_tile.q == army.current_position.q and 
-                                    hex_tile.r == army.current_position.r and 
-                                    hex_tile.s == army.current_position.s):
-                                    current_region = region
-                                    # 更新current_position引用为region中的实际对象
-                                    army.current_position = hex_tile
-                                    break
-                            if current_region:
-                                break
+                        current_region = self._locate_army(army)
                         
                         if current_region:
-                            print(f"为{army.owner}的军队查找从{army.current_position.q},{army.current_position.r},{army.current_position.s}到{army.target_region_id}的路径")
+                            if debug:
+                                movement_logger.debug("为%s的军队查找从%s到%s的路径",
+                                                      army.owner, army.current_position, army.target_region_id)
                             # 使用当前区域的查找方法（它会查找全局路径）
                             path_info = current_region.find_path_to_conflict(
                                 army.current_position, 
@@ -685,17 +944,33 @@ class GameController:
                             if path_info:
                                 # 记录路径和使用的铁路
                                 army.path_to_conflict = path_info['path'][1:]  # 排除当前位置
-                                print(f"找到到冲突区域的路径，长度:{len(army.path_to_conflict)}格")
-                            else:
-                                print(f"无法找到从 {army.current_position.q},{army.current_position.r},{army.current_position.s} 到 {army.target_region_id} 的路径")
-                        else:
-                            print(f"无法找到军队当前位置 {army.current_position.q},{army.current_position.r},{army.current_position.s} 所在的区域")
+                                if debug:
+                                    movement_logger.debug("找到到冲突区域的路径，长度:%d格", len(army.path_to_conflict))
+                            elif debug:
+                                movement_logger.debug("无法找到从 %s 到 %s 的路径",
+                                                      army.current_position, army.target_region_id)
+                        elif debug:
+                            movement_logger.debug("无法找到军队当前位置 %s 所在的区域", army.current_position)
                     
-                    # 如果有路径，尝试移动
+                    # 如果有路径，等待统一调度后移动
                     if army.path_to_conflict:
-                        self._move_army(army)
-                else:
-                    print(f"{army.owner}的{army.amount}万军队已到达冲突区域 {army.target_region_id}，状态：{army.status}")
+                        transporting.append(army)
+                elif debug:
+                    movement_logger.debug("%s的%s万军队已到达冲突区域 %s，状态：%s",
+                                          army.owner, army.amount, army.target_region_id, army.status)
+        
+        # 一次求解为所有运输中的军队分配铁路运力
+        plans = self.troop_router.plan(transporting)
+        movement_logger.debug("批量调度完成，%d/%d支军队获得行军路线", len(plans), len(transporting))
+        
+        # 先移动获得路线的军队，其余军队再按原有方式利用剩余运力前进
+        for army in transporting:
+            if army in plans:
+                army.path_to_conflict = plans[army][1:]  # 排除当前位置
+                self._move_army(army)
+        for army in transporting:
+            if army not in plans:
+                self._move_army(army)
                         
     def _move_army(self, army):
         """移动军队沿路径前进
@@ -703,87 +978,52 @@ class GameController:
         Args:
             army (Army): 要移动的军队
         """
+        debug = movement_logger.isEnabledFor(logging.DEBUG)
         if not army.path_to_conflict:
-            print(f"{army.owner}的军队没有路径可走")
+            if debug:
+                movement_logger.debug("%s的军队没有路径可走", army.owner)
             return
         
         # 每回合最多移动5格
-        max_moves = 5
+        max_moves = Army.MOVES_PER_ROUND
         moves_made = 0
         
-        print(f"开始移动{army.owner}的{army.amount}万军队，当前位置:({army.current_position.q},{army.current_position.r},{army.current_position.s})")
-        print(f"路径长度: {len(army.path_to_conflict)}格，目标区域: {army.target_region_id}")
-        
-        # 调试打印路径中的前5个格子
-        debug_path = army.path_to_conflict[:min(5, len(army.path_to_conflict))]
-        print(f"路径前5个格子: {[(hex.q, hex.r, hex.s) for hex in debug_path]}")
+        if debug:
+            movement_logger.debug("开始移动%s的%s万军队，当前位置:%s，路径长度: %d格，目标区域: %s，路径前5个格子: %s",
+                                  army.owner, army.amount, army.current_position, len(army.path_to_conflict),
+                                  army.target_region_id, [str(hex_tile) for hex_tile in army.path_to_conflict[:5]])
         
         while moves_made < max_moves and army.path_to_conflict:
             # 获取下一个目标格子
             next_hex = army.path_to_conflict[0]
             
-            print(f"尝试移动到下一个格子:({next_hex.q},{next_hex.r},{next_hex.s})")
+            if debug:
+                movement_logger.debug("尝试移动到下一个格子:%s", next_hex)
             
             # 查找当前格子所在的区域
-            current_region = None
-            for region_id, region in self.game_state.regions.items():
-                # 通过比较坐标而不是直接比较对象
-                for hex_tile in region.hex_tiles:
-                    if (hex_tile.q == army.current_position.q and 
-                        hex_tile.r == army.current_position.r and 
-                        hex_tile.s == army.current_position.s):
-                        current_region = region
-                        # 更新current_position引用为region中的实际对象
-                        army.current_position = hex_tile
-                        break
-                if current_region:
-                    break
+            current_region = self._locate_army(army)
             
             if not current_region:
-                print(f"无法找到军队当前位置({army.current_position.q},{army.current_position.r},{army.current_position.s})所在的区域")
+                if debug:
+                    movement_logger.debug("无法找到军队当前位置%s所在的区域", army.current_position)
                 break
             
-            print(f"当前区域: {current_region.id}")
             
             # 查找下一个格子所在的区域
             next_region = None
-            next_hex_in_current_region = False
-            
-            # 首先查找当前区域
-            for hex_tile in current_region.hex_tiles:
-                if (hex_tile.q == next_hex.q and 
-                    hex_tile.r == next_hex.r and 
-                    hex_tile.s == next_hex.s):
-                    # 更新next_hex引用
-                    next_hex = hex_tile
-                    army.path_to_conflict[0] = hex_tile
-                    next_hex_in_current_region = True
-                    next_region = current_region
-                    break
-            
-            # 如果在当前区域没找到，查找其他区域
-            if not next_hex_in_current_region:
-                for region_id, region in self.game_state.regions.items():
-                    if region == current_region:
-                        continue
-                    
-                    for hex_tile in region.hex_tiles:
-                        if (hex_tile.q == next_hex.q and 
-                            hex_tile.r == next_hex.r and 
-                            hex_tile.s == next_hex.s):
-                            # 更新next_hex引用
-                            next_hex = hex_tile
-                            army.path_to_conflict[0] = hex_tile
-                            next_region = region
-                            print(f"下一个格子在不同区域: {region.id}")
-                            break
-                    
-                    if next_region and next_region != current_region:
-                        break
+            hex_tile = self.game_state.get_hex((next_hex.q, next_hex.r, next_hex.s))
+            if hex_tile:
+                # 更新next_hex引用为索引中的实际对象
+                next_hex = hex_tile
+                army.path_to_conflict[0] = hex_tile
+                next_region = self.game_state.get_hex_region(hex_tile)
+                if debug and next_region is not current_region:
+                    movement_logger.debug("下一个格子在不同区域: 从%s到%s", current_region.id, next_region.id)
             
             # 如果找不到下一个格子所在的区域，跳过移动
             if not next_region:
-                print(f"无法找到下一个格子({next_hex.q},{next_hex.r},{next_hex.s})所在的区域，尝试重新路径查找")
+                if debug:
+                    movement_logger.debug("无法找到下一个格子%s所在的区域，尝试重新路径查找", next_hex)
                 
                 # 尝试重新寻找路径
                 if current_region:
@@ -795,22 +1035,23 @@ class GameController:
                     if path_info and path_info['path']:
                         # 更新路径
                         army.path_to_conflict = path_info['path'][1:]  # 排除当前位置
-                        print(f"重新找到路径，长度:{len(army.path_to_conflict)}格")
+                        if debug:
+                            movement_logger.debug("重新找到路径，长度:%d格", len(army.path_to_conflict))
                         # 继续下一次循环尝试移动
                         continue
                     else:
-                        print(f"重新寻路失败，无法找到有效路径")
+                        if debug:
+                            movement_logger.debug("重新寻路失败，无法找到有效路径")
                 
                 break
             
-            print(f"目标区域: {next_region.id}")
-            
             # 在相同区域内移动
             if next_region == current_region:
-                railway = current_region.find_railway_between(army.current_position, next_hex)
+                railway = self.game_state.railway_network.find_railway(army.current_position, next_hex)
                 
                 if not railway:
-                    print(f"无法找到连接({army.current_position.q},{army.current_position.r},{army.current_position.s})和({next_hex.q},{next_hex.r},{next_hex.s})的铁路")
+                    if debug:
+                        movement_logger.debug("无法找到连接%s和%s的铁路", army.current_position, next_hex)
                     
                     # 尝试重新寻找路径
                     path_info = current_region.find_path_to_conflict(
@@ -821,23 +1062,25 @@ class GameController:
                     if path_info and path_info['path']:
                         # 更新路径
                         army.path_to_conflict = path_info['path'][1:]  # 排除当前位置
-                        print(f"重新找到路径，长度:{len(army.path_to_conflict)}格")
+                        if debug:
+                            movement_logger.debug("重新找到路径，长度:%d格", len(army.path_to_conflict))
                         # 继续下一次循环尝试移动
                         continue
                     else:
-                        print(f"重新寻路失败，无法找到有效路径")
+                        if debug:
+                            movement_logger.debug("重新寻路失败，无法找到有效路径")
                         break
                     
                 # 检查铁路是否在建设中
                 if railway.is_under_construction:
-                    print(f"铁路在建设中，无法通过")
+                    if debug:
+                        movement_logger.debug("铁路在建设中，无法通过")
                     break
                     
                 # 检查铁路运力是否足够
                 if railway.troops + army.amount <= railway.get_capacity():
-                    print(f"铁路运力充足，移动军队")
                     # 移动到新位置
-                    railway.troops += army.amount  # 增加铁路上的兵力
+                    self.game_state.railway_network.ledger.add(railway, army.amount)  # 记录本回合铁路运量
                     army.current_position = next_hex
                     army.path_to_conflict.pop(0)  # 移除已经到达的格子
                     
@@ -854,48 +1097,45 @@ class GameController:
                         self.game_state.arrived_forces[army.owner] += army.amount
                         
                         army.status = Army.ARRIVED
-                        print(f"{army.owner}的{army.amount}万军队到达冲突区域{army.target_region_id}")
+                        movement_logger.info("%s的%s万军队到达冲突区域%s", army.owner, army.amount, army.target_region_id)
                         return
                 else:
-                    print(f"铁路运力不足，当前{railway.troops}，需要{army.amount}，容量{railway.get_capacity()}")
+                    if debug:
+                        movement_logger.debug("铁路运力不足，当前%s，需要%s，容量%s",
+                                              railway.troops, army.amount, railway.get_capacity())
                     break
             
             # 跨区域移动
             else:
-                print(f"尝试跨区域移动: 从{current_region.id}到{next_region.id}")
-                # 在两个区域中查找连接这两个格子的铁路
-                railway = None
-                
-                # 先在当前区域查找
-                railway = current_region.find_railway_between(army.current_position, next_hex)
-                
-                # 如果当前区域没有，检查下一个区域
-                if not railway:
-                    railway = next_region.find_railway_between(army.current_position, next_hex)
+                # 查全局边索引，跨区域铁路属于哪个区域都能找到
+                railway = self.game_state.railway_network.find_railway(army.current_position, next_hex)
                 
                 if not railway:
-                    print(f"无法找到跨区域铁路连接({army.current_position.q},{army.current_position.r},{army.current_position.s})和({next_hex.q},{next_hex.r},{next_hex.s})")
+                    if debug:
+                        movement_logger.debug("无法找到跨区域铁路连接%s和%s", army.current_position, next_hex)
                     
                     # 尝试直接移动到下一个区域的边界格子
                     edge_hex = self._find_nearest_edge_hex(next_region, army.current_position)
                     if edge_hex:
-                        print(f"尝试移动到边界格子:({edge_hex.q},{edge_hex.r},{edge_hex.s})")
+                        if debug:
+                            movement_logger.debug("尝试移动到边界格子:%s", edge_hex)
                         army.path_to_conflict.insert(0, edge_hex)  # 插入到路径的开头
                         continue
                     else:
-                        print(f"无法找到边界格子，无法跨区域移动")
+                        if debug:
+                            movement_logger.debug("无法找到边界格子，无法跨区域移动")
                         break
                 
                 # 检查铁路是否在建设中
                 if railway.is_under_construction:
-                    print(f"跨区域铁路在建设中，无法通过")
+                    if debug:
+                        movement_logger.debug("跨区域铁路在建设中，无法通过")
                     break
                 
                 # 检查铁路运力是否足够
                 if railway.troops + army.amount <= railway.get_capacity():
-                    print(f"跨区域铁路运力充足，移动军队从{current_region.id}到{next_region.id}")
                     # 移动到新位置
-                    railway.troops += army.amount  # 增加铁路上的兵力
+                    self.game_state.railway_network.ledger.add(railway, army.amount)  # 记录本回合铁路运量
                     army.current_position = next_hex
                     army.path_to_conflict.pop(0)  # 移除已经到达的格子
                     
@@ -912,26 +1152,19 @@ class GameController:
                         self.game_state.arrived_forces[army.owner] += army.amount
                         
                         army.status = Army.ARRIVED
-                        print(f"{army.owner}的{army.amount}万军队到达冲突区域{army.target_region_id}")
+                        movement_logger.info("%s的%s万军队到达冲突区域%s", army.owner, army.amount, army.target_region_id)
                         return
                 else:
-                    print(f"跨区域铁路运力不足，当前{railway.troops}，需要{army.amount}，容量{railway.get_capacity()}")
+                    if debug:
+                        movement_logger.debug("跨区域铁路运力不足，当前%s，需要%s，容量%s",
+                                              railway.troops, army.amount, railway.get_capacity())
                     break
         
         # 移动结束，检查是否已完成所有移动
         if not army.path_to_conflict:
             # 如果路径为空，表示已经到达目标
             # 检查当前位置是否在目标区域
-            current_region = None
-            for region_id, region in self.game_state.regions.items():
-                for hex_tile in region.hex_tiles:
-                    if (hex_tile.q == army.current_position.q and 
-                        hex_tile.r == army.current_position.r and 
-                        hex_tile.s == army.current_position.s):
-                        current_region = region
-                        break
-                if current_region:
-                    break
+            current_region = self._locate_army(army)
             
             if current_region and current_region.id == army.target_region_id:
                 # 到达冲突区域
@@ -943,9 +1176,28 @@ class GameController:
                 self.game_state.arrived_forces[army.owner] += army.amount
                 
                 army.status = Army.ARRIVED
-                print(f"{army.owner}的{army.amount}万军队到达冲突区域{army.target_region_id}")
+                movement_logger.info("%s的%s万军队到达冲突区域%s", army.owner, army.amount, army.target_region_id)
+        
+        if debug:
+            movement_logger.debug("移动结束，当前位置:%s，剩余路径长度:%d格", army.current_position, len(army.path_to_conflict))
+    
+    def _locate_army(self, army):
+        """查找军队当前位置所在的区域
+        
+        同时将army.current_position更新为全局索引中的实际格子对象
         
-        print(f"移动结束，当前位置:({army.current_position.q},{army.current_position.r},{army.current_position.s})，剩余路径长度:{len(army.path_to_conflict)}格")
+        Args:
+            army (Army): 军队
+            
+        Returns:
+            Region: 所在区域，找不到则返回None
+        """
+        position = army.current_position
+        hex_tile = self.game_state.get_hex((position.q, position.r, position.s))
+        if not hex_tile:
+            return None
+        army.current_position = hex_tile
+        return self.game_state.get_hex_region(hex_tile)
     
     def _find_nearest_edge_hex(self, target_region, current_hex):
         """找到目标区域最近的边界格子
@@ -960,35 +1212,6 @@ class GameController:
         if not target_region or not target_region.hex_tiles:
             return None
             
-        # 获取所有区域的边界格子
-        edge_hexes = []
-        for hex_tile in target_region.hex_tiles:
-            # 检查是否是边界格子
-            is_edge = False
-            for other_region_id, other_region in self.game_state.regions.items():
-                if other_region.id == target_region.id:
-                    continue
-                
-                for other_hex in other_region.hex_tiles:
-                    # 如果两个格子相邻且在不同区域，则是边界格子
-                    if hex_tile.is_adjacent(other_hex):
-                        is_edge = True
-                        break
-                
-                if is_edge:
-                    break
-            
-            if is_edge:
-                edge_hexes.append(hex_tile)
-        
-        # 找到最近的边界格子
-        nearest_edge = None
-        min_distance = float('inf')
-        
-        for edge_hex in edge_hexes:
-            distance = edge_hex.distance(current_hex)
-            if distance < min_distance:
-                min_distance = distance
-                nearest_edge = edge_hex
-                
-        return nearest_edge 
\ No newline at end of file
+        # 边界格子在地图建立时已按区域分块，查询只搜索附近的块
+        index = self.game_state.region_borders.nearest_border(target_region.id, current_hex)
+        return None if index is None else self.game_state.hex_grid.tiles[index] 
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+日志
+游戏包的日志器层级、按子系统设置的级别和结构化（JSON行）输出
+
+各模块通过logging.getLogger获取"game"下的子日志器：
+    game.controller  控制器命令（建造、动员、宣战、回合推进）
+    game.movement    军队状态与逐格移动（每支军队每步都会记录，默认不输出）
+    game.models      区域与城镇的规则校验
+    game.persistence 后台状态写入
+    game.api         Flask接口
+
+库代码本身不安装处理器，由入口（app.py、game.simulation）调用configure_logging，
+也可以通过环境变量配置：
+    GAME_LOG_LEVEL   "game"日志器的级别，默认INFO
+    GAME_LOG_LEVELS  子系统级别，如"game.movement=DEBUG,game.models=WARNING"
+    GAME_LOG_FORMAT  "json"时每条日志输出为一行JSON，否则为文本
+"""
+
+import contextlib
+import json
+import logging
+import os
+import sys
+import time
+
+ROOT_LOGGER = "game"
+
+# 默认级别，子系统未单独配置时继承"game"的级别；逐军队、逐格子的移动记录只在DEBUG级别输出
+DEFAULT_LEVELS = {
+    ROOT_LOGGER: logging.INFO
+}
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# LogRecord自带的属性，其余属性来自extra参数，作为结构化字段输出
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """每条日志格式化为一行JSON，extra参数传入的字段原样并入"""
+    
+    def format(self, record):
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _TextFormatter(logging.Formatter):
+    """文本格式，时间使用UTC"""
+    
+    converter = time.gmtime
+
+
+def parse_levels(spec):
+    """解析子系统级别配置
+    
+    Args:
+        spec (str): 逗号分隔的"日志器=级别"，如"game.movement=DEBUG"
+        
+    Returns:
+        dict: 日志器名称 -> 级别
+    """
+    levels = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        name, _, level = item.partition("=")
+        if not level:
+            raise ValueError(f"无效的日志级别配置: {item}")
+        levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return levels
+
+
+def configure_logging(level=None, levels=None, json_lines=None, stream=None):
+    """为"game"日志器安装处理器并设置各子系统的级别，重复调用会替换之前的配置
+    
+    Args:
+        level (int|str): "game"日志器的级别，默认取GAME_LOG_LEVEL或INFO
+        levels (dict): 日志器名称 -> 级别，覆盖默认值和GAME_LOG_LEVELS
+        json_lines (bool): 是否输出JSON行，默认取GAME_LOG_FORMAT
+        stream: 输出流，默认标准错误
+        
+    Returns:
+        logging.Logger: "game"日志器
+    """
+    resolved = dict(DEFAULT_LEVELS)
+    resolved.update(parse_levels(os.environ.get("GAME_LOG_LEVELS")))
+    if level is None:
+        level = os.environ.get("GAME_LOG_LEVEL")
+    if level is not None:
+        resolved[ROOT_LOGGER] = level.upper() if isinstance(level, str) else level
+    resolved.update(levels or {})
+    if json_lines is None:
+        json_lines = os.environ.get("GAME_LOG_FORMAT", "").lower() == "json"
+        
+    root = logging.getLogger(ROOT_LOGGER)
+    for handler in list(root.handlers):
+        if getattr(handler, "_game_handler", False):
+            root.removeHandler(handler)
+            
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler._game_handler = True
+    handler.setFormatter(JsonLinesFormatter() if json_lines else _TextFormatter(TEXT_FORMAT))
+    root.addHandler(handler)
+    root.propagate = False
+    
+    for name, value in resolved.items():
+        logging.getLogger(name).setLevel(value)
+    return root
+
+
+@contextlib.contextmanager
+def suppressed(level=logging.CRITICAL):
+    """暂时屏蔽不高于level的所有日志（批量模拟等不需要引擎输出的场合），嵌套使用时不会放宽外层的屏蔽"""
+    previous = logging.root.manager.disable
+    logging.disable(max(level, previous))
+    try:
+        yield
+    finally:
+        logging.disable(previous)
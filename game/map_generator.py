@@ -1,22 +1,42 @@
 """
 六角形地图生成器
-用于创建游戏地图和区域，基于France/Belgium/Germany地图
+用于创建游戏地图和区域，基于France/Belgium/Germany地图；
+另有按参数随机生成任意规模地图的ProceduralMapGenerator，用于测试引擎在大地图上的性能
 """
 
-from .models import HexTile, Region, Town, Railway
+import math
+import random
+from collections import deque
+
+from .models import HexGrid, HexTile, Region, Town, Railway
 
 class MapGenerator:
     """地图生成器"""
     
+    # 地图名称；同名地图拓扑相同，静态地图数据等缓存按名称在对局间共享
+    map_name = "demo"
+    
     def __init__(self):
         """初始化地图生成器"""
         self.hex_tiles = {}  # 存储所有格子，键为坐标(q,r,s)元组
         self.regions = {}  # 存储所有区域
+        self.grid = None  # 所有格子的相邻表，生成地图后建立
         
     def generate_map(self):
         """生成欧洲地图，包含法国、比利时和德国"""
         self._create_regions()
+        self.grid = HexGrid(self.hex_tiles.values())
         return self.regions
+        
+    def configure(self, game_state):
+        """设置游戏状态的玩家阵营、势力划分和冲突地区，在添加地区前调用
+        
+        演示地图沿用GameState的默认设置
+        """
+        
+    def get_options(self):
+        """重新生成同一地图所需的参数，演示地图返回None"""
+        return None
     
     def _create_regions(self):
         """根据规范创建游戏区域"""
@@ -261,6 +281,224 @@ class MapGenerator:
         return region_coords.get(region_id, [])
 
 
+class ProceduralMapGenerator(MapGenerator):
+    """按参数生成的随机地图
+    
+    先在奇偶列布局的矩形范围内撒下各区域的起点，多源洪泛轮流生长到目标格子数，
+    每个区域都是连通的；再以区域为单位在区域相邻图上洪泛划分阵营，各阵营的领土同样连通。
+    每个阵营只有一个国家，区域ID为"国家前缀-序号"；冲突区域取阵营内与其他阵营接壤最多的区域。
+    相同的参数和种子总是生成相同的地图
+    """
+    
+    # 前两个阵营沿用演示地图的玩家名称，模拟器和电脑玩家的策略按名称对应
+    PLAYERS = ("德军", "协约国")
+    # 矩形范围比目标格子总数略大，被包围的区域仍有生长空间
+    SLACK = 1.15
+    
+    def __init__(self, regions=16, tiles_per_region=25, factions=2, conflict_regions=None, seed=0):
+        """初始化生成器
+        
+        Args:
+            regions (int): 区域数
+            tiles_per_region (int): 每个区域的目标格子数，被其他区域包围的区域可能略少
+            factions (int): 阵营数
+            conflict_regions (int): 拥有冲突区域的阵营数，默认每个阵营都有
+            seed (int): 随机种子
+            
+        Raises:
+            ValueError: 参数超出范围
+        """
+        super().__init__()
+        if conflict_regions is None:
+            conflict_regions = factions
+        if factions < 2 or regions < factions or tiles_per_region < 1:
+            raise ValueError("至少需要两个阵营，区域数不少于阵营数，每个区域至少一个格子")
+        if not 1 <= conflict_regions <= factions:
+            raise ValueError("冲突区域数应在1到阵营数之间")
+        self.region_count = regions
+        self.tiles_per_region = tiles_per_region
+        self.faction_count = factions
+        self.conflict_count = conflict_regions
+        self.seed = seed
+        self.map_name = (
+            f"procedural-r{regions}-t{tiles_per_region}-f{factions}-c{conflict_regions}-s{seed}"
+        )
+        
+        self.players = [
+            self.PLAYERS[i] if i < len(self.PLAYERS) else f"阵营{i + 1}" for i in range(factions)
+        ]
+        self.nations = [f"国家{i + 1}" for i in range(factions)]
+        self.nation_prefixes = {f"N{i + 1}": nation for i, nation in enumerate(self.nations)}
+        self.conflict_regions = {}
+        
+    def get_options(self):
+        return {
+            "regions": self.region_count,
+            "tiles_per_region": self.tiles_per_region,
+            "factions": self.faction_count,
+            "conflict_regions": self.conflict_count,
+            "seed": self.seed
+        }
+        
+    def configure(self, game_state):
+        game_state.set_factions(
+            self.players,
+            {player: [nation] for player, nation in zip(self.players, self.nations)},
+            dict(self.conflict_regions),
+            dict(self.nation_prefixes)
+        )
+        
+    def generate_map(self):
+        rng = random.Random(self.seed)
+        region_tiles, owner = self._grow_regions(rng)
+        neighbors = self._region_neighbors(region_tiles, owner)
+        region_factions = self._assign_factions(region_tiles, neighbors)
+        
+        # 各阵营的区域按起点位置编号
+        numbers = [0] * self.region_count
+        counts = [0] * self.faction_count
+        for k in sorted(range(self.region_count), key=lambda k: region_tiles[k][0]):
+            counts[region_factions[k]] += 1
+            numbers[k] = counts[region_factions[k]]
+            
+        conflicts = self._choose_conflict_regions(neighbors, region_factions, numbers)
+        for k in sorted(range(self.region_count), key=lambda k: (region_factions[k], numbers[k])):
+            f = region_factions[k]
+            name = f"{self.nations[f]}-{numbers[k]}"
+            region = Region(f"N{f + 1}-{numbers[k]}", name + "冲突区" if conflicts.get(f) == k else name)
+            self._add_region_hex_tiles(region, region_tiles[k])
+            self.regions[region.id] = region
+            if conflicts.get(f) == k:
+                self.conflict_regions[self.players[f]] = region.id
+        self.grid = HexGrid(self.hex_tiles.values())
+        return self.regions
+        
+    def _grow_regions(self, rng):
+        """多源洪泛生长区域
+        
+        Returns:
+            tuple: (区域序号 -> 格子坐标(q,r)列表（第一个为起点）, 坐标(q,r) -> 区域序号)
+        """
+        area = math.ceil(self.region_count * self.tiles_per_region * self.SLACK)
+        width = max(1, math.ceil(math.sqrt(area * 1.6)))
+        height = math.ceil(area / width)
+        domain = {(q, r): HexTile(q, r, -q - r) for q in range(width) for r in range(height)}
+        
+        # 起点：把矩形划分为不少于区域数的网格，随机选取网格，各取网格内的一个格子
+        columns = max(1, min(width, round(math.sqrt(self.region_count * width / height))))
+        rows = math.ceil(self.region_count / columns)
+        cells = rng.sample([(i, j) for i in range(columns) for j in range(rows)], self.region_count)
+        
+        owner = {}
+        region_tiles = []
+        frontiers = []
+        for k, (i, j) in enumerate(cells):
+            q_range = range(i * width // columns, max(i * width // columns + 1, (i + 1) * width // columns))
+            r_range = range(j * height // rows, max(j * height // rows + 1, (j + 1) * height // rows))
+            candidates = [(q, r) for q in q_range for r in r_range if (q, r) in domain and (q, r) not in owner]
+            if not candidates:
+                candidates = [coords for coords in domain if coords not in owner]
+            start = rng.choice(candidates)
+            owner[start] = k
+            region_tiles.append([start])
+            frontiers.append(list(domain[start].neighbor_coords()))
+            
+        # 各区域轮流从边缘随机取一个未被占据的格子，直到达到目标格子数或无处生长
+        active = [k for k in range(self.region_count) if self.tiles_per_region > 1]
+        while active:
+            growing = []
+            for k in active:
+                frontier = frontiers[k]
+                while frontier:
+                    i = rng.randrange(len(frontier))
+                    frontier[i], frontier[-1] = frontier[-1], frontier[i]
+                    coords = frontier.pop()
+                    if coords in domain and coords not in owner:
+                        owner[coords] = k
+                        region_tiles[k].append(coords)
+                        frontier.extend(domain[coords].neighbor_coords())
+                        break
+                if frontier and len(region_tiles[k]) < self.tiles_per_region:
+                    growing.append(k)
+            active = growing
+        return region_tiles, owner
+        
+    def _region_neighbors(self, region_tiles, owner):
+        """区域相邻图：区域序号 -> 相邻区域序号的有序列表"""
+        neighbors = []
+        for k, tiles in enumerate(region_tiles):
+            adjacent = set()
+            for q, r in tiles:
+                for coords in HexTile(q, r, -q - r).neighbor_coords():
+                    other = owner.get(coords, k)
+                    if other != k:
+                        adjacent.add(other)
+            neighbors.append(sorted(adjacent))
+        return neighbors
+        
+    def _assign_factions(self, region_tiles, neighbors):
+        """在区域相邻图上多源洪泛划分阵营
+        
+        各阵营的起始区域沿q方向从地图一端到另一端均匀分布，之后按广度优先轮流取一个未分配的相邻区域；
+        区域数达到平均数的阵营暂停扩张，只有其余阵营都无法扩张时才继续
+        
+        Returns:
+            list: 区域序号 -> 阵营序号
+        """
+        by_column = sorted(range(self.region_count), key=lambda k: region_tiles[k][0])
+        factions = [None] * self.region_count
+        frontiers = []
+        for f in range(self.faction_count):
+            start = by_column[f * (self.region_count - 1) // (self.faction_count - 1)]
+            factions[start] = f
+            frontiers.append(deque(neighbors[start]))
+            
+        sizes = [1] * self.faction_count
+        quota = math.ceil(self.region_count / self.faction_count)
+        remaining = self.region_count - self.faction_count
+        while remaining:
+            progressed = False
+            for f, frontier in enumerate(frontiers):
+                if sizes[f] >= quota:
+                    continue
+                while frontier:
+                    k = frontier.popleft()
+                    if factions[k] is None:
+                        factions[k] = f
+                        frontier.extend(neighbors[k])
+                        sizes[f] += 1
+                        remaining -= 1
+                        progressed = True
+                        break
+            if progressed:
+                continue
+            if quota < self.region_count:
+                quota = self.region_count
+            else:
+                # 与其他区域都不相邻的孤立区域归入区域最少的阵营
+                k = factions.index(None)
+                f = sizes.index(min(sizes))
+                factions[k] = f
+                frontiers[f].extend(neighbors[k])
+                sizes[f] += 1
+                remaining -= 1
+        return factions
+        
+    def _choose_conflict_regions(self, neighbors, region_factions, numbers):
+        """为前conflict_count个阵营各选一个冲突区域：与其他阵营接壤最多的区域，相同时取编号小的
+        
+        Returns:
+            dict: 阵营序号 -> 区域序号
+        """
+        conflicts = {}
+        for f in range(self.conflict_count):
+            members = [k for k in range(self.region_count) if region_factions[k] == f]
+            conflicts[f] = max(members, key=lambda k: (
+                sum(1 for other in neighbors[k] if region_factions[other] != f), -numbers[k]
+            ))
+        return conflicts
+
+
 def create_demo_game_map():
     """创建欧洲地图"""
     generator = MapGenerator()
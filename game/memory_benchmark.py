@@ -0,0 +1,159 @@
+"""
+内存基准
+测量一局进行中的游戏占用的内存（字节/局），用于评估同时保存大量会话或推演时的内存开销
+
+地图为演示地图及其沿q方向重复若干份的放大版本，双方由内置电脑玩家进行若干回合，
+使地图上有城镇、铁路和运输中的军队；用tracemalloc统计这些游戏仍持有的内存
+
+用法：python -m game.memory_benchmark --scales 1 10 --games 5 --rounds 36
+"""
+
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+
+from .ai_player import AIPlayer
+from .controller import GameController
+from .log import suppressed
+from .map_generator import MapGenerator
+from .models import Army, HexGrid, Region
+from .snapshot import dump_snapshot
+
+
+class TiledMapGenerator(MapGenerator):
+    """把演示地图沿q方向重复若干份的放大地图
+    
+    副本的区域ID加后缀"-k"，国家前缀不变（阵营划分照旧），
+    各阵营的冲突区域仍是第一份地图中的冲突区域
+    """
+    
+    def __init__(self, copies):
+        """初始化生成器
+        
+        Args:
+            copies (int): 演示地图重复的份数
+        """
+        super().__init__()
+        self.copies = copies
+        # 电脑玩家按地图名称缓存地图索引，放大地图使用独立的名称
+        self.map_name = f"demo-x{copies}"
+        
+    def generate_map(self):
+        template = MapGenerator()
+        template.generate_map()
+        columns = [q for q, _, _ in template.hex_tiles]
+        # 平移偶数列，保持奇偶列布局下的相邻关系；相邻副本首尾相接
+        width = max(columns) - min(columns) + 1
+        width += width % 2
+        
+        for k in range(self.copies):
+            for region in template.regions.values():
+                region_id = region.id if k == 0 else f"{region.id}-{k}"
+                copy = Region(region_id, region.name)
+                self._add_region_hex_tiles(copy, [
+                    (hex_tile.q + k * width, hex_tile.r) for hex_tile in region.hex_tiles
+                ])
+                self.regions[region_id] = copy
+        self.grid = HexGrid(self.hex_tiles.values())
+        return self.regions
+
+
+def build_game(copies=1, rounds=36):
+    """建立一局游戏，由电脑玩家控制双方进行若干回合
+    
+    Args:
+        copies (int): 地图为演示地图重复的份数
+        rounds (int): 进行的回合数
+        
+    Returns:
+        GameController: 游戏控制器
+    """
+    controller = GameController(TiledMapGenerator(copies) if copies > 1 else None)
+    game_state = controller.game_state
+    # 放宽电脑玩家的时间预算，使放大地图上的对局与演示地图同样完整
+    players = [AIPlayer(player, time_budget=1.0) for player in game_state.players]
+    
+    with suppressed():
+        for _ in range(rounds):
+            if game_state.game_ended:
+                break
+            for ai_player in players:
+                ai_player.take_turn(controller)
+            controller.next_round(game_state.current_player)
+            controller.take_journal()
+    return controller
+
+
+def measure(copies=1, games=5, rounds=36):
+    """测量同时持有多局游戏时平均每局占用的内存
+    
+    先建立一局游戏预热各类共享缓存（静态地图、电脑玩家的地图索引），不计入结果
+    
+    Returns:
+        dict: 地图规模、实体数量、字节/局和快照大小
+    """
+    build_game(copies, rounds)
+    
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    controllers = [build_game(copies, rounds) for _ in range(games)]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    
+    game_state = controllers[0].game_state
+    regions = game_state.regions.values()
+    return {
+        "copies": copies,
+        "round": game_state.round,
+        "tiles": len(game_state.hex_index),
+        "towns": sum(len(region.towns) for region in regions),
+        "railways": len(game_state.railway_network.railways),
+        "armies": len(game_state.armies),
+        "bytes_per_game": (after - before) // games,
+        "snapshot_bytes": len(dump_snapshot(controllers[0]))
+    }
+
+
+def instance_bytes(obj):
+    """单个实体对象的大小（含实例字典，不含引用的其他对象）"""
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def entity_sizes(controller):
+    """各类实体单个对象的大小"""
+    game_state = controller.game_state
+    hex_tile = next(iter(game_state.hex_index.values()))
+    town = next((town for region in game_state.regions.values() for town in region.towns), None)
+    railway = next(iter(game_state.railway_network.railways), None)
+    army = game_state.armies[0] if game_state.armies else Army(town, 0, None)
+    return {
+        type(obj).__name__: instance_bytes(obj)
+        for obj in (hex_tile, town, railway, army) if obj is not None
+    }
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="测量每局游戏占用的内存")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10], help="地图重复份数")
+    parser.add_argument("--games", type=int, default=5, help="每种规模同时持有的局数")
+    parser.add_argument("--rounds", type=int, default=36, help="每局进行的回合数")
+    args = parser.parse_args(argv)
+    
+    maps = [measure(copies, args.games, args.rounds) for copies in args.scales]
+    report = {
+        "maps": maps,
+        "instance_bytes": entity_sizes(build_game(1, args.rounds))
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
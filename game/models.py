@@ -3,9 +3,43 @@
 包含城市、铁路、地区、军队等实体
 """
 
+import logging
+import uuid
+from array import array
+
+from .railway_network import RailwayNetwork
+
+logger = logging.getLogger(__name__)
+
+
+# 经济汇总的统计项，与Town.get_economy()的返回顺序一致
+ECONOMY_KEYS = ("gdp", "population", "mobilized")
+
+
+def new_economy():
+    """创建一份空的经济汇总"""
+    return {"gdp": 0, "population": 0, "mobilized": 0, "towns": 0}
+
+
+def apply_economy(economy, before, after, towns=0):
+    """把城镇经济数据的变化计入汇总
+    
+    Args:
+        economy (dict): 经济汇总
+        before (tuple): 变化前的(gdp, population, mobilized)
+        after (tuple): 变化后的(gdp, population, mobilized)
+        towns (int): 城镇数量变化
+    """
+    for key, old, new in zip(ECONOMY_KEYS, before, after):
+        economy[key] += new - old
+    economy["towns"] += towns
+
 class HexTile:
     """六边形地图格子"""
     
+    # 地图上数量最多的对象，不使用实例字典
+    __slots__ = ("q", "r", "s", "town", "terrain", "region_id", "grid", "index")
+    
     def __init__(self, q, r, s):
         """初始化一个六边形格子
         
@@ -20,10 +54,17 @@ class HexTile:
         self.s = s
         self.town = None  # 格子上的城镇
         self.terrain = "平原"  # 格子的地形
-        self.id = ""  # 格子ID，用于识别格子属于哪个区域，格式为"{区域ID}-{q}-{r}-{s}"
+        self.region_id = ""  # 所属区域的ID，加入区域时设置
+        self.grid = None  # 所在地图的相邻表，由HexGrid登记
+        self.index = -1  # 在相邻表中的编号
         
     def __str__(self):
         return f"HexTile({self.q}, {self.r}, {self.s})"
+        
+    @property
+    def id(self):
+        """格子ID，用于识别格子属于哪个区域，格式为"{区域ID}-{q}-{r}-{s}"（按需生成，不逐格保存）"""
+        return f"{self.region_id}-{self.q}-{self.r}-{self.s}"
     
     def distance(self, other):
         """计算与另一个格子的距离"""
@@ -33,19 +74,10 @@ class HexTile:
             abs(self.s - other.s)
         )
         
-    def is_adjacent(self, other):
-        """使用二维奇偶性判断两个格子是否相邻
-        
-        Args:
-            other (HexTile): 另一个格子
-            
-        Returns:
-            bool: 是否相邻
-        """
-        # 获取当前格子周围的所有相邻坐标
-        neighbors = []
+    def neighbor_coords(self):
+        """获取周围六个相邻格子的(q, r)坐标（奇偶列布局）"""
         if self.q % 2 == 0:  # 偶数列
-            neighbors = [
+            return [
                 (self.q, self.r-1),     # 上
                 (self.q, self.r+1),     # 下
                 (self.q-1, self.r),     # 左上
@@ -54,7 +86,7 @@ class HexTile:
                 (self.q+1, self.r+1)    # 右下
             ]
         else:  # 奇数列
-            neighbors = [
+            return [
                 (self.q, self.r-1),     # 上
                 (self.q, self.r+1),     # 下
                 (self.q-1, self.r-1),   # 左上
@@ -63,8 +95,153 @@ class HexTile:
                 (self.q+1, self.r)      # 右下
             ]
         
+    def neighbors(self):
+        """获取地图内相邻的格子（查预先建立的相邻表）"""
+        if self.grid is None:
+            return []
+        return self.grid.neighbors(self.index)
+        
+    def is_adjacent(self, other):
+        """使用二维奇偶性判断两个格子是否相邻
+        
+        同一地图的格子直接查相邻表，否则按坐标计算
+        
+        Args:
+            other (HexTile): 另一个格子
+            
+        Returns:
+            bool: 是否相邻
+        """
+        if self.grid is not None and self.grid is other.grid:
+            return self.grid.are_adjacent(self.index, other.index)
         # 检查另一个格子的坐标是否在相邻列表中
-        return (other.q, other.r) in neighbors
+        return (other.q, other.r) in self.neighbor_coords()
+
+
+class HexGrid:
+    """地图格子的相邻表
+    
+    格子按登记顺序编号，每个格子在扁平数组中占六个槽位（方向顺序同neighbor_coords），
+    存放相邻格子的编号，地图外的方向为NO_NEIGHBOR；地图生成时建立一次
+    """
+    
+    NO_NEIGHBOR = -1
+    
+    def __init__(self, hex_tiles):
+        """为一组格子建立相邻表，并把编号登记到格子上
+        
+        Args:
+            hex_tiles (iterable): 地图的全部格子
+        """
+        self.tiles = list(hex_tiles)  # 编号 -> 格子
+        index = {(hex_tile.q, hex_tile.r): i for i, hex_tile in enumerate(self.tiles)}
+        self.neighbor_table = array('i')  # 编号*6+方向 -> 相邻格子的编号
+        for i, hex_tile in enumerate(self.tiles):
+            hex_tile.grid = self
+            hex_tile.index = i
+            self.neighbor_table.extend(
+                index.get(coords, self.NO_NEIGHBOR) for coords in hex_tile.neighbor_coords()
+            )
+            
+    def neighbor_indices(self, index):
+        """某个格子六个方向上的相邻格子编号（含NO_NEIGHBOR）"""
+        return self.neighbor_table[index * 6:index * 6 + 6]
+        
+    def neighbors(self, index):
+        """某个格子在地图内的相邻格子"""
+        tiles = self.tiles
+        return [tiles[i] for i in self.neighbor_table[index * 6:index * 6 + 6] if i >= 0]
+        
+    def are_adjacent(self, index1, index2):
+        """两个编号的格子是否相邻"""
+        return index2 >= 0 and index2 in self.neighbor_table[index1 * 6:index1 * 6 + 6]
+
+
+class RegionBorders:
+    """区域边界：各区域的边界格子、区域之间的相邻关系和最近边界格子查询
+    
+    边界格子指与其他区域的格子相邻的格子。地图建立时根据相邻表计算一次，
+    只以相邻表编号记录格子，使用同一地图的各局游戏可以共享；
+    各区域的边界格子按坐标分块（块边长BUCKET_SIZE），每块记录其中格子q、r、s坐标的范围，
+    最近边界查询按块的距离下界由近到远检查，下界超过已找到的最近距离时停止
+    """
+    
+    BUCKET_SIZE = 4
+    
+    def __init__(self, grid):
+        """根据相邻表和格子所属的区域（HexTile.region_id）计算边界
+        
+        Args:
+            grid (HexGrid): 地图格子的相邻表
+        """
+        self.border_indices = {}  # 区域ID -> 边界格子的编号列表（升序）
+        self.region_neighbors = {}  # 区域ID -> 相邻区域ID集合
+        self.buckets = {}  # 区域ID -> [(最小q, 最大q, 最小r, 最大r, 最小s, 最大s, [(q, r, s, 编号)])]
+        
+        size = self.BUCKET_SIZE
+        cells = {}  # 区域ID -> {(块q, 块r) -> [(q, r, s, 编号)]}
+        for hex_tile in grid.tiles:
+            region_id = hex_tile.region_id
+            neighbors = self.region_neighbors.setdefault(region_id, set())
+            other_regions = {
+                neighbor.region_id for neighbor in grid.neighbors(hex_tile.index)
+                if neighbor.region_id != region_id
+            }
+            if not other_regions:
+                continue
+            neighbors.update(other_regions)
+            self.border_indices.setdefault(region_id, []).append(hex_tile.index)
+            cell = (hex_tile.q // size, hex_tile.r // size)
+            cells.setdefault(region_id, {}).setdefault(cell, []).append(
+                (hex_tile.q, hex_tile.r, hex_tile.s, hex_tile.index)
+            )
+            
+        for region_id, region_cells in cells.items():
+            self.buckets[region_id] = [
+                (
+                    min(entry[0] for entry in entries), max(entry[0] for entry in entries),
+                    min(entry[1] for entry in entries), max(entry[1] for entry in entries),
+                    min(entry[2] for entry in entries), max(entry[2] for entry in entries),
+                    entries
+                )
+                for entries in region_cells.values()
+            ]
+            
+    def neighbors(self, region_id):
+        """与区域相邻的区域ID集合"""
+        return self.region_neighbors.get(region_id, set())
+        
+    def nearest_border(self, region_id, hex_tile):
+        """区域中距离某个格子最近的边界格子（距离同HexTile.distance，距离相同时取编号靠前的格子）
+        
+        Args:
+            region_id (str): 区域ID
+            hex_tile (HexTile): 查询的格子
+            
+        Returns:
+            int: 最近的边界格子在相邻表中的编号，区域没有边界格子时返回None
+        """
+        buckets = self.buckets.get(region_id)
+        if not buckets:
+            return None
+        q0, r0, s0 = hex_tile.q, hex_tile.r, hex_tile.s
+        
+        # 块内格子的距离不小于查询格子在q、r、s三个方向上到坐标范围的差距
+        bounds = sorted(
+            (max(min_q - q0, q0 - max_q, min_r - r0, r0 - max_r, min_s - s0, s0 - max_s, 0), k)
+            for k, (min_q, max_q, min_r, max_r, min_s, max_s, _) in enumerate(buckets)
+        )
+        best = None
+        best_distance = None
+        for bound, k in bounds:
+            if best is not None and bound > best_distance:
+                break
+            for q, r, s, index in buckets[k][6]:
+                distance = max(abs(q - q0), abs(r - r0), abs(s - s0))
+                if best is None or distance < best_distance or (distance == best_distance and index < best):
+                    best = index
+                    best_distance = distance
+        return best
 
 
 class Town:
@@ -74,6 +251,9 @@ class Town:
     SMALL_CITY = "small_city"
     LARGE_CITY = "large_city"
     
+    __slots__ = ("name", "level", "owner", "population", "mobilized", "is_under_construction",
+                 "region", "hex_tiles")
+    
     # 城镇等级配置
     TOWN_CONFIG = {
         VILLAGE: {"cost": 50, "population": 100, "gdp": 20},
@@ -93,6 +273,19 @@ class Town:
         SMALL_CITY: 200  # 小城市升级到大城市的成本
     }
     
+    # 合并两个同级城镇升级的成本
+    MERGE_COST = {
+        VILLAGE: 150,  # 两个村落合并为小城市
+        SMALL_CITY: 400  # 两个小城市合并为大城市
+    }
+    
+    # 区域动员时的动员率
+    MOBILIZATION_RATE = {
+        VILLAGE: 0.5,
+        SMALL_CITY: 0.4,
+        LARGE_CITY: 0.3
+    }
+    
     def __init__(self, name, level, owner):
         """初始化一个城镇
         
@@ -107,11 +300,32 @@ class Town:
         self.population = 0  # 初始人口为0，完成建设后才会增加
         self.mobilized = 0
         self.is_under_construction = True  # 新增：是否在建设中
+        self.region = None  # 所属区域，加入区域时设置
+        self.hex_tiles = []  # 城镇占据的格子，合并后的城镇占据两个格子
         
     def complete_construction(self):
         """完成建设"""
+        before = self.get_economy()
         self.is_under_construction = False
         self.population = self.TOWN_CONFIG[self.level]["population"]
+        if self.region:
+            self.region.update_economy(self.owner, before, self.get_economy())
+            
+    def mobilize(self, amount):
+        """动员兵力"""
+        before = self.get_economy()
+        self.mobilized += amount
+        if self.region:
+            self.region.update_economy(self.owner, before, self.get_economy())
+            
+    def get_economy(self):
+        """获取城镇计入经济汇总的数据
+        
+        Returns:
+            tuple: (GDP产出, 人口, 已动员兵力)，建设中的城镇不计人口
+        """
+        population = 0 if self.is_under_construction else self.population
+        return (self.get_gdp(), population, self.mobilized)
         
     def get_gdp(self):
         """获取GDP产出（建设中时无产出）"""
@@ -160,6 +374,9 @@ class Railway:
         LEVEL_3: {"cost": 100, "capacity": 1000}
     }
     
+    __slots__ = ("start_hex", "end_hex", "level", "troops", "is_under_construction",
+                 "network", "index", "region")
+    
     def __init__(self, start_hex, end_hex, level=LEVEL_1):
         """初始化一条铁路
         
@@ -175,13 +392,24 @@ class Railway:
         self.start_hex = start_hex
         self.end_hex = end_hex
         self.level = level
-        self.troops = 0
+        self.troops = 0  # 本回合通过的兵力，每回合开始时清零
         self.is_under_construction = True  # 新增：是否在建设中
+        self.network = None  # 所属铁路网络，登记后设置
+        self.index = None  # 在运量账本中的序号
+        self.region = None  # 所属区域（跨区域铁路归属起点所在区域）
         
     def complete_construction(self):
         """完成建设"""
+        if not self.is_under_construction:
+            return
         self.is_under_construction = False
         
+        # 通知铁路网络和所属区域更新连通关系
+        if self.network:
+            self.network.on_railway_completed(self)
+        if self.region:
+            self.region.on_railway_completed(self)
+        
     def get_capacity(self):
         """获取运力（建设中时无运力）"""
         if self.is_under_construction:
@@ -189,6 +417,73 @@ class Railway:
         return self.RAILWAY_CONFIG[self.level]["capacity"]
 
 
+class TownConnectivity:
+    """地区内城镇的铁路连通性（并查集）
+    
+    两个城镇所在格子由已建成的铁路直接相连时视为连通，
+    随铁路完工、城镇建造和合并增量维护
+    """
+    
+    def __init__(self):
+        """初始化并查集"""
+        self.parent = {}  # 城镇 -> 父节点城镇
+        self.size = {}  # 根节点城镇 -> 集合大小
+        
+    def add(self, town):
+        """加入一个独立的城镇"""
+        if town not in self.parent:
+            self.parent[town] = town
+            self.size[town] = 1
+            
+    def __contains__(self, town):
+        return town in self.parent
+    
+    def find(self, town):
+        """查找城镇所在集合的根节点（路径减半）"""
+        parent = self.parent
+        while parent[town] is not town:
+            parent[town] = parent[parent[town]]
+            town = parent[town]
+        return town
+    
+    def union(self, town1, town2):
+        """合并两个城镇所在的集合（按大小合并）"""
+        root1 = self.find(town1)
+        root2 = self.find(town2)
+        if root1 is root2:
+            return
+        if self.size[root1] < self.size[root2]:
+            root1, root2 = root2, root1
+        self.parent[root2] = root1
+        self.size[root1] += self.size.pop(root2)
+        
+    def connected(self, town1, town2):
+        """两个城镇是否连通"""
+        if town1 not in self.parent or town2 not in self.parent:
+            return False
+        return self.find(town1) is self.find(town2)
+    
+    def all_connected(self, towns):
+        """给定的城镇是否全部位于同一个连通分量"""
+        root = None
+        for town in towns:
+            if town not in self.parent:
+                return False
+            town_root = self.find(town)
+            if root is None:
+                root = town_root
+            elif town_root is not root:
+                return False
+        return True
+    
+    def replace(self, old_towns, new_town):
+        """用合并后的新城镇替换原有城镇，新城镇继承它们的连通关系"""
+        self.add(new_town)
+        for town in old_towns:
+            if town in self.parent:
+                self.union(town, new_town)
+
+
 class Region:
     """游戏地区"""
     
@@ -205,13 +500,20 @@ class Region:
         self.hex_tiles = hex_tiles or []
         self.towns = []  # 区域内的城镇
         self.railways = []  # 区域内的铁路
+        self.game_state = None  # 所属游戏状态，加入GameState时设置
+        self.connectivity = TownConnectivity()  # 区域内城镇的铁路连通性
+        self.economy = {}  # 玩家 -> 该玩家在本区域的经济汇总
         
     def add_hex(self, hex_tile):
         """添加一个六边形格子到地区"""
-        # 设置格子ID
-        hex_tile.id = f"{self.id}-{hex_tile.q}-{hex_tile.r}-{hex_tile.s}"
+        # 记录格子所属区域（格子ID由此生成）
+        hex_tile.region_id = self.id
         self.hex_tiles.append(hex_tile)
         
+        # 同步更新全局坐标索引
+        if self.game_state:
+            self.game_state.index_hex(self, hex_tile)
+        
     def add_town(self, town, hex_tile):
         """在指定格子上添加城镇
         
@@ -224,12 +526,16 @@ class Region:
         """
         # 检查格子是否已有城镇
         if hex_tile.town:
-            print(f"格子({hex_tile.q},{hex_tile.r},{hex_tile.s})已有城镇")
+            logger.info("格子%s已有城镇", hex_tile)
             return False
         
         # 检查格子是否属于该区域
-        if hex_tile not in self.hex_tiles:
-            print(f"格子({hex_tile.q},{hex_tile.r},{hex_tile.s})不属于该区域")
+        if self.game_state:
+            in_region = self.game_state.get_hex_region(hex_tile) is self
+        else:
+            in_region = hex_tile in self.hex_tiles
+        if not in_region:
+            logger.info("格子%s不属于该区域", hex_tile)
             return False
         
         # 根据城镇等级检查空间需求和城镇数量限制
@@ -243,25 +549,95 @@ class Region:
         }
         
         if town.level == Town.VILLAGE and town_counts[Town.VILLAGE] >= 4:
-            print(f"区域{self.name}已达到村落数量上限(4)")
+            logger.info("区域%s已达到村落数量上限(4)", self.name)
             return False
         elif town.level == Town.SMALL_CITY and town_counts[Town.SMALL_CITY] >= 2:
-            print(f"区域{self.name}已达到小城市数量上限(2)")
+            logger.info("区域%s已达到小城市数量上限(2)", self.name)
             return False
         elif town.level == Town.LARGE_CITY and town_counts[Town.LARGE_CITY] >= 1:
-            print(f"区域{self.name}已达到大城市数量上限(1)")
+            logger.info("区域%s已达到大城市数量上限(1)", self.name)
             return False
         
         # 添加城镇
         hex_tile.town = town
+        town.hex_tiles.append(hex_tile)
         self.towns.append(town)
-        print(f"成功在区域{self.name}添加城镇{town.name}(等级:{town.level})")
+        town.region = self
+        self.update_economy(town.owner, (0, 0, 0), town.get_economy(), towns=1)
+        
+        # 与已通过铁路相连的本区域城镇合并连通分量
+        self.connectivity.add(town)
+        if self.game_state:
+            for neighbor in self.game_state.railway_network.neighbors(hex_tile):
+                if neighbor.town in self.connectivity:
+                    self.connectivity.union(town, neighbor.town)
+        logger.info("成功在区域%s添加城镇%s(等级:%s)", self.name, town.name, town.level,
+                    extra={"event": "add_town", "player": town.owner, "region": self.id})
         return True
         
     def add_railway(self, railway):
-        """添加一条铁路"""
+        """添加一条铁路
+        
+        Raises:
+            ValueError: 两个格子之间已有铁路
+        """
+        # 先登记到全局铁路网络，重复的边在此被拒绝
+        railway.region = self
+        if self.game_state:
+            self.game_state.railway_network.add_railway(railway)
         self.railways.append(railway)
+            
+        if not railway.is_under_construction:
+            self.on_railway_completed(railway)
+            
+    def on_railway_completed(self, railway):
+        """铁路完工时更新城镇连通性"""
+        start_town = railway.start_hex.town
+        end_town = railway.end_hex.town
+        if start_town in self.connectivity and end_town in self.connectivity:
+            self.connectivity.union(start_town, end_town)
+            
+    def merge_towns(self, town1, town2, new_town):
+        """将两个城镇合并为一个新城镇，新城镇占据两个城镇的全部格子
         
+        Args:
+            town1 (Town): 第一个城镇
+            town2 (Town): 第二个城镇
+            new_town (Town): 合并后的新城镇
+        """
+        # 从区域中移除原有城镇，添加新城镇
+        self.towns.remove(town1)
+        self.towns.remove(town2)
+        self.towns.append(new_town)
+        new_town.region = self
+        
+        # 更新经济汇总
+        for town in (town1, town2):
+            self.update_economy(town.owner, town.get_economy(), (0, 0, 0), towns=-1)
+        self.update_economy(new_town.owner, (0, 0, 0), new_town.get_economy(), towns=1)
+        
+        # 更新所有相关格子，它们现在都指向同一个城镇实例
+        new_town.hex_tiles = town1.hex_tiles + town2.hex_tiles
+        for hex_tile in new_town.hex_tiles:
+            hex_tile.town = new_town
+            
+        # 新城镇继承原有城镇的连通关系
+        self.connectivity.replace((town1, town2), new_town)
+        
+    def update_economy(self, owner, before, after, towns=0):
+        """把城镇经济数据的变化计入本区域和全局的玩家汇总
+        
+        Args:
+            owner (str): 城镇所属阵营
+            before (tuple): 变化前的(gdp, population, mobilized)
+            after (tuple): 变化后的(gdp, population, mobilized)
+            towns (int): 城镇数量变化
+        """
+        apply_economy(self.economy.setdefault(owner, new_economy()), before, after, towns)
+        if self.game_state:
+            economy = self.game_state.economy.setdefault(owner, new_economy())
+            apply_economy(economy, before, after, towns)
+            
     def find_path_to_conflict(self, start_hex, conflict_region_id):
         """查找从起点到冲突区域的最短铁路路径
         
@@ -272,83 +648,37 @@ class Region:
         Returns:
             list: 路径上的格子和铁路列表，如果不存在则返回空列表
         """
-        # 从游戏控制器获取全局游戏状态，以访问所有区域
-        from .controller import GameController
-        game_controller = GameController.get_instance()
-        game_state = game_controller.game_state
+        # 获取全局游戏状态，以访问所有区域
+        game_state = self.game_state
+        if game_state is None:
+            from .controller import GameController
+            game_state = GameController.get_instance().game_state
         
         # 先获取目标冲突区域的所有格子
-        conflict_region = None
-        for region in game_state.regions.values():
-            if region.id == conflict_region_id:
-                conflict_region = region
-                break
+        conflict_region = game_state.regions.get(conflict_region_id)
                 
         if not conflict_region:
-            print(f"找不到冲突区域: {conflict_region_id}")
+            logger.warning("找不到冲突区域: %s", conflict_region_id)
             return []
             
-        # 获取冲突区域所有格子的坐标集合，用于快速查找
-        conflict_hex_coords = {(hex_tile.q, hex_tile.r, hex_tile.s) for hex_tile in conflict_region.hex_tiles}
-        
-        # 构建全局铁路网络图（所有区域的铁路网络）
-        graph = {}  # 格子 -> 相邻格子列表
-        railway_map = {}  # 格子 -> {相邻格子 -> 铁路}
-        hex_map = {}  # 坐标字符串 -> 格子对象
-        
-        # 首先建立所有格子的映射，方便后续查找
-        for region in game_state.regions.values():
-            for hex_tile in region.hex_tiles:
-                hex_key = f"{hex_tile.q},{hex_tile.r},{hex_tile.s}"
-                hex_map[hex_key] = hex_tile
-                graph[hex_tile] = []
-                railway_map[hex_tile] = {}
-        
-        # 然后添加所有区域的铁路连接
-        for region in game_state.regions.values():
-            for railway in region.railways:
-                if railway.is_under_construction:
-                    continue  # 跳过建设中的铁路
-                
-                # 双向连接
-                graph[railway.start_hex].append(railway.end_hex)
-                graph[railway.end_hex].append(railway.start_hex)
-                
-                # 记录连接这两个格子的铁路
-                railway_map[railway.start_hex][railway.end_hex] = railway
-                railway_map[railway.end_hex][railway.start_hex] = railway
+        # 复用按网络版本缓存的距离场，沿下一跳指针生成路径
+        network = game_state.railway_network
+        field = network.route_field(conflict_region_id, conflict_region.hex_tiles)
         
-        # 如果起点不在图中，无法到达
-        if start_hex not in graph:
-            print(f"起点{start_hex.q},{start_hex.r},{start_hex.s}不在铁路网络中")
+        # 如果起点不在地图中，无法到达
+        if game_state.get_hex_region(start_hex) is None:
+            logger.debug("起点%s不在铁路网络中", start_hex)
             return []
         
-        # 使用广度优先搜索寻找路径
-        queue = [(start_hex, [start_hex], [])]  # (当前格子, 路径, 使用的铁路)
-        visited = {start_hex}
+        path = field.path_from(start_hex)
+        if path:
+            logger.debug("找到到冲突区域%s的路径，长度: %d", conflict_region_id, len(path) - 1)
+            return {
+                'path': path,
+                'railways': [network.railway_between(a, b) for a, b in zip(path, path[1:])]
+            }
         
-        while queue:
-            current, path, railways = queue.pop(0)
-            
-            # 检查当前格子是否已在冲突区域内（精确匹配坐标）
-            current_coords = (current.q, current.r, current.s)
-            if current_coords in conflict_hex_coords:
-                print(f"找到到冲突区域{conflict_region_id}的路径，长度: {len(path)-1}")
-                return {
-                    'path': path,
-                    'railways': railways
-                }
-            
-            # 遍历相邻格子
-            if current in graph:  # 确保当前格子在图中
-                for neighbor in graph[current]:
-                    if neighbor not in visited:
-                        visited.add(neighbor)
-                        # 添加连接的铁路到路径
-                        new_railways = railways + [railway_map[current][neighbor]]
-                        queue.append((neighbor, path + [neighbor], new_railways))
-        
-        print(f"找不到从{start_hex.q},{start_hex.r},{start_hex.s}到冲突区域{conflict_region_id}的路径")
+        logger.debug("找不到从%s到冲突区域%s的路径", start_hex, conflict_region_id)
         return []
         
     def find_railway_between(self, hex1, hex2):
@@ -359,8 +689,12 @@ class Region:
             hex2 (HexTile): 第二个格子
             
         Returns:
-            Railway: 连接两个格子的铁路，如果不存在则返回None
+            Railway: 连接两个格子且属于本区域的铁路，如果不存在则返回None
         """
+        if self.game_state:
+            # 查全局边索引
+            railway = self.game_state.railway_network.find_railway(hex1, hex2)
+            return railway if railway is not None and railway.region is self else None
         for railway in self.railways:
             if (railway.start_hex == hex1 and railway.end_hex == hex2) or \
                (railway.start_hex == hex2 and railway.end_hex == hex1):
@@ -378,47 +712,13 @@ class Region:
     
     def _check_towns_connected(self):
         """检查地区内所有城镇是否通过铁路互联"""
-        # 简化实现，实际需要用图算法检查连通性
         if not self.towns or not self.railways:
             return False
-        # 构建连通图
-        connections = {}
-        for town in self.towns:
-            connections[town] = []
-        for railway in self.railways:
-            start_town = railway.start_hex.town
-            end_town = railway.end_hex.town
-            if start_town and end_town:
-                connections[start_town].append(end_town)
-                connections[end_town].append(start_town)
-        # TODO: 完善连通性检查
-        return True
+        return self.connectivity.all_connected(self.towns)
 
     def are_towns_connected(self, town1, town2):
         """检查两个城镇是否通过铁路互联"""
-        # 如果没有铁路直接返回False
-        if not self.railways:
-            return False
-        # 构建邻接表
-        graph = {t: [] for t in self.towns}
-        for railway in self.railways:
-            a = railway.start_hex.town
-            b = railway.end_hex.town
-            if a and b:
-                graph[a].append(b)
-                graph[b].append(a)
-        # 广度优先搜索判断连通性
-        visited = {town1}
-        queue = [town1]
-        while queue:
-            curr = queue.pop(0)
-            if curr == town2:
-                return True
-            for nbr in graph.get(curr, []):
-                if nbr not in visited:
-                    visited.add(nbr)
-                    queue.append(nbr)
-        return False
+        return self.connectivity.connected(town1, town2)
 
 
 class Army:
@@ -430,6 +730,11 @@ class Army:
     TRANSPORTING = "运输中" # 第三回合及以后
     ARRIVED = "已抵达"     # 已到达目的地
     
+    MOVES_PER_ROUND = 5  # 每回合最多前进的格数
+    
+    __slots__ = ("source_town", "source_town_name", "amount", "owner", "status",
+                 "current_position", "target_region_id", "path_to_conflict", "generation_time")
+                 
     def __init__(self, source_town, amount, owner):
         """初始化一个军队单位
         
@@ -444,10 +749,7 @@ class Army:
         self.owner = owner              # 所属阵营
         self.status = self.GENERATING   # 初始状态
         self.current_position = None    # 当前位置的六边形格子
-        self.path = []                  # 计划路径
-        self.movement_points = 0        # 当前回合剩余移动点数
         self.target_region_id = None    # 目标区域ID
-        self.current_railway = None     # 当前所在铁路
         self.path_to_conflict = []      # 到冲突区域的路径
         self.generation_time = 0        # 生成的回合数
 
@@ -487,6 +789,9 @@ class GameState:
             "协约国": "FR-3"   # 协约国冲突区
         }
         
+        # 区域ID前缀对应的国家
+        self.nation_prefixes = {"FR": "法国", "BE": "比利时", "GE": "德国"}
+        
         # 军队列表
         self.armies = []
         
@@ -496,6 +801,23 @@ class GameState:
             "协约国": 0
         }
         
+        # 全局格子索引
+        self.hex_index = {}  # 坐标(q,r,s) -> 格子
+        self.hex_regions = {}  # 格子 -> 所属区域
+        self.hex_grid = None  # 格子相邻表（HexGrid）
+        self.region_borders = None  # 区域边界和区域相邻关系（RegionBorders）
+        
+        # 全局铁路网络，随铁路建造和完工增量更新
+        self.railway_network = RailwayNetwork()
+        
+        # 各玩家的经济汇总（基础GDP、人口、已动员兵力、城镇数），随城镇变化增量更新
+        self.economy = {player: new_economy() for player in self.players}
+        
+        # 状态版本号，每次修改状态时递增，用于增量状态接口
+        self.state_id = uuid.uuid4().hex  # 本局游戏的标识，重置游戏后客户端版本号失效
+        self.version = 0
+        self.changes = {}  # 变更键 -> 最近一次变更时的版本号
+        
     def get_phase(self):
         """获取当前游戏阶段"""
         if self.round <= 30:
@@ -508,6 +830,90 @@ class GameState:
     def add_region(self, region):
         """添加一个地区"""
         self.regions[region.id] = region
+        region.game_state = self
+        
+        # 将地区已有的格子加入全局索引
+        for hex_tile in region.hex_tiles:
+            self.index_hex(region, hex_tile)
+        
+        # 将地区已有的铁路登记到全局铁路网络
+        for railway in region.railways:
+            self.railway_network.add_railway(railway)
+            
+        # 将地区已有的经济汇总计入全局
+        for owner, economy in region.economy.items():
+            total = self.economy.setdefault(owner, new_economy())
+            for key, value in economy.items():
+                total[key] += value
+                
+    def set_factions(self, players, factions, conflict_regions, nation_prefixes):
+        """替换玩家阵营、势力划分、冲突地区和国家前缀（生成的地图在添加地区前调用）
+        
+        Args:
+            players (list): 玩家阵营，按行动顺序排列
+            factions (dict): 玩家阵营 -> 国家列表
+            conflict_regions (dict): 玩家阵营 -> 冲突区域ID
+            nation_prefixes (dict): 区域ID前缀 -> 国家
+        """
+        self.players = list(players)
+        self.current_player = self.players[0]
+        self.factions = factions
+        self.conflict_regions = conflict_regions
+        self.nation_prefixes = nation_prefixes
+        self.arrived_forces = {player: 0 for player in self.players}
+        self.economy = {player: new_economy() for player in self.players}
+            
+    def use_hex_index(self, hex_tiles, hex_grid=None, region_borders=None):
+        """复用地图生成器已建立的坐标索引、相邻表和区域边界
+        
+        Args:
+            hex_tiles (dict): 坐标(q,r,s) -> 格子，通常为MapGenerator.hex_tiles
+            hex_grid (HexGrid): 这些格子的相邻表，通常为MapGenerator.grid
+            region_borders (RegionBorders): 区域边界，通常由GameController.get_region_borders取得
+        """
+        hex_tiles.update(self.hex_index)
+        self.hex_index = hex_tiles
+        self.hex_grid = hex_grid
+        self.region_borders = region_borders
+        
+    def index_hex(self, region, hex_tile):
+        """将格子登记到全局坐标索引和格子->地区反向索引"""
+        self.hex_index[(hex_tile.q, hex_tile.r, hex_tile.s)] = hex_tile
+        self.hex_regions[hex_tile] = region
+        
+    def get_hex(self, coords):
+        """按坐标查找格子
+        
+        Args:
+            coords (tuple): 格子坐标 (q,r,s)
+            
+        Returns:
+            HexTile: 对应的格子，不存在则返回None
+        """
+        return self.hex_index.get(tuple(coords))
+    
+    def get_hex_region(self, hex_tile):
+        """获取格子所属的地区，不存在则返回None"""
+        return self.hex_regions.get(hex_tile)
+    
+    def touch(self, *keys):
+        """记录一次状态修改并递增版本号
+        
+        Args:
+            keys: 发生变化的部分，("region", 区域ID)、("armies",)或("players",)；
+                  回合、阶段等基本信息总是随增量返回，无需登记
+        """
+        self.version += 1
+        for key in keys:
+            self.changes[key] = self.version
+            
+    def changed_since(self, since):
+        """获取某个版本之后发生变化的部分
+        
+        Returns:
+            set: 变更键集合
+        """
+        return {key for key, version in self.changes.items() if version > since}
         
     def next_round(self):
         """进入下一回合"""
@@ -558,7 +964,7 @@ class GameState:
         for region_id, region in self.regions.items():
             # 根据区域ID前缀判断国家
             nation_prefix = region_id.split('-')[0]
-            nation = {"FR": "法国", "BE": "比利时", "GE": "德国"}.get(nation_prefix)
+            nation = self.nation_prefixes.get(nation_prefix)
             
             if nation in player_nations:
                 player_regions.append(region)
@@ -0,0 +1,684 @@
+"""
+蒙特卡洛推演
+把当前局面压缩为只含数值和元组的推演模型，复制局面只需浅拷贝几个列表
+（城镇、军队记录是不可变元组，修改时整条替换，分叉之间共享未修改的记录；
+地图、区域等静态数据所有分叉共用同一份），推演时不序列化、不输出日志。
+搜索型电脑玩家对每个候选行动做大量推演直到战争结算，选择平均结果最好的行动
+"""
+
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .ai_player import AIPlayer, AITurn
+from .models import Town, Railway
+
+# 候选行动（推演模型中的宏观行动，由电脑玩家用对应的建造命令执行）
+VILLAGE = "village"  # 建设村落并与同区域城镇相连
+UPGRADE = "upgrade"  # 合并两个已互联的村落
+RAIL = "rail"  # 为一个城镇补建通往冲突区的铁路
+ENTRY = "entry"  # 为冲突区增加一个铁路入口
+MOBILIZE = "mobilize"  # 动员全部可用兵力
+WAR = "war"  # 宣战
+PASS = "pass"  # 结束本回合
+ACTIONS = (VILLAGE, UPGRADE, RAIL, ENTRY, MOBILIZE, WAR, PASS)
+
+# 城镇记录：(阵营序号, 区域序号, 等级, 开工回合, 距冲突区还需新建的铁路段数, 铁路路径长度, 是否已动员)
+OWNER, REGION, LEVEL, BUILT, GAP, DISTANCE, MOBILIZED = range(7)
+
+# 无法在己方领土内接入冲突区的城镇
+UNREACHABLE = 99
+
+VILLAGE_COST = Town.TOWN_CONFIG[Town.VILLAGE]["cost"]
+UPGRADE_COST = Town.MERGE_COST[Town.VILLAGE]
+RAILWAY_COST = Railway.RAILWAY_CONFIG[Railway.LEVEL_1]["cost"]
+RAILWAY_CAPACITY = Railway.RAILWAY_CONFIG[Railway.LEVEL_1]["capacity"]
+TOWN_GDP = {level: config["gdp"] for level, config in Town.TOWN_CONFIG.items()}
+TROOPS = {
+    level: int(config["population"] * Town.MOBILIZATION_RATE[level])
+    for level, config in Town.TOWN_CONFIG.items()
+}
+
+
+class RolloutMap:
+    """推演模型的静态数据，所有分叉共用"""
+    
+    def __init__(self, players, region_owner, region_conflict, max_rounds):
+        """初始化静态数据
+        
+        Args:
+            players (tuple): 玩家阵营，序号即阵营序号
+            region_owner (list): 区域序号 -> 阵营序号
+            region_conflict (list): 区域序号 -> 是否为所属阵营的冲突区
+            max_rounds (int): 总回合数
+        """
+        self.players = players
+        self.region_owner = region_owner
+        self.region_conflict = region_conflict
+        self.max_rounds = max_rounds
+        # 阵营序号 -> 可建设的区域序号（冲突区内的城镇动员后无需运输，也不计入抵达兵力，排在最后）
+        self.player_regions = [
+            sorted((r for r, owner in enumerate(region_owner) if owner == p), key=lambda r: region_conflict[r])
+            for p in range(len(players))
+        ]
+
+
+class RolloutState:
+    """推演模型中的一个局面
+    
+    只保留决定胜负的量：GDP、城镇、到冲突区的铁路缺口、在途军队、冲突区入口运力和宣战状态
+    """
+    
+    def __init__(self, static, round_number):
+        """初始化空局面，通常通过from_controller从游戏状态生成
+        
+        Args:
+            static (RolloutMap): 静态数据
+            round_number (int): 当前回合
+        """
+        self.static = static
+        self.round = round_number
+        regions = len(static.region_owner)
+        players = len(static.players)
+        self.gdp = [0] * players
+        self.arrived = [0] * players
+        self.entries = [0] * players  # 进入冲突区的铁路段数，每段每回合运送RAILWAY_CAPACITY
+        self.unlinked = [0] * players  # 冲突区以外尚未接入冲突区的城镇数
+        self.mobilizable = [0] * players  # 冲突区以外已建成、尚未动员的城镇数
+        self.towns = []  # 城镇记录，合并掉的城镇置为None，序号保持不变
+        self.region_towns = [()] * regions  # 区域序号 -> 城镇序号元组，修改时整体替换
+        self.building = []  # 建设中的城镇序号，进入下一回合时完工
+        self.armies = []  # (阵营序号, 兵力, 城镇序号, 动员回合, 剩余格数)，城镇序号-1表示已在铁路上
+        self.villages = [0] * regions
+        self.ready_villages = [0] * regions  # 已建成、尚未动员、可以合并的村落数
+        self.small_cities = [0] * regions
+        self.town_counts = [0] * regions
+        self.region_gdp = [0] * regions  # 已建成城镇的基础GDP
+        self.free_tiles = [0] * regions
+        self.site_gaps = [UNREACHABLE] * regions  # 区域内新村落接入冲突区还需新建的铁路段数
+        self.site_distances = [UNREACHABLE] * regions
+        self.bonus = [False] * regions  # 区域内城镇是否全部互联
+        self.war_declared = False
+        self.countdown = 0
+        self.ended = False
+        self.winner = None
+        
+    @classmethod
+    def from_controller(cls, controller, index=None):
+        """从游戏状态生成推演局面
+        
+        Args:
+            controller (GameController): 游戏控制器
+            index (MapIndex): 地图索引，默认使用电脑玩家共享的索引
+            
+        Returns:
+            RolloutState: 推演局面
+        """
+        game_state = controller.game_state
+        index = index or AIPlayer.map_index(controller)
+        players = tuple(game_state.players)
+        regions = list(game_state.regions.values())
+        region_index = {region.id: i for i, region in enumerate(regions)}
+        region_owner = [-1] * len(regions)
+        region_conflict = [False] * len(regions)
+        
+        planner = AIPlayer(None)
+        turns = []
+        for p, player in enumerate(players):
+            turn = AITurn(controller, player, index, math.inf)
+            turns.append(turn)
+            for region in turn.regions:
+                region_owner[region_index[region.id]] = p
+                region_conflict[region_index[region.id]] = region.id == turn.conflict_id
+                
+        static = RolloutMap(players, region_owner, region_conflict, game_state.max_rounds)
+        state = cls(static, game_state.round)
+        state.war_declared = game_state.war_declared
+        state.countdown = game_state.war_countdown
+        state.ended = game_state.game_ended
+        state.winner = players.index(game_state.winner) if game_state.winner in players else None
+        
+        town_index = {}
+        for p, (player, turn) in enumerate(zip(players, turns)):
+            state.gdp[p] = controller.player_resources[player]["gdp"]
+            state.arrived[p] = game_state.arrived_forces.get(player, 0)
+            state.entries[p] = len(planner._conflict_entries(turn))
+            route_costs, next_hop = planner._route_costs(turn)
+            
+            def route_length(coords):
+                length = 0
+                while next_hop.get(coords) is not None:
+                    coords = next_hop[coords]
+                    length += 1
+                return length
+                
+            for region in turn.regions:
+                r = region_index[region.id]
+                own_towns = [town for town in region.towns if town.owner == player]
+                state.bonus[r] = len(own_towns) > 1 and region.connectivity.all_connected(own_towns)
+                for town in own_towns:
+                    start = turn.coords(town.hex_tiles[0])
+                    gap = route_costs.get(start, UNREACHABLE)
+                    town_index[town] = len(state.towns)
+                    state._add_town((
+                        p, r, town.level, game_state.round if town.is_under_construction else -1, gap,
+                        route_length(start) if gap < UNREACHABLE else UNREACHABLE,
+                        town.mobilized > 0
+                    ))
+                    
+                for hex_tile in region.hex_tiles:
+                    if hex_tile.town:
+                        continue
+                    state.free_tiles[r] += 1
+                    coords = turn.coords(hex_tile)
+                    gap = route_costs.get(coords, UNREACHABLE)
+                    if gap < state.site_gaps[r]:
+                        state.site_gaps[r] = gap
+                        state.site_distances[r] = route_length(coords)
+                        
+        # 在途军队：已有路径的按距离场的剩余格数估算，尚无路径的等待所属城镇接入铁路
+        for army in game_state.armies:
+            if army.status == army.ARRIVED or army.owner not in players or army.current_position is None:
+                continue
+            p = players.index(army.owner)
+            target = game_state.regions.get(army.target_region_id)
+            field = game_state.railway_network.route_field(target.id, target.hex_tiles) if target else None
+            distance = field.distance.get(army.current_position) if field else None
+            if distance:
+                state.armies.append((p, army.amount, -1, army.generation_time, distance))
+            elif army.source_town in town_index and distance is None:
+                t = town_index[army.source_town]
+                state.armies.append((p, army.amount, t, army.generation_time, state.towns[t][DISTANCE]))
+        return state
+        
+    def fork(self):
+        """复制局面：可变的列表浅拷贝，记录和静态数据共享"""
+        state = RolloutState.__new__(RolloutState)
+        state.static = self.static
+        state.round = self.round
+        state.gdp = self.gdp[:]
+        state.arrived = self.arrived[:]
+        state.entries = self.entries[:]
+        state.unlinked = self.unlinked[:]
+        state.mobilizable = self.mobilizable[:]
+        state.towns = self.towns[:]
+        state.region_towns = self.region_towns[:]
+        state.building = self.building[:]
+        state.armies = self.armies[:]
+        state.villages = self.villages[:]
+        state.ready_villages = self.ready_villages[:]
+        state.small_cities = self.small_cities[:]
+        state.town_counts = self.town_counts[:]
+        state.region_gdp = self.region_gdp[:]
+        state.free_tiles = self.free_tiles[:]
+        state.site_gaps = self.site_gaps[:]
+        state.site_distances = self.site_distances[:]
+        state.bonus = self.bonus[:]
+        state.war_declared = self.war_declared
+        state.countdown = self.countdown
+        state.ended = self.ended
+        state.winner = self.winner
+        return state
+        
+    def _add_town(self, town):
+        """登记一个城镇记录并更新各项计数"""
+        p, r, level = town[OWNER], town[REGION], town[LEVEL]
+        t = len(self.towns)
+        self.towns.append(town)
+        self.region_towns[r] += (t,)
+        self.town_counts[r] += 1
+        if level == Town.VILLAGE:
+            self.villages[r] += 1
+        elif level == Town.SMALL_CITY:
+            self.small_cities[r] += 1
+        outside = not self.static.region_conflict[r]
+        if outside and 0 < town[GAP] < UNREACHABLE:
+            self.unlinked[p] += 1
+        if town[BUILT] >= self.round:
+            self.building.append(t)
+        else:
+            self.region_gdp[r] += TOWN_GDP[level]
+            if not town[MOBILIZED]:
+                self.mobilizable[p] += outside
+                self.ready_villages[r] += level == Town.VILLAGE
+        return t
+        
+    def _remove_town(self, t):
+        """移除一个已建成、未动员的城镇（合并升级时）"""
+        p, r, level, _, gap = self.towns[t][:DISTANCE]
+        self.towns[t] = None
+        self.region_towns[r] = tuple(i for i in self.region_towns[r] if i != t)
+        self.town_counts[r] -= 1
+        self.region_gdp[r] -= TOWN_GDP[level]
+        outside = not self.static.region_conflict[r]
+        self.mobilizable[p] -= outside
+        if level == Town.VILLAGE:
+            self.villages[r] -= 1
+            self.ready_villages[r] -= 1
+        elif level == Town.SMALL_CITY:
+            self.small_cities[r] -= 1
+        if outside and 0 < gap < UNREACHABLE:
+            self.unlinked[p] -= 1
+            
+    def _link_town(self, t, distance):
+        """城镇接入冲突区"""
+        town = self.towns[t]
+        if not self.static.region_conflict[town[REGION]] and 0 < town[GAP] < UNREACHABLE:
+            self.unlinked[town[OWNER]] -= 1
+        self.towns[t] = town[:GAP] + (0, distance) + town[MOBILIZED:]
+        
+    def _village_region(self, p):
+        """可建设村落的区域（接入冲突区所需铁路最少的），没有则返回None"""
+        best = None
+        for r in self.static.player_regions[p]:
+            if self.villages[r] < 4 and self.free_tiles[r] > 0:
+                if best is None or self.site_gaps[r] < self.site_gaps[best]:
+                    best = r
+        return best
+        
+    def _upgrade_region(self, p):
+        """有两个可合并村落的区域，没有则返回None"""
+        for r in self.static.player_regions[p]:
+            if self.ready_villages[r] >= 2 and self.bonus[r] and self.small_cities[r] < 2:
+                return r
+        return None
+        
+    def _rail_town(self, p):
+        """最值得补建铁路的城镇序号（每段铁路可接入的兵力最多），没有则返回None"""
+        best = None
+        best_value = 0
+        towns = self.towns
+        conflict = self.static.region_conflict
+        for r in self.static.player_regions[p]:
+            if conflict[r]:
+                continue
+            for t in self.region_towns[r]:
+                town = towns[t]
+                if 0 < town[GAP] < UNREACHABLE:
+                    value = TROOPS[town[LEVEL]] / town[GAP]
+                    if value > best_value:
+                        best = t
+                        best_value = value
+        return best
+        
+    def can_declare_war(self):
+        """当前是否可以宣战"""
+        return not self.war_declared and 30 < self.round <= 40
+        
+    def can_apply(self, p, action):
+        """阵营当前能否执行某个候选行动"""
+        if self.ended:
+            return action == PASS
+        gdp = self.gdp[p]
+        if action == VILLAGE:
+            return gdp >= VILLAGE_COST and self._village_region(p) is not None
+        if action == UPGRADE:
+            return gdp >= UPGRADE_COST and self._upgrade_region(p) is not None
+        if action == RAIL:
+            return gdp >= RAILWAY_COST and self.unlinked[p] > 0
+        if action == ENTRY:
+            return gdp >= 2 * RAILWAY_COST and 0 < self.entries[p] < AIPlayer.CONFLICT_ENTRIES
+        if action == MOBILIZE:
+            return self.mobilizable[p] > 0
+        if action == WAR:
+            return self.can_declare_war()
+        return action == PASS
+        
+    def legal_actions(self, p):
+        """阵营当前可执行的候选行动"""
+        return [action for action in ACTIONS if self.can_apply(p, action)]
+        
+    def apply(self, p, action):
+        """执行一个候选行动（调用方需保证行动合法）"""
+        if action == VILLAGE:
+            r = self._village_region(p)
+            self.gdp[p] -= VILLAGE_COST
+            # 与同区域已有的城镇相连（铁路不够钱时区域失去互联加成）
+            if self.town_counts[r] == 1 or (self.town_counts[r] and self.bonus[r]):
+                if self.gdp[p] >= RAILWAY_COST:
+                    self.gdp[p] -= RAILWAY_COST
+                    self.bonus[r] = True
+                else:
+                    self.bonus[r] = False
+            self.free_tiles[r] -= 1
+            self._add_town((p, r, Town.VILLAGE, self.round, self.site_gaps[r], self.site_distances[r], False))
+        elif action == UPGRADE:
+            r = self._upgrade_region(p)
+            merged = []
+            for t in self.region_towns[r]:
+                town = self.towns[t]
+                if town[LEVEL] == Town.VILLAGE and town[BUILT] < self.round and not town[MOBILIZED]:
+                    merged.append(town)
+                    self._remove_town(t)
+                    if len(merged) == 2:
+                        break
+            self.gdp[p] -= UPGRADE_COST
+            self._add_town((
+                p, r, Town.SMALL_CITY, self.round, min(town[GAP] for town in merged),
+                min(town[DISTANCE] for town in merged), False
+            ))
+        elif action == RAIL:
+            t = self._rail_town(p)
+            town = self.towns[t]
+            segments = min(town[GAP], int(self.gdp[p] // RAILWAY_COST))
+            self.gdp[p] -= segments * RAILWAY_COST
+            if segments < town[GAP]:
+                self.towns[t] = town[:GAP] + (town[GAP] - segments,) + town[DISTANCE:]
+                return
+            self._link_town(t, town[DISTANCE])
+            # 城镇接入后，同区域已互联的城镇和新村落都可经它到达冲突区
+            r = town[REGION]
+            self.site_gaps[r] = min(self.site_gaps[r], 1)
+            self.site_distances[r] = min(self.site_distances[r], town[DISTANCE] + 1)
+            if self.bonus[r]:
+                for i in self.region_towns[r]:
+                    if self.towns[i][GAP]:
+                        self._link_town(i, town[DISTANCE] + 1)
+        elif action == ENTRY:
+            self.gdp[p] -= 2 * RAILWAY_COST
+            self.entries[p] += 1
+        elif action == MOBILIZE:
+            conflict = self.static.region_conflict
+            for r in self.static.player_regions[p]:
+                if conflict[r]:
+                    continue
+                for t in self.region_towns[r]:
+                    town = self.towns[t]
+                    if town[MOBILIZED] or town[BUILT] >= self.round:
+                        continue
+                    self.towns[t] = town[:MOBILIZED] + (True,)
+                    if town[LEVEL] == Town.VILLAGE:
+                        self.ready_villages[r] -= 1
+                    self.armies.append((p, TROOPS[town[LEVEL]], t, self.round, town[DISTANCE]))
+            self.mobilizable[p] = 0
+        elif action == WAR:
+            self.war_declared = True
+            self.countdown = 3
+            
+    def step(self):
+        """进入下一回合：结算GDP、完成建设、移动军队、推进战争倒计时"""
+        static = self.static
+        
+        # GDP：已建成的城镇按区域汇总，区域内城镇全部互联时加成20%
+        gdp = self.gdp
+        region_owner = static.region_owner
+        for r, region_gdp in enumerate(self.region_gdp):
+            if region_gdp:
+                if self.bonus[r] and self.town_counts[r] > 1:
+                    region_gdp *= 1.2
+                gdp[region_owner[r]] += region_gdp
+                
+        # 完成建设
+        if self.building:
+            conflict = static.region_conflict
+            for t in self.building:
+                town = self.towns[t]
+                if town is None:
+                    continue
+                r = town[REGION]
+                self.region_gdp[r] += TOWN_GDP[town[LEVEL]]
+                self.mobilizable[town[OWNER]] += not conflict[r]
+                self.ready_villages[r] += town[LEVEL] == Town.VILLAGE
+            self.building = []
+            
+        round_number = self.round + 1
+        self.round = round_number
+        
+        # 军队：动员两回合后出发，已接入铁路的每回合前进5格，进入冲突区受入口运力限制
+        if self.armies:
+            capacity = [entries * RAILWAY_CAPACITY for entries in self.entries]
+            towns = self.towns
+            moving = []
+            for army in self.armies:
+                p, amount, t, created, remaining = army
+                if round_number - created < 2 or (t >= 0 and towns[t][GAP]):
+                    moving.append(army)
+                    continue
+                remaining -= AIPlayer.MOVES_PER_ROUND
+                if remaining <= 0 and capacity[p] >= amount:
+                    capacity[p] -= amount
+                    self.arrived[p] += amount
+                    continue
+                moving.append((p, amount, t, created, max(remaining, 0)))
+            self.armies = moving
+            
+        # 战争倒计时结束时已抵达兵力多的一方获胜（兵力相同时先列出的阵营获胜，与游戏一致）
+        if self.war_declared:
+            self.countdown -= 1
+            if self.countdown <= 0:
+                self.winner = max(range(len(self.arrived)), key=self.arrived.__getitem__)
+                self.ended = True
+        if round_number > static.max_rounds:
+            self.ended = True
+            
+    def expected_forces(self, p):
+        """已抵达和已接入铁路的在途兵力"""
+        forces = self.arrived[p]
+        for owner, amount, t, _, _ in self.armies:
+            if owner == p and (t < 0 or not self.towns[t][GAP]):
+                forces += amount
+        return forces
+        
+    def score(self, p):
+        """推演结束时阵营的得分：胜1、无胜负0.5、负0，另加兵力差带来的小幅修正"""
+        if self.winner is None:
+            result = 0.5
+        else:
+            result = 1.0 if self.winner == p else 0.0
+        own = self.arrived[p]
+        enemy = sum(self.arrived) - own
+        return result + 0.1 * (own - enemy) / (own + enemy + 1)
+
+
+class RolloutPolicy:
+    """推演中双方使用的默认策略：保护期随机建设，之后动员并按兵力对比随机宣战"""
+    
+    def __init__(self, builds_per_round=4, stop_chance=0.15):
+        """初始化默认策略
+        
+        Args:
+            builds_per_round (int): 保护期每回合最多的建设次数
+            stop_chance (float): 每次建设前提前结束本回合的概率
+        """
+        self.builds_per_round = builds_per_round
+        self.stop_chance = stop_chance
+        
+    def play(self, state, p, rng):
+        """为阵营执行一回合的行动"""
+        if state.round <= 30:
+            for _ in range(self.builds_per_round):
+                gdp = state.gdp[p]
+                if gdp < RAILWAY_COST or rng.random() < self.stop_chance:
+                    return
+                # 与can_apply相同的判断，推演中最频繁，展开以减少调用
+                actions = []
+                if gdp >= VILLAGE_COST and state._village_region(p) is not None:
+                    actions.append(VILLAGE)
+                if gdp >= UPGRADE_COST and state._upgrade_region(p) is not None:
+                    actions.append(UPGRADE)
+                if state.unlinked[p]:
+                    actions.append(RAIL)
+                if gdp >= 2 * RAILWAY_COST and 0 < state.entries[p] < AIPlayer.CONFLICT_ENTRIES:
+                    actions.append(ENTRY)
+                if not actions:
+                    return
+                state.apply(p, actions[int(rng.random() * len(actions))])
+            return
+            
+        while state.can_apply(p, RAIL):
+            state.apply(p, RAIL)
+        if state.mobilizable[p]:
+            state.apply(p, MOBILIZE)
+        if state.can_declare_war():
+            own = state.expected_forces(p)
+            enemy = max(state.expected_forces(q) for q in range(len(state.gdp)) if q != p)
+            if state.round >= 40:
+                chance = 1.0 if own > enemy else 0.0
+            else:
+                chance = 0.5 if own >= 1.2 * enemy else 0.1
+            if rng.random() < chance:
+                state.apply(p, WAR)
+
+
+def rollout(state, p, rng, policy):
+    """从局面推演到游戏结束（会修改局面），返回阵营p的得分
+    
+    调用前阵营p本回合的行动已经执行，推演从结束本回合开始
+    """
+    players = range(len(state.gdp))
+    state.step()
+    while not state.ended:
+        for q in players:
+            policy.play(state, q, rng)
+        state.step()
+    return state.score(p)
+
+
+def _evaluate_chunk(state, p, actions, seeds, policy):
+    """对每个候选行动用同一组随机种子推演（公共随机数，减小比较的方差），返回得分之和"""
+    totals = dict.fromkeys(actions, 0.0)
+    for seed in seeds:
+        for action in actions:
+            child = state.fork()
+            child.apply(p, action)
+            totals[action] += rollout(child, p, random.Random(seed), policy)
+    return totals
+
+
+class MonteCarloEvaluator:
+    """用推演评估候选行动，可在进程池中并行"""
+    
+    def __init__(self, rollouts=200, workers=1, seed=0, policy=None):
+        """初始化评估器
+        
+        Args:
+            rollouts (int): 每个候选行动的推演次数
+            workers (int): 进程数，1表示在当前进程内推演
+            seed (int): 随机种子，每次评估后递增
+            policy (RolloutPolicy): 推演中使用的默认策略
+        """
+        self.rollouts = rollouts
+        self.workers = workers
+        self.seed = seed
+        self.policy = policy or RolloutPolicy()
+        self.executor = None  # 首次并行评估时创建
+        
+    def evaluate(self, state, p, actions=None, deadline=None):
+        """评估阵营p的候选行动
+        
+        Args:
+            state (RolloutState): 当前局面（不会被修改）
+            p (int): 阵营序号
+            actions (list): 候选行动，默认为全部合法行动
+            deadline (float): 截止时间（time.perf_counter），只在单进程推演时生效，
+                              到时后按已完成的推演次数计算
+                              
+        Returns:
+            dict: 候选行动 -> 平均得分
+        """
+        actions = list(actions or state.legal_actions(p))
+        seeds = range(self.seed, self.seed + self.rollouts)
+        self.seed += self.rollouts
+        
+        if self.workers == 1:
+            totals = dict.fromkeys(actions, 0.0)
+            count = 0
+            for seed in seeds:
+                chunk = _evaluate_chunk(state, p, actions, (seed,), self.policy)
+                for action, total in chunk.items():
+                    totals[action] += total
+                count += 1
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+            return {action: total / count for action, total in totals.items()}
+            
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        chunks = [seeds[i::self.workers] for i in range(self.workers)]
+        futures = [
+            self.executor.submit(_evaluate_chunk, state, p, actions, chunk, self.policy)
+            for chunk in chunks if chunk
+        ]
+        totals = dict.fromkeys(actions, 0.0)
+        for future in futures:
+            for action, total in future.result().items():
+                totals[action] += total
+        return {action: total / len(seeds) for action, total in totals.items()}
+        
+    def close(self):
+        """关闭进程池"""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+class MonteCarloAI(AIPlayer):
+    """搜索型电脑玩家
+    
+    每次从当前局面生成推演模型，评估全部候选行动后执行得分最高的一个，
+    直到最佳行动是结束本回合；行动本身沿用规则型电脑玩家的建造方式执行
+    """
+    
+    MAX_ACTIONS = 8  # 每回合最多执行的行动数
+    
+    def __init__(self, player, time_budget=0.5, rollouts=64, workers=1, seed=0):
+        """初始化搜索型电脑玩家
+        
+        Args:
+            player (str): 电脑玩家的阵营
+            time_budget (float): 每回合的时间预算（秒），单进程推演时到时即按已有结果决策
+            rollouts (int): 每次决策中每个候选行动的推演次数
+            workers (int): 推演进程数
+            seed (int): 随机种子
+        """
+        super().__init__(player, time_budget)
+        self.evaluator = MonteCarloEvaluator(rollouts, workers, seed)
+        
+    def take_turn(self, controller):
+        game_state = controller.game_state
+        if game_state.game_ended:
+            return []
+            
+        deadline = time.perf_counter() + self.time_budget
+        index = self.map_index(controller)
+        turn = AITurn(controller, self.player, index, deadline)
+        if not turn.regions:
+            return []
+            
+        p = game_state.players.index(self.player)
+        for _ in range(self.MAX_ACTIONS):
+            if turn.expired():
+                break
+            state = RolloutState.from_controller(controller, index)
+            actions = state.legal_actions(p)
+            if actions == [PASS]:
+                break
+            scores = self.evaluator.evaluate(state, p, actions, deadline)
+            best = max(actions, key=scores.get)
+            if best == PASS or not self._execute(turn, best):
+                break
+        return turn.actions
+        
+    def _execute(self, turn, action):
+        """用建造命令执行推演模型中的候选行动，返回是否执行成功"""
+        done = len(turn.actions)
+        # 截止时间只约束推演，选中的行动总是执行完
+        deadline = turn.deadline
+        turn.deadline = math.inf
+        if action == VILLAGE:
+            self._build_villages(turn, 1)
+            self._link_towns(turn)
+        elif action == UPGRADE:
+            self._upgrade_towns(turn, Town.VILLAGE, count=1)
+        elif action == RAIL:
+            self._extend_to_conflict(turn, max_routes=1)
+        elif action == ENTRY:
+            self._extend_to_conflict(turn, blocked=self._conflict_entries(turn), max_routes=1)
+        elif action == MOBILIZE:
+            self._mobilize(turn)
+        elif action == WAR:
+            if turn.controller.declare_war(turn.player):
+                turn.actions.append(["declare_war"])
+        turn.deadline = deadline
+        return len(turn.actions) > done
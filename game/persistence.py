@@ -0,0 +1,101 @@
+"""
+游戏状态文件的后台写入
+请求内把要保存的状态编码为JSON，由后台线程合并连续的保存并原子地写入磁盘
+"""
+
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class StateFileWriter:
+    """后台JSON状态文件写入器
+    
+    同一文件在写入前被多次保存时只写最新的一份；
+    先写临时文件再重命名，进程崩溃时不会留下写了一半的文件
+    """
+    
+    def __init__(self, delay=0.05):
+        """初始化写入器
+        
+        Args:
+            delay (float): 收到保存后等待多少秒再写入，用于合并连续的保存
+        """
+        self.delay = delay
+        self.pending = {}  # 文件路径 -> 待写入的JSON数据
+        self.writing = False  # 后台线程是否正在写入
+        self.closed = False
+        self.condition = threading.Condition()
+        self.thread = None  # 首次保存时启动，fork出的工作进程会重新启动自己的线程
+        
+    def save(self, path, game_state):
+        """在调用方线程中把状态编码为紧凑的JSON并登记，立即返回
+        
+        编码在调用方持有游戏锁时完成，之后的请求修改状态不会影响写入的内容
+        
+        Args:
+            path (str): 文件路径
+            game_state (dict): JSON兼容的游戏状态
+        """
+        data = json.dumps(game_state, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        with self.condition:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='state-file-writer', daemon=True)
+                self.thread.start()
+            self.pending[path] = data
+            self.condition.notify_all()
+            
+    def flush(self, timeout=None):
+        """等待已登记的状态全部写入磁盘
+        
+        Returns:
+            bool: 是否在超时前全部写完
+        """
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: not self.pending and not self.writing, timeout)
+                
+    def close(self, timeout=5):
+        """写完剩余的状态并停止后台线程（进程退出前调用）"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        
+    def _run(self):
+        """后台线程：取出待写入的数据并逐个写入"""
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending or self.closed)
+                if not self.pending:
+                    return  # 已关闭且没有剩余状态
+                # 等待一小段时间，合并紧接着的保存（关闭时立即写入）
+                self.condition.wait_for(lambda: self.closed, self.delay)
+                batch = self.pending
+                self.pending = {}
+                self.writing = True
+                
+            for path, data in batch.items():
+                try:
+                    self._write(path, data)
+                except Exception as e:
+                    logger.exception("保存游戏状态失败: %s", e)
+                    
+            with self.condition:
+                self.writing = False
+                self.condition.notify_all()
+                
+    @staticmethod
+    def _write(path, data):
+        """写入临时文件，再原子地替换目标文件"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"  # 多个工作进程可能同时写同一文件
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
@@ -0,0 +1,238 @@
+"""
+全局铁路网络
+由GameState持有，随铁路的建造和完工增量更新，供寻路直接读取
+"""
+
+from array import array
+from collections import deque
+
+
+def edge_key(hex1, hex2):
+    """两个格子之间的边的无序键
+    
+    地图格子按相邻表编号取键，未登记到相邻表的格子按坐标取键
+    """
+    a, b = hex1.index, hex2.index
+    if a < 0 or b < 0:
+        a, b = (hex1.q, hex1.r), (hex2.q, hex2.r)
+    return (a, b) if a < b else (b, a)
+
+
+class RailwayLoadLedger:
+    """铁路每回合运量账本
+    
+    以铁路登记序号为下标，用数组记录本回合运量和历史统计。
+    运力按回合计算：每回合开始时清零本回合运量，并把上一回合的运量计入统计
+    """
+    
+    def __init__(self):
+        """初始化运量账本"""
+        self.railways = []  # 登记序号 -> 铁路
+        self.load = array('q')  # 本回合运量
+        self.total = array('q')  # 历史累计运量
+        self.peak = array('q')  # 单回合最大运量
+        self.saturated = array('q')  # 运力用尽的回合数
+        self.rounds = 0  # 已结算的回合数
+        self._touched = []  # 本回合有运量的铁路序号
+        
+    def register(self, railway):
+        """登记一条铁路并分配序号"""
+        railway.index = len(self.railways)
+        self.railways.append(railway)
+        self.load.append(0)
+        self.total.append(0)
+        self.peak.append(0)
+        self.saturated.append(0)
+        
+    def add(self, railway, amount):
+        """记录本回合通过铁路的兵力"""
+        if not amount:
+            # 运量为零时不登记，否则下次记录时同一序号会重复登记
+            return
+        index = railway.index
+        if not self.load[index]:
+            self._touched.append(index)
+        self.load[index] += amount
+        railway.troops = self.load[index]
+        
+    def loaded_railways(self):
+        """本回合有运量的铁路"""
+        return [self.railways[index] for index in self._touched]
+    
+    def remaining(self, railway):
+        """铁路本回合剩余运力"""
+        return railway.get_capacity() - self.load[railway.index]
+        
+    def reset(self):
+        """开始新回合：结算上一回合的运量并清零"""
+        for index in self._touched:
+            load = self.load[index]
+            railway = self.railways[index]
+            self.total[index] += load
+            if load > self.peak[index]:
+                self.peak[index] = load
+            if load >= railway.get_capacity():
+                self.saturated[index] += 1
+            self.load[index] = 0
+            railway.troops = 0
+        self._touched = []
+        self.rounds += 1
+        
+    def stats(self, railway):
+        """获取铁路的运量统计
+        
+        Returns:
+            dict: 本回合运量、运力、利用率、平均利用率、峰值和满载回合数
+        """
+        index = railway.index
+        capacity = railway.get_capacity()
+        load = self.load[index]
+        rounds = max(self.rounds, 1)
+        return {
+            "load": load,
+            "capacity": capacity,
+            "utilization": load / capacity if capacity else 0,
+            "average_utilization": self.total[index] / rounds / capacity if capacity else 0,
+            "peak": self.peak[index],
+            "saturated_rounds": self.saturated[index]
+        }
+
+
+class RouteField:
+    """到某个目标区域的距离场
+    
+    以目标区域全部格子为源点做一次反向广度优先搜索得到，
+    记录网络上每个可达格子到目标的距离和下一跳格子
+    """
+    
+    def __init__(self, version, distance, next_hop):
+        """初始化距离场
+        
+        Args:
+            version (int): 生成时的铁路网络版本号
+            distance (dict): 格子 -> 到目标区域的铁路段数
+            next_hop (dict): 格子 -> 朝目标前进的下一个格子（目标格子为None）
+        """
+        self.version = version
+        self.distance = distance
+        self.next_hop = next_hop
+        
+    def reaches(self, hex_tile):
+        """格子是否能通过铁路到达目标区域"""
+        return hex_tile in self.distance
+        
+    def path_from(self, hex_tile):
+        """沿下一跳指针生成从格子到目标区域的路径
+        
+        Args:
+            hex_tile (HexTile): 起始格子
+            
+        Returns:
+            list: 路径上的格子（含起点），不可达则返回空列表
+        """
+        if hex_tile not in self.distance:
+            return []
+        path = [hex_tile]
+        next_hop = self.next_hop[hex_tile]
+        while next_hop is not None:
+            path.append(next_hop)
+            next_hop = self.next_hop[next_hop]
+        return path
+
+
+class RailwayNetwork:
+    """全局铁路网络（所有区域共享的邻接结构）"""
+    
+    def __init__(self):
+        """初始化铁路网络"""
+        self.railways = []  # 已登记的全部铁路（含建设中）
+        self.edges = {}  # 边的无序键 -> 铁路（含建设中），每条边至多一条；铁路的region为所属区域
+        self.adjacency = {}  # 格子 -> {相邻格子 -> 铁路}，只包含已建成的铁路
+        self.version = 0  # 网络版本号，连通关系变化时递增
+        self.route_fields = {}  # 目标区域ID -> RouteField，按版本号失效
+        self.ledger = RailwayLoadLedger()  # 每回合运量账本
+        
+    def add_railway(self, railway):
+        """登记一条铁路
+        
+        建设中的铁路只登记，完工后才加入邻接结构
+        
+        Args:
+            railway (Railway): 新建的铁路
+            
+        Raises:
+            ValueError: 两个格子之间已有铁路
+        """
+        key = edge_key(railway.start_hex, railway.end_hex)
+        if key in self.edges:
+            raise ValueError("两个格子之间已有铁路")
+        self.edges[key] = railway
+        railway.network = self
+        self.railways.append(railway)
+        self.ledger.register(railway)
+        if not railway.is_under_construction:
+            self._link(railway)
+            
+    def on_railway_completed(self, railway):
+        """铁路完工时调用，将其加入邻接结构"""
+        self._link(railway)
+        
+    def _link(self, railway):
+        """双向连接铁路两端的格子"""
+        start_hex = railway.start_hex
+        end_hex = railway.end_hex
+        self.adjacency.setdefault(start_hex, {})[end_hex] = railway
+        self.adjacency.setdefault(end_hex, {})[start_hex] = railway
+        self.version += 1
+        
+    def neighbors(self, hex_tile):
+        """获取通过已建成铁路与格子相连的格子
+        
+        Returns:
+            dict: 相邻格子 -> 铁路
+        """
+        return self.adjacency.get(hex_tile, {})
+        
+    def railway_between(self, hex1, hex2):
+        """查找连接两个格子的已建成铁路，不存在则返回None"""
+        return self.adjacency.get(hex1, {}).get(hex2)
+        
+    def find_railway(self, hex1, hex2):
+        """查找连接两个格子的铁路（含建设中），不存在则返回None"""
+        return self.edges.get(edge_key(hex1, hex2))
+        
+    def route_field(self, target_id, target_tiles):
+        """获取到目标区域的距离场，网络版本未变化时直接复用缓存
+        
+        Args:
+            target_id (str): 目标区域ID，作为缓存键
+            target_tiles (list): 目标区域的全部格子
+            
+        Returns:
+            RouteField: 距离场
+        """
+        field = self.route_fields.get(target_id)
+        if field and field.version == self.version:
+            return field
+            
+        # 以目标区域全部格子为源点做反向广度优先搜索
+        distance = {}
+        next_hop = {}
+        queue = deque()
+        for hex_tile in target_tiles:
+            distance[hex_tile] = 0
+            next_hop[hex_tile] = None
+            queue.append(hex_tile)
+            
+        while queue:
+            current = queue.popleft()
+            current_distance = distance[current] + 1
+            for neighbor in self.adjacency.get(current, ()):
+                if neighbor not in distance:
+                    distance[neighbor] = current_distance
+                    next_hop[neighbor] = current
+                    queue.append(neighbor)
+                    
+        field = RouteField(self.version, distance, next_hop)
+        self.route_fields[target_id] = field
+        return field
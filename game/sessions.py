@@ -0,0 +1,246 @@
+"""
+游戏会话管理
+同一进程内按游戏ID缓存多局互相独立的游戏，每局游戏单独加锁。
+游戏状态保存在共享的状态存储中，多个工作进程读写同一局游戏时
+按版本号判断内存中的副本是否过期，提交时做乐观并发检查。
+平时只追加本次请求执行的命令，每隔一定数量的命令保存一次完整快照
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from .controller import GameController
+from .state_store import SQLiteStateStore, StaleStateError
+
+
+class GameSession:
+    """一局游戏的会话"""
+    
+    def __init__(self, game_id, controller=None, version=0):
+        """初始化游戏会话
+        
+        Args:
+            game_id (str): 游戏ID
+            controller (GameController): 这局游戏的控制器，尚未从存储读取时为None
+            version (int): 控制器对应的存储版本号，0表示尚未提交
+        """
+        self.game_id = game_id
+        self.controller = controller
+        self.version = version
+        self.snapshot_version = 0  # 存储中最近一次快照的版本号
+        self.lock = threading.RLock()  # 同一局游戏的请求串行执行
+        self.last_access = time.time()
+        self.evicted = False  # 是否已从内存移除
+        
+    def touch(self):
+        """记录最近一次访问时间"""
+        self.last_access = time.time()
+
+
+class GameRegistry:
+    """游戏注册表
+    
+    内存中的游戏只是状态存储的缓存，按最近访问顺序排列（LRU），
+    空闲超时或数量超出上限时把最久未访问的游戏移出内存，再次访问时从存储读取
+    """
+    
+    _instance = None
+    
+    @classmethod
+    def get_instance(cls):
+        """获取进程内共享的游戏注册表"""
+        if cls._instance is None:
+            cls._instance = GameRegistry(
+                storage_dir=os.environ.get('GAME_SESSION_DIR', 'game_sessions'),
+                max_active=int(os.environ.get('GAME_MAX_ACTIVE', 64)),
+                idle_seconds=int(os.environ.get('GAME_IDLE_SECONDS', 1800)),
+                snapshot_interval=int(os.environ.get('GAME_SNAPSHOT_INTERVAL', 50))
+            )
+        return cls._instance
+        
+    def __init__(self, storage_dir='game_sessions', max_active=64, idle_seconds=1800,
+                 snapshot_interval=50, store=None):
+        """初始化游戏注册表
+        
+        Args:
+            storage_dir (str): 游戏数据的存放目录
+            max_active (int): 内存中最多保留的游戏数量
+            idle_seconds (int): 空闲多少秒后移出内存
+            snapshot_interval (int): 快照之后最多追加多少条命令，超出则保存新快照
+            store (StateStore): 状态存储，默认使用存放目录下的SQLite数据库
+        """
+        self.storage_dir = storage_dir
+        self.max_active = max_active
+        self.idle_seconds = idle_seconds
+        self.snapshot_interval = snapshot_interval
+        self.store = store or SQLiteStateStore(os.path.join(storage_dir, 'games.sqlite3'))
+        self.sessions = OrderedDict()  # 游戏ID -> GameSession，最久未访问的在前
+        self.lock = threading.Lock()  # 保护sessions字典
+        
+    def create_game(self, current_player=None):
+        """创建一局新游戏并加锁，使用完毕后需调用release
+        
+        Args:
+            current_player (str): 玩家选择的阵营，在保存第一份快照前设置
+        
+        Returns:
+            GameSession: 新游戏的会话
+        """
+        controller = GameController()
+        if current_player is not None:
+            controller.game_state.current_player = current_player
+        session = GameSession(uuid.uuid4().hex, controller)
+        session.lock.acquire()
+        self.commit(session)
+        with self.lock:
+            self.sessions[session.game_id] = session
+            self._evict_idle()
+        return session
+        
+    def acquire(self, game_id):
+        """获取游戏会话并加锁，内存中的副本过期时从存储重新读取，使用完毕后需调用release
+        
+        Returns:
+            GameSession: 已加锁的游戏会话，不存在则返回None
+        """
+        if not game_id or not self._valid_id(game_id):
+            return None
+        while True:
+            with self.lock:
+                session = self.sessions.get(game_id)
+                if session is None:
+                    session = GameSession(game_id)
+                    self.sessions[game_id] = session
+                self.sessions.move_to_end(game_id)
+                session.touch()
+                self._evict_idle()
+                
+            session.lock.acquire()
+            if session.evicted:
+                # 加锁前刚好被移出内存，重新获取
+                session.lock.release()
+                continue
+            try:
+                if self._refresh(session):
+                    return session
+            except Exception:
+                session.lock.release()
+                raise
+                
+            # 存储中没有这局游戏
+            with self.lock:
+                self._evict(session)
+            session.lock.release()
+            return None
+            
+    def commit(self, session):
+        """把会话中新执行的命令提交到存储（调用方需持有会话的锁）
+        
+        重置过游戏或快照之后的命令过多时保存完整快照，否则只追加命令
+        
+        Raises:
+            StaleStateError: 其他进程已提交了更新的版本，本次修改被丢弃
+        """
+        controller = session.controller
+        actions = controller.take_journal()
+        try:
+            journal_length = session.version - session.snapshot_version + len(actions)
+            if controller.needs_snapshot or journal_length >= self.snapshot_interval:
+                controller.needs_snapshot = False
+                session.version = self.store.commit(session.game_id, controller, session.version)
+                session.snapshot_version = session.version
+            elif actions:
+                session.version = self.store.append(session.game_id, actions, session.version)
+        except StaleStateError:
+            # 内存中的副本已过期，下次访问时从存储重新读取
+            session.controller = None
+            session.version = 0
+            raise
+            
+    def release(self, session):
+        """释放游戏会话的锁"""
+        session.lock.release()
+        
+    def remove(self, game_id):
+        """删除一局游戏（内存和存储）"""
+        with self.lock:
+            self.sessions.pop(game_id, None)
+        self.store.delete(game_id)
+        
+    def _refresh(self, session):
+        """内存副本落后于存储时追上最新版本，游戏不存在则返回False
+        
+        副本之后的命令仍在操作日志中时只重放这些命令，否则读取快照重新恢复
+        """
+        version = self.store.version(session.game_id)
+        if version is None:
+            return self._restore_saved(session)
+        if session.controller is not None and version == session.version:
+            return True
+            
+        if session.controller is not None and version > session.version:
+            actions = self.store.actions_since(session.game_id, session.version)
+            if actions is not None:
+                session.controller.replay(actions)
+                session.version += len(actions)
+                return True
+                
+        loaded = self.store.load(session.game_id)
+        if loaded is None:
+            return False
+        session.version, session.snapshot_version, session.controller = loaded
+        return True
+        
+    def saved_state_path(self, game_id):
+        """游戏JSON存档的路径"""
+        return os.path.join(self.storage_dir, f"{game_id}.json")
+        
+    def _restore_saved(self, session):
+        """状态存储中没有这局游戏时从JSON存档恢复并写入存储，没有存档则返回False"""
+        path = self.saved_state_path(session.game_id)
+        if not os.path.exists(path):
+            return False
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        session.controller = GameController.from_saved_state(saved)
+        session.version = 0
+        session.snapshot_version = 0
+        try:
+            self.commit(session)
+        except StaleStateError:
+            # 其他进程已先恢复了这局游戏，改为从存储读取
+            loaded = self.store.load(session.game_id)
+            if loaded is None:
+                return False
+            session.version, session.snapshot_version, session.controller = loaded
+        return True
+        
+    def _evict_idle(self):
+        """移出空闲超时的游戏和超出数量上限的游戏（调用方需持有self.lock）"""
+        now = time.time()
+        for session in list(self.sessions.values()):
+            over_limit = len(self.sessions) > self.max_active
+            idle = now - session.last_access > self.idle_seconds
+            if not over_limit and not idle:
+                break  # 按访问顺序排列，后面的游戏更新
+            # 正在处理请求的游戏不移出
+            if session.lock.acquire(blocking=False):
+                try:
+                    self._evict(session)
+                finally:
+                    session.lock.release()
+                    
+    def _evict(self, session):
+        """把一局游戏从内存移除（状态已提交到存储，调用方需持有self.lock）"""
+        session.evicted = True
+        if self.sessions.get(session.game_id) is session:
+            del self.sessions[session.game_id]
+            
+    @staticmethod
+    def _valid_id(game_id):
+        """游戏ID只能是32位十六进制字符串"""
+        return all(c in '0123456789abcdef' for c in game_id) and len(game_id) == 32
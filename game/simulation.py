@@ -0,0 +1,306 @@
+"""
+无界面整局模拟
+不经过Flask直接驱动GameController完成整局游戏，
+由策略为双方选择每回合的行动，可用进程池批量运行并汇总统计，
+用于平衡性测试和游戏引擎的吞吐量基准
+
+用法：python -m game.simulation --games 1000 --workers 8 --german random --entente idle
+      python -m game.simulation --games 10 --german ai --entente ai --regions 200 --tiles-per-region 50
+"""
+
+import argparse
+import contextlib
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .ai_player import AIPlayer
+from .controller import GameController
+from .log import configure_logging, suppressed
+from .map_generator import ProceduralMapGenerator
+from .monte_carlo import MonteCarloAI
+from .models import GameState
+
+
+class Policy:
+    """策略基类：每回合为一方选择并执行行动"""
+    
+    name = "idle"
+    
+    def act(self, controller, player, rng):
+        """执行一方本回合的行动
+        
+        Args:
+            controller (GameController): 游戏控制器
+            player (str): 行动的玩家阵营
+            rng (random.Random): 本局游戏的随机数生成器
+        """
+
+
+class IdlePolicy(Policy):
+    """不做任何行动，作为对照"""
+
+
+class RandomPolicy(Policy):
+    """随机策略：保护期随机建造村落和铁路，紧张期全面动员并择机宣战"""
+    
+    name = "random"
+    
+    def __init__(self, build_attempts=3, war_chance=0.2):
+        """初始化随机策略
+        
+        Args:
+            build_attempts (int): 每回合尝试建造的次数
+            war_chance (float): 紧张期每回合宣战的概率
+        """
+        self.build_attempts = build_attempts
+        self.war_chance = war_chance
+        
+    def act(self, controller, player, rng):
+        game_state = controller.game_state
+        regions = game_state.get_player_regions(player)
+        if not regions:
+            return
+            
+        if game_state.phase == GameState.PROTECTION_PHASE:
+            for _ in range(self.build_attempts):
+                region = rng.choice(regions)
+                if rng.random() < 0.5:
+                    self._build_town(controller, region, player, rng)
+                else:
+                    self._build_railway(controller, region, player, rng)
+        elif game_state.phase == GameState.TENSION_PHASE:
+            for region in regions:
+                controller.mobilize_troops(region.id, None, None, player, True)
+            if rng.random() < self.war_chance:
+                controller.declare_war(player)
+                
+    def _build_town(self, controller, region, player, rng):
+        """在区域内随机的空格子上建造村落"""
+        free_tiles = [hex_tile for hex_tile in region.hex_tiles if not hex_tile.town]
+        if free_tiles:
+            hex_tile = rng.choice(free_tiles)
+            name = f"{region.id}-{hex_tile.q}-{hex_tile.r}"
+            controller.build_town(region.id, (hex_tile.q, hex_tile.r, hex_tile.s), name, player)
+            
+    def _build_railway(self, controller, region, player, rng):
+        """从区域内随机的城镇或铁路端点向相邻格子延伸一段铁路"""
+        network = controller.game_state.railway_network
+        starts = [hex_tile for hex_tile in region.hex_tiles if hex_tile.town]
+        starts.extend(railway.end_hex for railway in region.railways)
+        if not starts:
+            return
+        start_hex = rng.choice(starts)
+        neighbors = []
+        for hex_tile in start_hex.neighbors():
+            if not network.railway_between(start_hex, hex_tile):
+                neighbors.append(hex_tile)
+        if neighbors:
+            end_hex = rng.choice(neighbors)
+            controller.build_railway(
+                region.id,
+                (start_hex.q, start_hex.r, start_hex.s),
+                (end_hex.q, end_hex.r, end_hex.s),
+                player
+            )
+
+
+class AIPolicy(Policy):
+    """内置电脑玩家（game.ai_player.AIPlayer）"""
+    
+    name = "ai"
+    
+    def __init__(self):
+        self.players = {}  # 阵营 -> AIPlayer
+        
+    def act(self, controller, player, rng):
+        ai_player = self.players.get(player)
+        if ai_player is None:
+            ai_player = self.players[player] = AIPlayer(player)
+        ai_player.take_turn(controller)
+
+
+class MonteCarloPolicy(AIPolicy):
+    """搜索型电脑玩家（game.monte_carlo.MonteCarloAI），推演的随机种子取自本局的随机数生成器"""
+    
+    name = "mc"
+    
+    def act(self, controller, player, rng):
+        ai_player = self.players.get(player)
+        if ai_player is None:
+            ai_player = self.players[player] = MonteCarloAI(player, rollouts=32, seed=rng.randrange(2 ** 31))
+        ai_player.take_turn(controller)
+
+
+# 策略名称 -> 策略类
+POLICIES = {
+    "idle": IdlePolicy,
+    "random": RandomPolicy,
+    "ai": AIPolicy,
+    "mc": MonteCarloPolicy
+}
+
+
+def play_game(policies, seed=0, quiet=True, map_options=None):
+    """模拟一整局游戏
+    
+    Args:
+        policies (dict): 玩家阵营 -> 策略名称，未指定策略的阵营不行动
+        seed (int): 随机种子
+        quiet (bool): 是否屏蔽游戏引擎的日志
+        map_options (dict): ProceduralMapGenerator的参数，默认使用演示地图
+        
+    Returns:
+        dict: 胜利者、结束回合、已到达兵力和每回合的GDP曲线
+    """
+    rng = random.Random(seed)
+    
+    with contextlib.ExitStack() as stack:
+        if quiet:
+            stack.enter_context(suppressed())
+            
+        controller = GameController(ProceduralMapGenerator(**map_options) if map_options else None)
+        game_state = controller.game_state
+        players = {player: POLICIES[policies.get(player, "idle")]() for player in game_state.players}
+        gdp_curves = {player: [] for player in game_state.players}
+        
+        while game_state.round <= game_state.max_rounds and not game_state.game_ended:
+            for player in game_state.players:
+                players[player].act(controller, player, rng)
+            controller.next_round(game_state.current_player)
+            # 无需持久化，丢弃操作日志
+            controller.take_journal()
+            for player in game_state.players:
+                gdp_curves[player].append(controller.player_resources[player]["gdp"])
+                
+    return {
+        "seed": seed,
+        "winner": game_state.winner,
+        "rounds": game_state.round - 1,
+        "arrived_forces": dict(game_state.arrived_forces),
+        "gdp_curves": gdp_curves
+    }
+
+
+def _play_game_args(args):
+    """进程池入口（参数打包为元组）"""
+    return play_game(*args)
+
+
+def summarize(results):
+    """汇总多局模拟的结果
+    
+    Returns:
+        dict: 胜率、已到达兵力分布（均值/最小/中位数/最大）和平均GDP曲线
+    """
+    games = len(results)
+    players = list(results[0]["arrived_forces"]) if results else []
+    
+    wins = {}
+    for result in results:
+        winner = result["winner"] or "无"
+        wins[winner] = wins.get(winner, 0) + 1
+        
+    arrived = {}
+    gdp_curves = {}
+    for player in players:
+        forces = sorted(result["arrived_forces"].get(player, 0) for result in results)
+        arrived[player] = {
+            "mean": sum(forces) / games,
+            "min": forces[0],
+            "median": forces[games // 2],
+            "max": forces[-1]
+        }
+        
+        # 各局回合数可能不同，按回合取已结束各局的平均值
+        totals = []
+        counts = []
+        for result in results:
+            for i, gdp in enumerate(result["gdp_curves"][player]):
+                if i == len(totals):
+                    totals.append(0)
+                    counts.append(0)
+                totals[i] += gdp
+                counts[i] += 1
+        gdp_curves[player] = [round(total / count, 2) for total, count in zip(totals, counts)]
+        
+    return {
+        "games": games,
+        "win_rates": {winner: count / games for winner, count in wins.items()},
+        "arrived_forces": arrived,
+        "mean_rounds": sum(result["rounds"] for result in results) / games if games else 0,
+        "gdp_curves": gdp_curves
+    }
+
+
+def run_batch(games, policies, workers=None, seed=0, quiet=True, map_options=None):
+    """批量模拟多局游戏并汇总
+    
+    Args:
+        games (int): 局数
+        policies (dict): 玩家阵营 -> 策略名称
+        workers (int): 进程数，1表示在当前进程内运行，None表示使用全部CPU
+        seed (int): 第一局的随机种子，之后每局加1
+        quiet (bool): 是否屏蔽游戏引擎的日志
+        map_options (dict): ProceduralMapGenerator的参数，默认使用演示地图
+        
+    Returns:
+        dict: summarize的汇总结果，另含耗时和吞吐量
+    """
+    tasks = [(policies, seed + i, quiet, map_options) for i in range(games)]
+    start = time.perf_counter()
+    if workers == 1:
+        results = [_play_game_args(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_play_game_args, tasks, chunksize=max(1, games // 64)))
+    elapsed = time.perf_counter() - start
+    
+    summary = summarize(results)
+    summary["seconds"] = round(elapsed, 3)
+    summary["games_per_second"] = round(games / elapsed, 2) if elapsed else None
+    summary["rounds_per_second"] = (
+        round(sum(result["rounds"] for result in results) / elapsed, 2) if elapsed else None
+    )
+    return summary
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="无界面批量模拟整局游戏")
+    parser.add_argument("--games", type=int, default=100, help="模拟局数")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认使用全部CPU")
+    parser.add_argument("--seed", type=int, default=0, help="第一局的随机种子")
+    parser.add_argument("--german", default="random", choices=sorted(POLICIES), help="德军策略")
+    parser.add_argument("--entente", default="random", choices=sorted(POLICIES), help="协约国策略")
+    parser.add_argument("--verbose", action="store_true", help="输出游戏引擎的日志（标准错误）")
+    parser.add_argument("--curves", action="store_true", help="输出每回合的平均GDP曲线")
+    parser.add_argument("--regions", type=int, default=None, help="使用生成的地图：区域数，默认使用演示地图")
+    parser.add_argument("--tiles-per-region", type=int, default=25, help="生成的地图：每个区域的格子数")
+    parser.add_argument("--factions", type=int, default=2, help="生成的地图：阵营数，第三个起的阵营不行动")
+    parser.add_argument("--conflict-regions", type=int, default=None, help="生成的地图：拥有冲突区域的阵营数")
+    parser.add_argument("--map-seed", type=int, default=0, help="生成的地图：随机种子")
+    args = parser.parse_args(argv)
+    if args.verbose:
+        configure_logging()
+    
+    map_options = None
+    if args.regions is not None:
+        map_options = {
+            "regions": args.regions,
+            "tiles_per_region": args.tiles_per_region,
+            "factions": args.factions,
+            "conflict_regions": args.conflict_regions,
+            "seed": args.map_seed
+        }
+    policies = {"德军": args.german, "协约国": args.entente}
+    summary = run_batch(args.games, policies, args.workers, args.seed, quiet=not args.verbose,
+                        map_options=map_options)
+    if not args.curves:
+        summary.pop("gdp_curves")
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
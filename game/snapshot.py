@@ -0,0 +1,430 @@
+"""
+游戏状态二进制快照
+把完整的游戏控制器编码为带格式版本号的紧凑字节串：
+回合、阵营、经济汇总等结构不定的少量数据放在JSON头部，
+格子、城镇、铁路、军队、路径和运量账本按整数数组打包，
+读取时直接在原始字节上建立数组视图，不做逐项解析
+"""
+
+import json
+import struct
+import sys
+from array import array
+
+from .controller import GameController
+from .models import GameState, HexGrid, HexTile, Region, Town, Railway, Army
+from .railway_network import edge_key
+from .troop_routing import TroopRouter
+
+SNAPSHOT_MAGIC = b"R1914GS\0"
+SNAPSHOT_VERSION = 2
+
+# 魔数、格式版本号、JSON头部长度
+_PREFIX = struct.Struct("<8sHI")
+
+# 定长表每行的列数
+_TILE_COLUMNS = 4  # q, r, s, 城镇
+_TOWN_COLUMNS = 7  # 名称, 等级, 阵营, 人口, 已动员, 建设中, 区域
+_RAILWAY_COLUMNS = 6  # 起点格子, 终点格子, 等级, 本回合运量, 建设中, 区域
+_ARMY_COLUMNS = 8  # 来源城镇, 来源城镇名, 兵力, 阵营, 状态, 位置, 目标区域, 生成回合
+
+
+class _SnapshotWriter:
+    """快照编码过程中的字符串表和数组段"""
+    
+    def __init__(self):
+        self.strings = []
+        self.string_ids = {}
+        self.sections = []  # [(段名, 数组)]
+        
+    def string(self, value):
+        """字符串在字符串表中的编号，None编为-1"""
+        if value is None:
+            return -1
+        index = self.string_ids.get(value)
+        if index is None:
+            index = self.string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+        
+    def add(self, name, values, typecode='i'):
+        """添加一个数组段"""
+        if not isinstance(values, array):
+            values = array(typecode, values)
+        self.sections.append((name, values))
+        
+    def add_lists(self, name, lists):
+        """添加变长列表：偏移量段加扁平数组段"""
+        offsets = array('i', [0])
+        flat = array('i')
+        for items in lists:
+            flat.extend(items)
+            offsets.append(len(flat))
+        self.add(name + "_offsets", offsets)
+        self.add(name, flat)
+        
+    def encode(self, header):
+        """拼接前缀、JSON头部和全部数组段"""
+        header["byteorder"] = sys.byteorder
+        header["strings"] = self.strings
+        header["sections"] = [
+            [name, values.typecode, len(values)] for name, values in self.sections
+        ]
+        header_bytes = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        parts = [_PREFIX.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header_bytes)), header_bytes]
+        parts.extend(values.tobytes() for _, values in self.sections)
+        return b"".join(parts)
+
+
+class _SnapshotReader:
+    """在快照字节串上建立数组视图"""
+    
+    def __init__(self, data):
+        if len(data) < _PREFIX.size:
+            raise ValueError("不是游戏状态快照")
+        magic, version, header_length = _PREFIX.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("不是游戏状态快照")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"不支持的快照格式版本: {version}")
+            
+        view = memoryview(data)
+        offset = _PREFIX.size
+        self.header = json.loads(bytes(view[offset:offset + header_length]))
+        self.strings = self.header["strings"]
+        swap = self.header["byteorder"] != sys.byteorder
+        offset += header_length
+        
+        self.sections = {}
+        for name, typecode, count in self.header["sections"]:
+            size = array(typecode).itemsize * count
+            chunk = view[offset:offset + size]
+            if swap:
+                # 字节序不同的机器上生成的快照需要复制并转换
+                values = array(typecode)
+                values.frombytes(chunk)
+                values.byteswap()
+            else:
+                values = chunk.cast(typecode)
+            self.sections[name] = values
+            offset += size
+        if offset != len(view):
+            raise ValueError("快照长度与头部描述不一致")
+            
+    def string(self, index):
+        """按编号取字符串，-1为None"""
+        return None if index < 0 else self.strings[index]
+        
+    def rows(self, name, columns):
+        """按行遍历定长表，每行为一个元组"""
+        values = iter(self.sections[name].tolist())
+        return zip(*[values] * columns)
+        
+    def lists(self, name, items):
+        """还原变长列表，列表中的编号换成items中的对象"""
+        offsets = self.sections[name + "_offsets"]
+        flat = self.sections[name]
+        return [
+            [items[i] for i in flat[offsets[k]:offsets[k + 1]]]
+            for k in range(len(offsets) - 1)
+        ]
+        
+    def array(self, name):
+        """把数组段复制为可修改的数组"""
+        values = self.sections[name]
+        if isinstance(values, array):
+            return values
+        copy = array(values.format)
+        copy.frombytes(values.cast("B"))
+        return copy
+
+
+def dump_snapshot(controller):
+    """把游戏控制器编码为二进制快照
+    
+    Args:
+        controller (GameController): 游戏控制器
+        
+    Returns:
+        bytes: 快照数据
+    """
+    game_state = controller.game_state
+    network = game_state.railway_network
+    ledger = network.ledger
+    writer = _SnapshotWriter()
+    string = writer.string
+    
+    regions = list(game_state.regions.values())
+    region_ids = {region: i for i, region in enumerate(regions)}
+    tiles = list(game_state.hex_index.values())
+    tile_ids = {hex_tile: i for i, hex_tile in enumerate(tiles)}
+    railway_ids = {railway: i for i, railway in enumerate(network.railways)}
+    
+    # 城镇：区域内的城镇，以及连通性和军队仍引用的已被合并的旧城镇
+    towns = [town for region in regions for town in region.towns]
+    for region in regions:
+        towns.extend(region.connectivity.parent)
+    for army in game_state.armies:
+        towns.append(army.source_town)
+    town_ids = {}
+    for town in towns:
+        town_ids.setdefault(town, len(town_ids))
+    towns = list(town_ids)
+    
+    # 格子（地形和格子ID是每个格子各自的字符串，放在头部）
+    rows = array('i')
+    for hex_tile in tiles:
+        rows.extend((hex_tile.q, hex_tile.r, hex_tile.s, town_ids.get(hex_tile.town, -1)))
+    writer.add("tiles", rows)
+    
+    # 区域
+    writer.add_lists("region_tiles", ([tile_ids[t] for t in r.hex_tiles] for r in regions))
+    writer.add_lists("region_towns", ([town_ids[t] for t in r.towns] for r in regions))
+    writer.add_lists("region_railways", ([railway_ids[w] for w in r.railways] for r in regions))
+    
+    # 城镇连通性：并查集的每个节点及其父节点、集合大小（非根节点为0）
+    writer.add_lists("connectivity", (
+        [
+            value
+            for town, parent in region.connectivity.parent.items()
+            for value in (town_ids[town], town_ids[parent], region.connectivity.size.get(town, 0))
+        ]
+        for region in regions
+    ))
+    
+    # 城镇
+    rows = array('i')
+    for town in towns:
+        rows.extend((
+            string(town.name), string(town.level), string(town.owner),
+            town.population, town.mobilized, int(town.is_under_construction),
+            region_ids.get(town.region, -1)
+        ))
+    writer.add("towns", rows)
+    writer.add_lists("town_tiles", ([tile_ids[t] for t in town.hex_tiles] for town in towns))
+    
+    # 铁路（按运量账本序号排列）
+    rows = array('i')
+    for railway in network.railways:
+        rows.extend((
+            tile_ids[railway.start_hex], tile_ids[railway.end_hex], string(railway.level),
+            railway.troops, int(railway.is_under_construction),
+            region_ids.get(railway.region, -1)
+        ))
+    writer.add("railways", rows)
+    
+    # 铁路网络邻接结构，保留插入顺序以保证寻路结果一致
+    adjacency = list(network.adjacency.items())
+    writer.add("adjacency_tiles", (tile_ids[hex_tile] for hex_tile, _ in adjacency))
+    writer.add_lists("adjacency", (
+        [
+            value
+            for neighbor, railway in neighbors.items()
+            for value in (tile_ids[neighbor], railway_ids[railway])
+        ]
+        for _, neighbors in adjacency
+    ))
+    
+    # 运量账本
+    writer.add("ledger_load", ledger.load)
+    writer.add("ledger_total", ledger.total)
+    writer.add("ledger_peak", ledger.peak)
+    writer.add("ledger_saturated", ledger.saturated)
+    writer.add("ledger_touched", ledger._touched)
+    
+    # 军队
+    rows = array('i')
+    for army in game_state.armies:
+        rows.extend((
+            town_ids[army.source_town], string(army.source_town_name), army.amount,
+            string(army.owner), string(army.status),
+            tile_ids.get(army.current_position, -1), string(army.target_region_id),
+            army.generation_time
+        ))
+    writer.add("armies", rows)
+    writer.add_lists("army_paths_to_conflict", (
+        [tile_ids[t] for t in army.path_to_conflict] for army in game_state.armies
+    ))
+    
+    conflict_region = getattr(game_state, 'conflict_region', None)
+    header = {
+        "controller": {
+            "map_name": controller.map_name,
+            "map_options": controller.map_options,
+            "player_resources": controller.player_resources
+        },
+        "state": {
+            "round": game_state.round,
+            "max_rounds": game_state.max_rounds,
+            "phase": game_state.phase,
+            "players": game_state.players,
+            "current_player": game_state.current_player,
+            "war_declared": game_state.war_declared,
+            "war_countdown": game_state.war_countdown,
+            "game_ended": game_state.game_ended,
+            "winner": game_state.winner,
+            "final_forces": game_state.final_forces,
+            "factions": game_state.factions,
+            "conflict_regions": game_state.conflict_regions,
+            "nation_prefixes": game_state.nation_prefixes,
+            "conflict_region": conflict_region.id if conflict_region else None,
+            "arrived_forces": game_state.arrived_forces,
+            "economy": game_state.economy,
+            "state_id": game_state.state_id,
+            "version": game_state.version,
+            "changes": [[list(key), version] for key, version in game_state.changes.items()]
+        },
+        "tile_terrains": [hex_tile.terrain for hex_tile in tiles],
+        "regions": [[region.id, region.name, region.economy] for region in regions],
+        "network_version": network.version,
+        "ledger_rounds": ledger.rounds
+    }
+    return writer.encode(header)
+
+
+def load_snapshot(data):
+    """从二进制快照还原游戏控制器
+    
+    Args:
+        data (bytes): dump_snapshot生成的快照数据
+        
+    Returns:
+        GameController: 还原的游戏控制器
+        
+    Raises:
+        ValueError: 数据不是快照或格式版本不受支持
+    """
+    reader = _SnapshotReader(data)
+    header = reader.header
+    sections = reader.sections
+    string = reader.string
+    state = header["state"]
+    
+    game_state = GameState()
+    for key in ("round", "max_rounds", "phase", "players", "current_player", "war_declared",
+                "war_countdown", "game_ended", "winner", "final_forces", "factions",
+                "conflict_regions", "arrived_forces", "economy", "state_id", "version"):
+        setattr(game_state, key, state[key])
+    # 旧快照没有国家前缀，只可能是演示地图，沿用默认值
+    game_state.nation_prefixes = state.get("nation_prefixes", game_state.nation_prefixes)
+    game_state.changes = {tuple(key): version for key, version in state["changes"]}
+    
+    # 格子
+    tiles = []
+    tile_towns = []
+    for (q, r, s, town_id), terrain in zip(reader.rows("tiles", _TILE_COLUMNS), header["tile_terrains"]):
+        hex_tile = HexTile(q, r, s)
+        hex_tile.terrain = terrain
+        tiles.append(hex_tile)
+        tile_towns.append(town_id)
+    game_state.hex_index = {(t.q, t.r, t.s): t for t in tiles}
+    game_state.hex_grid = HexGrid(tiles)
+    
+    # 区域
+    regions = []
+    for (region_id, name, economy), hex_tiles in zip(header["regions"],
+                                                     reader.lists("region_tiles", tiles)):
+        region = Region(region_id, name, hex_tiles)
+        region.game_state = game_state
+        region.economy = economy
+        game_state.regions[region_id] = region
+        for hex_tile in hex_tiles:
+            hex_tile.region_id = region_id
+            game_state.hex_regions[hex_tile] = region
+        regions.append(region)
+    game_state.region_borders = GameController.get_region_borders(
+        header["controller"]["map_name"], game_state.hex_grid
+    )
+    if state["conflict_region"] is not None:
+        game_state.conflict_region = game_state.regions[state["conflict_region"]]
+        
+    # 城镇
+    towns = []
+    for name, level, owner, population, mobilized, building, region_id in reader.rows(
+            "towns", _TOWN_COLUMNS):
+        town = Town(string(name), string(level), string(owner))
+        town.population = population
+        town.mobilized = mobilized
+        town.is_under_construction = bool(building)
+        if region_id >= 0:
+            town.region = regions[region_id]
+        towns.append(town)
+    for town, hex_tiles in zip(towns, reader.lists("town_tiles", tiles)):
+        town.hex_tiles = hex_tiles
+    for hex_tile, town_id in zip(tiles, tile_towns):
+        if town_id >= 0:
+            hex_tile.town = towns[town_id]
+            
+    # 铁路
+    network = game_state.railway_network
+    ledger = network.ledger
+    railways = network.railways
+    for index, (start, end, level, troops, building, region_id) in enumerate(
+            reader.rows("railways", _RAILWAY_COLUMNS)):
+        railway = Railway(tiles[start], tiles[end], string(level))
+        railway.troops = troops
+        railway.is_under_construction = bool(building)
+        if region_id >= 0:
+            railway.region = regions[region_id]
+        railway.network = network
+        railway.index = index
+        railways.append(railway)
+        network.edges[edge_key(railway.start_hex, railway.end_hex)] = railway
+    network.version = header["network_version"]
+    offsets = sections["adjacency_offsets"]
+    pairs = sections["adjacency"]
+    for k, tile_id in enumerate(sections["adjacency_tiles"]):
+        # 邻接列表按(相邻格子, 铁路)成对保存
+        network.adjacency[tiles[tile_id]] = {
+            tiles[pairs[i]]: railways[pairs[i + 1]]
+            for i in range(offsets[k], offsets[k + 1], 2)
+        }
+        
+    # 运量账本
+    ledger.railways = list(railways)
+    ledger.load = reader.array("ledger_load")
+    ledger.total = reader.array("ledger_total")
+    ledger.peak = reader.array("ledger_peak")
+    ledger.saturated = reader.array("ledger_saturated")
+    ledger._touched = list(sections["ledger_touched"])
+    ledger.rounds = header["ledger_rounds"]
+    
+    # 区域内的城镇、铁路和城镇连通性
+    region_towns = reader.lists("region_towns", towns)
+    region_railways = reader.lists("region_railways", railways)
+    offsets = sections["connectivity_offsets"]
+    nodes = sections["connectivity"]
+    for k, region in enumerate(regions):
+        region.towns = region_towns[k]
+        region.railways = region_railways[k]
+        connectivity = region.connectivity
+        for i in range(offsets[k], offsets[k + 1], 3):
+            town = towns[nodes[i]]
+            connectivity.parent[town] = towns[nodes[i + 1]]
+            if nodes[i + 2]:
+                connectivity.size[town] = nodes[i + 2]
+                
+    # 军队
+    paths_to_conflict = reader.lists("army_paths_to_conflict", tiles)
+    for k, row in enumerate(reader.rows("armies", _ARMY_COLUMNS)):
+        town_id, town_name, amount, owner, status, position, target_region_id, generation_time = row
+        army = Army(towns[town_id], amount, string(owner))
+        army.source_town_name = string(town_name)
+        army.status = string(status)
+        if position >= 0:
+            army.current_position = tiles[position]
+        army.target_region_id = string(target_region_id)
+        army.generation_time = generation_time
+        army.path_to_conflict = paths_to_conflict[k]
+        game_state.armies.append(army)
+        
+    controller = GameController.__new__(GameController)
+    controller.game_state = game_state
+    controller.map_name = header["controller"]["map_name"]
+    controller.map_options = header["controller"].get("map_options")
+    controller.player_resources = header["controller"]["player_resources"]
+    controller.journal = []
+    controller._journal_depth = 0
+    controller.needs_snapshot = False
+    controller.troop_router = TroopRouter(game_state)
+    return controller
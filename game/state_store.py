@@ -0,0 +1,240 @@
+"""
+游戏状态存储
+多个工作进程通过同一个状态存储读取和提交游戏状态，
+提交时检查版本号（乐观并发控制），避免进程之间互相覆盖。
+每局游戏保存最近一次完整快照和之后的操作日志，恢复时读取快照再重放日志
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+
+from .snapshot import dump_snapshot, load_snapshot
+
+
+class StaleStateError(Exception):
+    """提交时游戏状态已被其他请求修改"""
+
+
+class StateStore(ABC):
+    """游戏状态存储接口
+    
+    每局游戏有一个版本号，从1开始，每保存一次快照或追加一条命令加1
+    """
+    
+    @abstractmethod
+    def version(self, game_id):
+        """获取游戏的当前版本号，不存在则返回None"""
+        
+    @abstractmethod
+    def load(self, game_id):
+        """读取最近的快照并重放之后的操作日志
+        
+        Returns:
+            tuple: (版本号, 快照版本号, GameController)，不存在则返回None
+        """
+        
+    @abstractmethod
+    def actions_since(self, game_id, version):
+        """获取某个版本之后追加的命令
+        
+        Returns:
+            list: [命令名, 位置参数, 关键字参数]，该版本早于最近的快照时返回None
+        """
+        
+    @abstractmethod
+    def append(self, game_id, actions, expected_version):
+        """把命令追加到操作日志
+        
+        Args:
+            game_id (str): 游戏ID
+            actions (list): [命令名, 位置参数, 关键字参数]
+            expected_version (int): 读取时的版本号
+            
+        Returns:
+            int: 追加后的版本号
+            
+        Raises:
+            StaleStateError: 存储中的版本号与expected_version不一致
+        """
+        
+    @abstractmethod
+    def commit(self, game_id, controller, expected_version):
+        """保存完整快照，快照之前的操作日志随之丢弃
+        
+        Args:
+            game_id (str): 游戏ID
+            controller (GameController): 游戏控制器
+            expected_version (int): 读取时的版本号，新游戏为0
+            
+        Returns:
+            int: 提交后的版本号
+            
+        Raises:
+            StaleStateError: 存储中的版本号与expected_version不一致
+        """
+        
+    @abstractmethod
+    def delete(self, game_id):
+        """删除一局游戏"""
+        
+    @staticmethod
+    def encode(controller):
+        """把游戏控制器编码为二进制快照"""
+        return dump_snapshot(controller)
+        
+    @staticmethod
+    def decode(data):
+        """从二进制快照还原游戏控制器"""
+        return load_snapshot(data)
+
+
+class SQLiteStateStore(StateStore):
+    """基于SQLite（WAL模式）的本地状态存储
+    
+    同一台机器上的多个工作进程共享一个数据库文件，
+    WAL模式下读取不会被写入阻塞。games表保存版本号和最近的快照，
+    journal表按版本号保存快照之后的命令
+    """
+    
+    def __init__(self, path):
+        """初始化状态存储
+        
+        Args:
+            path (str): 数据库文件路径
+        """
+        self.path = path
+        self._local = threading.local()  # 每个线程使用自己的连接
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS games ("
+            "id TEXT PRIMARY KEY, version INTEGER NOT NULL, "
+            "snapshot_version INTEGER NOT NULL, data BLOB NOT NULL)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS journal ("
+            "game_id TEXT NOT NULL, version INTEGER NOT NULL, action TEXT NOT NULL, "
+            "PRIMARY KEY (game_id, version))"
+        )
+        
+    def _connection(self):
+        """获取当前线程的数据库连接"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+        
+    def version(self, game_id):
+        row = self._connection().execute(
+            "SELECT version FROM games WHERE id = ?", (game_id,)
+        ).fetchone()
+        return row[0] if row else None
+        
+    def load(self, game_id):
+        connection = self._connection()
+        # 快照和日志在同一个读事务中读取，避免读到其他进程写了一半的结果
+        connection.execute("BEGIN")
+        try:
+            row = connection.execute(
+                "SELECT snapshot_version, data FROM games WHERE id = ?", (game_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            snapshot_version, data = row
+            actions = self._read_journal(connection, game_id, snapshot_version)
+        finally:
+            connection.execute("COMMIT")
+            
+        controller = self.decode(data)
+        controller.replay([action for _, action in actions])
+        version = actions[-1][0] if actions else snapshot_version
+        return version, snapshot_version, controller
+        
+    def actions_since(self, game_id, version):
+        connection = self._connection()
+        connection.execute("BEGIN")
+        try:
+            row = connection.execute(
+                "SELECT snapshot_version FROM games WHERE id = ?", (game_id,)
+            ).fetchone()
+            if row is None or version < row[0]:
+                return None
+            actions = self._read_journal(connection, game_id, version)
+        finally:
+            connection.execute("COMMIT")
+        return [action for _, action in actions]
+        
+    def append(self, game_id, actions, expected_version):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = connection.execute(
+                "UPDATE games SET version = version + ? WHERE id = ? AND version = ?",
+                (len(actions), game_id, expected_version)
+            )
+            if cursor.rowcount != 1:
+                raise StaleStateError(game_id)
+            connection.executemany(
+                "INSERT INTO journal (game_id, version, action) VALUES (?, ?, ?)",
+                [(game_id, expected_version + i + 1, json.dumps(action, ensure_ascii=False))
+                 for i, action in enumerate(actions)]
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return expected_version + len(actions)
+        
+    def commit(self, game_id, controller, expected_version):
+        data = self.encode(controller)
+        version = expected_version + 1
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if expected_version == 0:
+                try:
+                    connection.execute(
+                        "INSERT INTO games (id, version, snapshot_version, data) VALUES (?, 1, 1, ?)",
+                        (game_id, data)
+                    )
+                except sqlite3.IntegrityError:
+                    raise StaleStateError(game_id)
+            else:
+                cursor = connection.execute(
+                    "UPDATE games SET version = ?, snapshot_version = ?, data = ? "
+                    "WHERE id = ? AND version = ?",
+                    (version, version, data, game_id, expected_version)
+                )
+                if cursor.rowcount != 1:
+                    raise StaleStateError(game_id)
+                # 快照已包含之前的全部命令
+                connection.execute("DELETE FROM journal WHERE game_id = ?", (game_id,))
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return version
+        
+    def delete(self, game_id):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute("DELETE FROM journal WHERE game_id = ?", (game_id,))
+        connection.execute("DELETE FROM games WHERE id = ?", (game_id,))
+        connection.execute("COMMIT")
+        
+    @staticmethod
+    def _read_journal(connection, game_id, version):
+        """按顺序读取某个版本之后的命令，返回[(版本号, 命令)]"""
+        rows = connection.execute(
+            "SELECT version, action FROM journal WHERE game_id = ? AND version > ? ORDER BY version",
+            (game_id, version)
+        ).fetchall()
+        return [(row[0], json.loads(row[1])) for row in rows]
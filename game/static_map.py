@@ -0,0 +1,60 @@
+"""
+静态地图数据
+地图拓扑（区域、格子、阵营、相邻区域）在启动时生成一次，
+预先编码为字节并计算内容哈希，供接口直接返回并由客户端强缓存
+"""
+
+import gzip
+import hashlib
+import json
+
+
+class StaticMap:
+    """预编码的静态地图数据"""
+    
+    def __init__(self, payload):
+        """初始化静态地图数据
+        
+        Args:
+            payload (dict): 地图数据，包含regions列表
+        """
+        self.payload = payload
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]  # 内容哈希，同时作为地图版本号
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+
+
+def build_static_map(game_state):
+    """根据游戏状态中的地图拓扑生成静态地图数据
+    
+    Args:
+        game_state (GameState): 刚初始化的游戏状态
+        
+    Returns:
+        StaticMap: 预编码的静态地图数据
+    """
+    # 区域所属阵营
+    region_factions = {}
+    for player in game_state.players:
+        for region in game_state.get_player_regions(player):
+            region_factions[region.id] = player
+            
+    regions = []
+    for region in game_state.regions.values():
+        regions.append({
+            "id": region.id,
+            "name": region.name,
+            "faction": region_factions.get(region.id),
+            "hex_tiles": [
+                {"q": hex_tile.q, "r": hex_tile.r, "s": hex_tile.s}
+                for hex_tile in region.hex_tiles
+            ],
+            # 相邻区域：任一格子与其他区域的格子相邻（地图建立时已计算）
+            "neighbors": sorted(game_state.region_borders.neighbors(region.id))
+        })
+        
+    return StaticMap({
+        "regions": regions,
+        "factions": game_state.factions,
+        "conflict_regions": game_state.conflict_regions
+    })
@@ -0,0 +1,281 @@
+"""
+军队批量调度
+每回合对所有运输中的军队做一次最小费用最大流求解，统一分配铁路运力
+"""
+
+from collections import deque
+
+from .models import Army
+
+
+class _FlowGraph:
+    """最小费用流残量图（弧i与i^1互为反向弧）"""
+    
+    def __init__(self, node_count):
+        """初始化残量图
+        
+        Args:
+            node_count (int): 节点数量
+        """
+        self.arcs = [[] for _ in range(node_count)]  # 节点 -> 出弧编号列表
+        self.to = []
+        self.cap = []
+        self.cost = []
+        
+    def add_arc(self, u, v, cap, cost):
+        """添加一条弧及其反向弧，返回正向弧编号"""
+        self.arcs[u].append(len(self.to))
+        self.to.append(v)
+        self.cap.append(cap)
+        self.cost.append(cost)
+        self.arcs[v].append(len(self.to))
+        self.to.append(u)
+        self.cap.append(0)
+        self.cost.append(-cost)
+        return len(self.to) - 2
+        
+    def _shortest_path(self, source, sink):
+        """在残量图上用SPFA求最短增广路，返回每个节点的入弧"""
+        node_count = len(self.arcs)
+        dist = [None] * node_count
+        prev_arc = [-1] * node_count
+        in_queue = [False] * node_count
+        dist[source] = 0
+        queue = [source]
+        head = 0
+        while head < len(queue):
+            u = queue[head]
+            head += 1
+            in_queue[u] = False
+            for arc in self.arcs[u]:
+                if self.cap[arc] <= 0:
+                    continue
+                v = self.to[arc]
+                new_dist = dist[u] + self.cost[arc]
+                if dist[v] is None or new_dist < dist[v]:
+                    dist[v] = new_dist
+                    prev_arc[v] = arc
+                    if not in_queue[v]:
+                        in_queue[v] = True
+                        queue.append(v)
+        if dist[sink] is None:
+            return None
+        return prev_arc
+        
+    def min_cost_max_flow(self, source, sink):
+        """逐次最短增广路求最小费用最大流，返回总流量"""
+        total = 0
+        while True:
+            prev_arc = self._shortest_path(source, sink)
+            if prev_arc is None:
+                return total
+                
+            # 计算增广路的瓶颈
+            bottleneck = None
+            v = sink
+            while v != source:
+                arc = prev_arc[v]
+                if bottleneck is None or self.cap[arc] < bottleneck:
+                    bottleneck = self.cap[arc]
+                v = self.to[arc ^ 1]
+                
+            # 沿增广路推送流量
+            v = sink
+            while v != source:
+                arc = prev_arc[v]
+                self.cap[arc] -= bottleneck
+                self.cap[arc ^ 1] += bottleneck
+                v = self.to[arc ^ 1]
+            total += bottleneck
+
+
+class TroopRouter:
+    """军队批量调度器
+    
+    把同一目标区域的全部运输中军队作为一种商品，在铁路网络上
+    求解最小费用最大流（费用为铁路段数，容量为铁路剩余运力），
+    再把流分解成路径分配给各支军队。不同目标区域依次求解，共享剩余运力。
+    
+    军队每回合最多前进Army.MOVES_PER_ROUND段铁路，分配路径后只占用本回合能走到的
+    前几段铁路的运力，更远的铁路留给之后求解的军队。已知局限：同一次求解内的流量
+    仍按整条路径受运力约束，远处的瓶颈可能使本回合本可前进的军队得不到路线，
+    这些军队随后按原有方式利用剩余运力前进。
+    """
+    
+    def __init__(self, game_state):
+        """初始化调度器
+        
+        Args:
+            game_state (GameState): 游戏状态
+        """
+        self.game_state = game_state
+        
+    def plan(self, armies):
+        """为一批军队分配本回合的行军路线
+        
+        Args:
+            armies (list): 运输中的军队
+            
+        Returns:
+            dict: 军队 -> 路径上的格子列表（含当前位置）。
+                  未能分配运力的军队不在结果中
+        """
+        reserved = {}  # 铁路 -> 已分配的兵力
+        plans = {}
+        
+        # 按目标区域分组，每个目标区域求解一次
+        groups = {}
+        for army in armies:
+            if army.current_position and army.target_region_id:
+                groups.setdefault(army.target_region_id, []).append(army)
+                
+        for target_id, group in groups.items():
+            target_region = self.game_state.regions.get(target_id)
+            if not target_region:
+                continue
+            plans.update(self._plan_target(target_region, group, reserved))
+            
+        return plans
+        
+    def _remaining_capacity(self, railway, reserved):
+        """铁路本回合剩余运力（扣除已分配的兵力）"""
+        ledger = self.game_state.railway_network.ledger
+        return ledger.remaining(railway) - reserved.get(railway, 0)
+        
+    def _plan_target(self, target_region, armies, reserved):
+        """为同一目标区域的军队求解并分配路径"""
+        network = self.game_state.railway_network
+        field = network.route_field(target_region.id, target_region.hex_tiles)
+        
+        # 只保留能到达目标区域的军队，按所在格子汇总兵力
+        supply = {}
+        for army in armies:
+            if field.reaches(army.current_position):
+                supply.setdefault(army.current_position, []).append(army)
+        if not supply:
+            return {}
+            
+        # 节点：能到达目标区域的格子 + 超级源点 + 超级汇点
+        tiles = list(field.distance)
+        node_of = {hex_tile: i for i, hex_tile in enumerate(tiles)}
+        source = len(tiles)
+        sink = source + 1
+        graph = _FlowGraph(len(tiles) + 2)
+        
+        # 铁路弧：每个方向费用为1，容量为剩余运力
+        arc_edges = {}  # 正向弧编号 -> (起点格子, 终点格子)
+        for hex_tile in tiles:
+            for neighbor, railway in network.neighbors(hex_tile).items():
+                if neighbor not in node_of:
+                    continue
+                capacity = self._remaining_capacity(railway, reserved)
+                if capacity > 0:
+                    arc = graph.add_arc(node_of[hex_tile], node_of[neighbor], capacity, 1)
+                    arc_edges[arc] = (hex_tile, neighbor)
+                    
+        # 源点弧：每个格子上等待出发的兵力
+        supply_arcs = {}
+        for hex_tile, group in supply.items():
+            amount = sum(army.amount for army in group)
+            supply_arcs[hex_tile] = graph.add_arc(source, node_of[hex_tile], amount, 0)
+            
+        # 汇点弧：目标区域内的全部格子
+        for hex_tile in target_region.hex_tiles:
+            if hex_tile in node_of:
+                graph.add_arc(node_of[hex_tile], sink, sum(a.amount for a in armies), 0)
+                
+        if graph.min_cost_max_flow(source, sink) == 0:
+            return {}
+            
+        # 记录每条铁路弧上的流量
+        flow = {}
+        for arc, edge in arc_edges.items():
+            sent = graph.cap[arc ^ 1]
+            if sent > 0:
+                flow[edge] = sent
+                
+        # 按出发格子分解流量并分配给军队（军队不可拆分）
+        plans = {}
+        for hex_tile, group in supply.items():
+            routed = graph.cap[supply_arcs[hex_tile] ^ 1]
+            paths = self._decompose(hex_tile, routed, flow, network, target_region)
+            for army in sorted(group, key=lambda a: a.amount, reverse=True):
+                for route in paths:
+                    if route[1] >= army.amount:
+                        route[1] -= army.amount
+                        plans[army] = route[0]
+                        self._reserve(route[0], army.amount, reserved, network)
+                        break
+                        
+        # 流量被拆散到多条路径时，为未分配的军队在剩余运力上单独找一条整路
+        target_tiles = set(target_region.hex_tiles)
+        for group in supply.values():
+            for army in group:
+                if army in plans:
+                    continue
+                path = self._route_single(army, target_tiles, reserved, network)
+                if path:
+                    plans[army] = path
+                    self._reserve(path, army.amount, reserved, network)
+        return plans
+        
+    def _route_single(self, army, target_tiles, reserved, network):
+        """只走剩余运力足够整支军队通过的铁路，广度优先寻找到目标区域的路径"""
+        start_hex = army.current_position
+        previous = {start_hex: None}
+        queue = deque([start_hex])
+        while queue:
+            current = queue.popleft()
+            if current in target_tiles:
+                path = []
+                while current is not None:
+                    path.append(current)
+                    current = previous[current]
+                path.reverse()
+                return path
+            for neighbor, railway in network.neighbors(current).items():
+                if neighbor in previous:
+                    continue
+                if self._remaining_capacity(railway, reserved) >= army.amount:
+                    previous[neighbor] = current
+                    queue.append(neighbor)
+        return None
+        
+    def _decompose(self, start_hex, amount, flow, network, target_region):
+        """把从起点出发的流量分解为若干条路径
+        
+        Returns:
+            list: [路径格子列表, 路径流量]，按路径长度升序
+        """
+        target_tiles = set(target_region.hex_tiles)
+        paths = []
+        while amount > 0:
+            path = [start_hex]
+            bottleneck = amount
+            current = start_hex
+            while current not in target_tiles:
+                next_hex = None
+                for neighbor in network.neighbors(current):
+                    if flow.get((current, neighbor), 0) > 0:
+                        next_hex = neighbor
+                        break
+                if next_hex is None:
+                    break
+                bottleneck = min(bottleneck, flow[(current, next_hex)])
+                path.append(next_hex)
+                current = next_hex
+            if current not in target_tiles:
+                break
+            for a, b in zip(path, path[1:]):
+                flow[(a, b)] -= bottleneck
+            paths.append([path, bottleneck])
+            amount -= bottleneck
+        paths.sort(key=lambda route: len(route[0]))
+        return paths
+        
+    def _reserve(self, path, amount, reserved, network):
+        """记录路径上本回合能走到的各段铁路已分配的兵力"""
+        reachable = path[:Army.MOVES_PER_ROUND + 1]
+        for a, b in zip(reachable, reachable[1:]):
+            railway = network.railway_between(a, b)
+            reserved[railway] = reserved.get(railway, 0) + amount
@@ -1700,7 +1700,7 @@ function mobilizeRegion(regionId) {
     .then(response => response.json())
     .then(data => {
         if (data.success) {
-            gameState = data.game_state;
+            gameState = withStaticMap(data.game_state);
             console.log('区域动员成功:', gameState);
             
             // 更新UI
@@ -1856,7 +1856,7 @@ function declareWar() {
             console.log('宣战成功:', data);
             
             // 更新游戏状态
-            window.gameState = data.game_state;
+            window.gameState = withStaticMap(data.game_state);
             gameState = data.game_state;
             
             // 更新UI
@@ -1883,12 +1883,84 @@ function declareWar() {
     });
 }
 
+/**
+ * 为游戏状态补充静态地图中的格子信息
+ * 状态接口不再返回格子，格子只随静态地图加载一次
+ * @param {Object} state 游戏状态
+ * @returns {Object} 补充了格子信息的游戏状态
+ */
+function withStaticMap(state) {
+    const mapData = window.staticMapData;
+    if (!state || !state.regions || !mapData) {
+        return state;
+    }
+    
+    const mapRegions = {};
+    mapData.regions.forEach(region => {
+        mapRegions[region.id] = region;
+    });
+    state.regions.forEach(region => {
+        const mapRegion = mapRegions[region.id];
+        if (mapRegion && !region.hex_tiles) {
+            // 复制格子对象，界面会在格子上记录城镇等临时信息
+            region.hex_tiles = mapRegion.hex_tiles.map(tile => ({ ...tile }));
+            region.faction = mapRegion.faction;
+            region.neighbors = mapRegion.neighbors;
+        }
+    });
+    return state;
+}
+
+/**
+ * 将增量状态合并到已缓存的游戏状态
+ * @param {Object} base 已缓存的完整游戏状态
+ * @param {Object} delta 服务器返回的增量状态
+ * @returns {Object} 合并后的完整游戏状态
+ */
+function mergeGameStateDelta(base, delta) {
+    // 完整状态直接使用
+    if (!base || delta.full) {
+        return delta;
+    }
+    
+    const merged = { ...base };
+    Object.keys(delta).forEach(key => {
+        if (key !== 'regions' && key !== 'full') {
+            merged[key] = delta[key];
+        }
+    });
+    
+    // 只替换发生变化的区域的城镇和铁路，保留本地的格子信息
+    const changedRegions = {};
+    (delta.regions || []).forEach(region => {
+        changedRegions[region.id] = region;
+    });
+    merged.regions = (base.regions || []).map(region => {
+        const changed = changedRegions[region.id];
+        if (!changed) {
+            return region;
+        }
+        return { ...region, towns: changed.towns, railways: changed.railways };
+    });
+    
+    return merged;
+}
+
 /**
  * 获取游戏状态
  * @returns {Promise} Promise对象
  */
 function fetchGameState() {
-    return fetch('/api/game-state')
+    // 已有带版本号的缓存状态时只请求增量
+    const cached = window.gameState;
+    const useDelta = cached && cached.version !== undefined && cached.state_id;
+    const url = useDelta
+        ? `/api/game-state/delta?since=${cached.version}&state_id=${encodeURIComponent(cached.state_id)}`
+        : '/api/game-state';
+    
+    // 先确保静态地图已加载，再获取动态状态
+    return loadStaticMap()
+        .then(() => fetch(url))
         .then(response => {
             if (!response.ok) {
                 throw new Error(`获取游戏状态失败: ${response.status} ${response.statusText}`);
@@ -1896,6 +1968,11 @@ function fetchGameState() {
             return response.json();
         })
         .then(data => {
+            if (data && useDelta) {
+                data = mergeGameStateDelta(cached, data);
+            }
+            data = withStaticMap(data);
+            
             if (!data) {
                 // 如果返回空数据，尝试使用当前状态
                 if (window.gameState) {
@@ -2050,7 +2127,7 @@ function nextRound() {
             }
             
             console.log('进入下一回合成功:', data.game_state);
-            window.gameState = data.game_state;
+            window.gameState = withStaticMap(data.game_state);
             gameState = data.game_state;
             
             // 备份当前的合并城镇数据
@@ -2324,7 +2401,7 @@ function buildTown(regionId, coords, townName, isAI = false, playerFaction = nul
             const currentRegionId = window.selectedRegion ? window.selectedRegion.id : null;
             
             // 更新游戏状态
-            window.gameState = data.game_state;
+            window.gameState = withStaticMap(data.game_state);
             gameState = data.game_state;
             
             // 恢复备份的合并城镇数据
@@ -2515,7 +2592,7 @@ function buildRailway(regionId, startCoords, endCoords, playerFaction = null) {
             const currentRegionId = window.selectedRegion ? window.selectedRegion.id : null;
             
             // 更新游戏状态
-            window.gameState = data.game_state;
+            window.gameState = withStaticMap(data.game_state);
             gameState = data.game_state;
             
             // 恢复合并城镇数据
@@ -2641,7 +2718,7 @@ function mobilizeTroops(regionId, townName, amount) {
     .then(response => response.json())
     .then(data => {
         if (data.success) {
-            gameState = data.game_state;
+            gameState = withStaticMap(data.game_state);
             console.log('Troops mobilized:', gameState);
             
             // 更新UI
@@ -3979,7 +4056,7 @@ function upgradeTowns(regionId, coords, townType) {
             addLogEntry(`${player}在${regionId}区域将${window.selectedTowns[0].name}和${window.selectedTowns[1].name}合并升级为${upgradeType}`);
             
             // 更新游戏状态
-            gameState = data.game_state;
+            gameState = withStaticMap(data.game_state);
             window.gameState = data.game_state;
             
             // 记录新合并的城镇信息
@@ -4872,7 +4949,7 @@ function performNextRound() {
     .then(data => {
         if (data.success) {
             console.log('进入下一回合成功:', data.game_state);
-            window.gameState = data.game_state;
+            window.gameState = withStaticMap(data.game_state);
             gameState = data.game_state;
             
             // 备份当前的合并城镇数据
@@ -2,6 +2,28 @@
  * 六角格地图渲染模块
  */
 
+/**
+ * 加载静态地图数据（区域、格子、阵营、相邻区域）
+ * 整个页面只请求一次，之后由浏览器按ETag缓存
+ * @returns {Promise} 解析为地图数据的Promise
+ */
+function loadStaticMap() {
+    if (!window.staticMapPromise) {
+        window.staticMapPromise = fetch('/api/map-data')
+            .then(response => response.json())
+            .then(mapData => {
+                window.staticMapData = mapData;
+                return mapData;
+            })
+            .catch(error => {
+                // 失败后允许重试
+                window.staticMapPromise = null;
+                throw error;
+            });
+    }
+    return window.staticMapPromise;
+}
+
 class HexGrid {
     /**
      * 创建六角格地图
@@ -194,8 +216,7 @@ class HexGrid {
         this.hexagons = {};
 
         // 获取地图数据来创建格子
-        fetch('/api/map-data')
-            .then(response => response.json())
+        loadStaticMap()
             .then(mapData => {
                 if (!mapData || !mapData.regions) {
                     console.error("无法获取地图数据或区域信息");
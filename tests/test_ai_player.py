@@ -0,0 +1,61 @@
+"""
+电脑玩家的测试
+"""
+
+import pytest
+
+from game.ai_player import AIPlayer, AITurn
+from game.controller import GameController
+from game.log import suppressed
+from game.models import GameState, Town
+
+
+@pytest.fixture(scope="module")
+def actions():
+    """双方电脑玩家进行整局游戏，返回每个行动及其回合和阶段 [(回合, 阶段, 行动)]"""
+    controller = GameController()
+    game_state = controller.game_state
+    players = [AIPlayer(player) for player in game_state.players]
+    actions = []
+    with suppressed():
+        while game_state.round <= game_state.max_rounds and not game_state.game_ended:
+            for ai_player in players:
+                actions.extend(
+                    (game_state.round, game_state.phase, action) for action in ai_player.take_turn(controller)
+                )
+            controller.next_round(game_state.current_player)
+    return actions
+
+
+def test_ai_follows_phase_rules(actions):
+    names = {action[0] for _, _, action in actions}
+    assert {"build_town", "build_railway", "upgrade_town", "mobilize_troops", "declare_war"} <= names
+    
+    for round_number, phase, action in actions:
+        name = action[0]
+        if name == "mobilize_troops":
+            assert round_number > AIPlayer.LATE_ROUNDS
+        elif name == "declare_war":
+            assert phase == GameState.TENSION_PHASE
+        elif name == "build_town":
+            assert round_number <= AIPlayer.LATE_ROUNDS
+        elif name == "upgrade_town" and action[-1] == Town.SMALL_CITY:
+            assert round_number > AIPlayer.MID_ROUNDS
+    assert sum(1 for _, _, action in actions if action[0] == "declare_war") == 1
+
+
+def test_ai_does_nothing_without_time_budget():
+    controller = GameController()
+    version = controller.game_state.version
+    assert AIPlayer("德军", time_budget=0).take_turn(controller) == []
+    assert controller.game_state.version == version
+
+
+def test_ai_stops_when_budget_expires(monkeypatch):
+    controller = GameController()
+    assert len(AIPlayer("德军").take_turn(controller)) > 1
+    
+    # 执行第一个行动之后预算即用完
+    monkeypatch.setattr(AITurn, "expired", lambda turn: bool(turn.actions))
+    controller = GameController()
+    assert len(AIPlayer("德军").take_turn(controller)) == 1
@@ -0,0 +1,143 @@
+"""
+Flask接口的测试
+"""
+
+import gzip
+import importlib
+import json
+
+import pytest
+
+from game.sessions import GameRegistry
+
+PLAYER = "德军"
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    """使用临时存放目录的app模块"""
+    monkeypatch.setenv("GAME_SESSION_DIR", str(tmp_path))
+    monkeypatch.setattr(GameRegistry, "_instance", None)
+    app_module = importlib.import_module("app")
+    monkeypatch.setattr(app_module, "registry", GameRegistry(storage_dir=str(tmp_path)))
+    return app_module
+
+
+@pytest.fixture
+def client(app_module):
+    """测试客户端（Cookie中保存游戏ID），已开始一局游戏"""
+    client = app_module.app.test_client()
+    assert client.post("/api/reset-game", json={}).status_code == 200
+    return client
+
+
+def build_town(client, region_id, coords, name):
+    """通过接口建造城镇"""
+    q, r, s = coords
+    response = client.post("/api/build-town", json={
+        "region_id": region_id, "q": q, "r": r, "s": s, "town_name": name, "player": PLAYER
+    })
+    assert response.status_code == 200
+
+
+def test_delta_returns_only_changed_regions(client):
+    state = client.get("/api/game-state").get_json()
+    build_town(client, "GE-1", (5, -1, -4), "甲")
+    
+    delta = client.get("/api/game-state/delta", query_string={
+        "since": state["version"], "state_id": state["state_id"]
+    }).get_json()
+    assert delta["full"] is False
+    assert [region["id"] for region in delta["regions"]] == ["GE-1"]
+    assert [town["name"] for town in delta["regions"][0]["towns"]] == ["甲"]
+    assert delta["version"] > state["version"]
+    assert "players" in delta
+    assert "armies" not in delta
+    
+    # 已是最新版本时没有变化的区域
+    latest = client.get("/api/game-state/delta", query_string={
+        "since": delta["version"], "state_id": state["state_id"]
+    }).get_json()
+    assert latest["full"] is False
+    assert latest["regions"] == []
+
+
+@pytest.mark.parametrize("query", [
+    {},
+    {"since": 10 ** 6},
+    {"since": 0, "state_id": "另一局游戏"}
+])
+def test_delta_falls_back_to_full_state(client, query):
+    delta = client.get("/api/game-state/delta", query_string=query).get_json()
+    assert delta["full"] is True
+    assert len(delta["regions"]) == len(client.get("/api/game-state").get_json()["regions"])
+
+
+def test_conflicting_commit_returns_409_without_saving(app_module, client, tmp_path, monkeypatch):
+    registry = app_module.registry
+    other = GameRegistry(storage_dir=str(tmp_path))  # 共享同一个状态存储的另一个工作进程
+    game_id, = registry.sessions
+    saved = []
+    monkeypatch.setattr(app_module.state_writer, "save", lambda path, game_state: saved.append(path))
+    
+    acquire = registry.acquire
+    
+    def acquire_then_commit_elsewhere(game_id):
+        # 本次请求读取游戏之后，另一个工作进程先提交了修改
+        session = acquire(game_id)
+        other_session = other.acquire(game_id)
+        try:
+            controller = other_session.controller
+            controller.next_round(controller.game_state.current_player)
+            other.commit(other_session)
+        finally:
+            other.release(other_session)
+        return session
+        
+    monkeypatch.setattr(registry, "acquire", acquire_then_commit_elsewhere)
+    assert client.post("/api/reset-game", json={}).status_code == 409
+    assert saved == []
+    
+    # 重新读取最新状态后的请求正常提交并保存存档
+    monkeypatch.setattr(registry, "acquire", acquire)
+    assert client.get("/api/game-state").get_json()["round"] == 2
+    assert client.post("/api/reset-game", json={}).status_code == 200
+    assert saved == [registry.saved_state_path(game_id)]
+
+
+@pytest.mark.parametrize("accept_encoding, gzipped", [
+    ("gzip, deflate", True),
+    ("gzip;q=0, deflate", False),
+    ("identity", False),
+])
+def test_map_data_negotiates_gzip(client, accept_encoding, gzipped):
+    response = client.get("/api/map-data", headers={"Accept-Encoding": accept_encoding})
+    assert response.status_code == 200
+    assert (response.headers.get("Content-Encoding") == "gzip") == gzipped
+    body = gzip.decompress(response.data) if gzipped else response.data
+    assert json.loads(body)["regions"]
+    assert response.headers["ETag"].endswith('-gz"') == gzipped
+
+
+@pytest.mark.parametrize("accept_encoding", ["gzip", "identity"])
+def test_map_data_revalidates_with_etag(client, accept_encoding):
+    headers = {"Accept-Encoding": accept_encoding}
+    etag = client.get("/api/map-data", headers=headers).headers["ETag"]
+    
+    response = client.get("/api/map-data", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    
+    # 另一种编码的ETag不能用来验证这种编码的缓存
+    other = "identity" if accept_encoding == "gzip" else "gzip"
+    other_etag = client.get("/api/map-data", headers={"Accept-Encoding": other}).headers["ETag"]
+    assert other_etag != etag
+    assert client.get("/api/map-data", headers={**headers, "If-None-Match": other_etag}).status_code == 200
+
+
+def test_map_data_version(client):
+    map_version = client.get("/api/game-state").get_json()["map_version"]
+    response = client.get(f"/api/map-data/{map_version}")
+    assert response.status_code == 200
+    assert "immutable" in response.headers["Cache-Control"]
+    assert client.get("/api/map-data/0123456789abcdef").status_code == 404
@@ -0,0 +1,126 @@
+"""
+GameController命令的测试
+"""
+
+import json
+
+import pytest
+
+from game.controller import GameController
+
+PLAYER = "德军"
+TOWN_A = (5, -1, -4)
+TOWN_B = (5, 0, -5)
+
+
+def advance(controller, rounds):
+    """推进若干回合"""
+    for _ in range(rounds):
+        controller.next_round(controller.game_state.current_player)
+
+
+@pytest.fixture
+def controller():
+    """GE-1中两个相邻、由铁路连通的已建成村落"""
+    controller = GameController()
+    controller.player_resources[PLAYER]["gdp"] = 10000
+    assert controller.build_town("GE-1", TOWN_A, "甲", PLAYER)
+    assert controller.build_town("GE-1", TOWN_B, "乙", PLAYER)
+    assert controller.build_railway("GE-1", TOWN_A, TOWN_B, PLAYER)
+    advance(controller, 3)
+    return controller
+
+
+def test_upgrade_town_merges_connected_villages(controller):
+    game_state = controller.game_state
+    assert controller.upgrade_town("GE-1", TOWN_A, TOWN_B, PLAYER, "village")
+    
+    merged = game_state.get_hex(TOWN_A).town
+    assert merged is game_state.get_hex(TOWN_B).town
+    assert merged.level == "small_city"
+    assert game_state.regions["GE-1"].towns == [merged]
+
+
+@pytest.mark.parametrize("merge_first", [False, True])
+def test_upgrade_town_rejects_merging_town_with_itself(controller, merge_first):
+    game_state = controller.game_state
+    if merge_first:
+        # 已合并城镇的两个格子
+        assert controller.upgrade_town("GE-1", TOWN_A, TOWN_B, PLAYER, "village")
+        advance(controller, 3)
+        coords, upgrade_type = (TOWN_A, TOWN_B), "small_city"
+    else:
+        # 同一个坐标
+        coords, upgrade_type = (TOWN_A, TOWN_A), "village"
+    region = game_state.regions["GE-1"]
+    towns = list(region.towns)
+    gdp = controller.player_resources[PLAYER]["gdp"]
+    economy = dict(game_state.economy[PLAYER])
+    
+    assert not controller.upgrade_town("GE-1", *coords, PLAYER, upgrade_type)
+    assert controller.player_resources[PLAYER]["gdp"] == gdp
+    assert region.towns == towns
+    assert game_state.economy[PLAYER] == economy
+
+
+def test_build_railway_rejects_existing_edge(controller):
+    gdp = controller.player_resources[PLAYER]["gdp"]
+    assert not controller.build_railway("GE-1", TOWN_B, TOWN_A, PLAYER)
+    assert controller.player_resources[PLAYER]["gdp"] == gdp
+    assert len(controller.game_state.railway_network.railways) == 1
+
+
+def test_upgrade_to_large_city_takes_all_tiles(controller):
+    game_state = controller.game_state
+    town_c, town_d = (6, -1, -5), (6, 0, -6)
+    assert controller.build_town("GE-1", town_c, "丙", PLAYER)
+    assert controller.build_town("GE-1", town_d, "丁", PLAYER)
+    assert controller.build_railway("GE-1", town_c, town_d, PLAYER)
+    assert controller.build_railway("GE-1", TOWN_A, town_c, PLAYER)
+    advance(controller, 3)
+    
+    assert controller.upgrade_town("GE-1", TOWN_A, TOWN_B, PLAYER, "village")
+    assert controller.upgrade_town("GE-1", town_c, town_d, PLAYER, "village")
+    advance(controller, 3)
+    assert controller.upgrade_town("GE-1", TOWN_A, town_c, PLAYER, "small_city")
+    
+    large_city = game_state.get_hex(TOWN_A).town
+    coords = [TOWN_A, TOWN_B, town_c, town_d]
+    assert large_city.level == "large_city"
+    assert game_state.regions["GE-1"].towns == [large_city]
+    assert sorted((t.q, t.r, t.s) for t in large_city.hex_tiles) == sorted(coords)
+    assert all(game_state.get_hex(c).town is large_city for c in coords)
+
+
+def test_from_saved_state_restores_game(controller):
+    game_state = controller.game_state
+    saved = json.loads(json.dumps(controller.get_saved_state()))
+    restored = GameController.from_saved_state(saved)
+    
+    assert restored.get_game_state() == controller.get_game_state()
+    assert restored.game_state.state_id == game_state.state_id
+    assert restored.game_state.version == game_state.version
+    
+    # 持有恢复前旧版本的客户端取回全部区域、军队和玩家资源
+    delta = restored.get_game_state_delta(0, game_state.state_id)
+    assert not delta["full"]
+    assert {region["id"] for region in delta["regions"]} == set(game_state.regions)
+    assert "players" in delta and "armies" in delta
+    assert restored.get_game_state_delta(game_state.version, game_state.state_id)["regions"] == []
+
+
+def test_journal_records_only_commands_that_changed_state(controller):
+    controller.take_journal()
+    controller.player_resources[PLAYER]["gdp"] = 0
+    assert not controller.build_town("GE-1", (6, -1, -5), "丙", PLAYER)
+    with pytest.raises(TypeError):
+        controller.mobilize_troops("GE-1", "甲", None, PLAYER)  # 缺少动员数量
+    assert controller.take_journal() == []
+    
+    advance(controller, 1)
+    assert controller.take_journal() == [["next_round", [PLAYER], {}]]
+
+
+def test_replay_propagates_failing_commands(controller):
+    with pytest.raises(TypeError):
+        controller.replay([["mobilize_troops", ["GE-1", "甲", None, PLAYER], {}]])
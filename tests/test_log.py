@@ -0,0 +1,91 @@
+"""
+日志配置和JSON行格式的测试
+"""
+
+import io
+import json
+import logging
+import sys
+
+import pytest
+
+from game.log import ROOT_LOGGER, JsonLinesFormatter, configure_logging, parse_levels, suppressed
+
+
+@pytest.fixture
+def game_logger():
+    """测试结束后恢复"game"日志器及其子系统的处理器和级别"""
+    root = logging.getLogger(ROOT_LOGGER)
+    movement = logging.getLogger("game.movement")
+    saved = (list(root.handlers), root.level, root.propagate, movement.level)
+    yield root
+    root.handlers[:], root.level, root.propagate, level = saved
+    movement.setLevel(level)
+
+
+def test_json_lines_formatter_merges_extra_fields():
+    logger = logging.getLogger("game.controller")
+    record = logger.makeRecord(
+        logger.name, logging.INFO, __file__, 1, "建造城镇%s", ("甲",), None,
+        extra={"game_id": "abc", "coords": (5, -1, -4)}
+    )
+    entry = json.loads(JsonLinesFormatter().format(record))
+    
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "game.controller"
+    assert entry["message"] == "建造城镇甲"
+    assert entry["game_id"] == "abc"
+    assert entry["coords"] == [5, -1, -4]
+    assert "args" not in entry and "exception" not in entry
+
+
+def test_json_lines_formatter_includes_exception():
+    try:
+        raise ValueError("无效的坐标")
+    except ValueError:
+        record = logging.getLogger("game.api").makeRecord(
+            "game.api", logging.ERROR, __file__, 1, "失败", (), sys.exc_info()
+        )
+    entry = json.loads(JsonLinesFormatter().format(record))
+    assert "ValueError: 无效的坐标" in entry["exception"]
+
+
+def test_configure_logging_levels_and_json_output(game_logger):
+    stream = io.StringIO()
+    configure_logging(level="WARNING", levels=parse_levels("game.movement=DEBUG"), json_lines=True, stream=stream)
+    
+    logging.getLogger("game.controller").info("不输出")
+    logging.getLogger("game.controller").warning("输出", extra={"round": 3})
+    logging.getLogger("game.movement").debug("军队移动")
+    
+    entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [(entry["logger"], entry["message"]) for entry in entries] == [
+        ("game.controller", "输出"), ("game.movement", "军队移动")
+    ]
+    assert entries[0]["round"] == 3
+    
+    # 重复调用替换之前的处理器
+    configure_logging(json_lines=True, stream=stream)
+    assert sum(getattr(handler, "_game_handler", False) for handler in game_logger.handlers) == 1
+
+
+def test_parse_levels_rejects_missing_level():
+    assert parse_levels(" game.models=warning ,") == {"game.models": logging.WARNING}
+    with pytest.raises(ValueError):
+        parse_levels("game.models")
+
+
+def test_suppressed_disables_logging_temporarily(game_logger):
+    stream = io.StringIO()
+    configure_logging(level="INFO", json_lines=True, stream=stream)
+    logger = logging.getLogger("game.controller")
+    
+    with suppressed():
+        logger.critical("屏蔽")
+        with suppressed(logging.INFO):
+            logger.error("屏蔽")
+        logger.error("屏蔽")
+    logger.info("输出")
+    
+    assert [json.loads(line)["message"] for line in stream.getvalue().splitlines()] == ["输出"]
+    assert logging.root.manager.disable == logging.NOTSET
@@ -0,0 +1,104 @@
+"""
+地图生成器的测试
+"""
+
+import pytest
+
+from game.controller import GameController
+from game.map_generator import MapGenerator, ProceduralMapGenerator
+
+OPTIONS = {"regions": 30, "tiles_per_region": 20, "factions": 3, "conflict_regions": 2, "seed": 7}
+
+
+def layout(controller):
+    """地图布局：区域ID、名称和格子坐标"""
+    return [
+        (region.id, region.name, [(t.q, t.r, t.s) for t in region.hex_tiles])
+        for region in controller.game_state.regions.values()
+    ]
+
+
+def connected(items, start, neighbors):
+    """从start出发沿neighbors能到达的items中的元素"""
+    seen = {start}
+    stack = [start]
+    while stack:
+        for item in neighbors(stack.pop()):
+            if item in items and item not in seen:
+                seen.add(item)
+                stack.append(item)
+    return seen
+
+
+@pytest.fixture(scope="module")
+def controller():
+    return GameController(ProceduralMapGenerator(**OPTIONS))
+
+
+def test_same_options_generate_same_map(controller):
+    assert layout(GameController(ProceduralMapGenerator(**OPTIONS))) == layout(controller)
+    other = GameController(ProceduralMapGenerator(**dict(OPTIONS, seed=8)))
+    assert layout(other) != layout(controller)
+    assert other.map_name != controller.map_name
+
+
+def test_regions_and_factions_are_contiguous(controller):
+    game_state = controller.game_state
+    grid = game_state.hex_grid
+    assert len(game_state.regions) == OPTIONS["regions"]
+    for region in game_state.regions.values():
+        tiles = set(region.hex_tiles)
+        assert 0 < len(tiles) <= OPTIONS["tiles_per_region"]
+        assert connected(tiles, region.hex_tiles[0], lambda t: grid.neighbors(t.index)) == tiles
+        
+    # 每个区域恰好属于一个阵营，各阵营的领土连通
+    owners = {}
+    for player in game_state.players:
+        region_ids = {region.id for region in game_state.get_player_regions(player)}
+        assert region_ids
+        assert connected(region_ids, next(iter(region_ids)), game_state.region_borders.neighbors) == region_ids
+        owners.update((region_id, player) for region_id in region_ids)
+    assert set(owners) == set(game_state.regions)
+
+
+def test_factions_and_conflict_regions_follow_game_state_contract(controller):
+    game_state = controller.game_state
+    assert game_state.players == ["德军", "协约国", "阵营3"]
+    assert set(game_state.factions) == set(game_state.players)
+    assert set(controller.player_resources) == set(game_state.players)
+    assert set(game_state.arrived_forces) == set(game_state.players)
+    
+    # 冲突区域位于本阵营领土内，并与其他阵营接壤
+    assert len(game_state.conflict_regions) == OPTIONS["conflict_regions"]
+    for player, region_id in game_state.conflict_regions.items():
+        own = {region.id for region in game_state.get_player_regions(player)}
+        assert region_id in own
+        assert game_state.region_borders.neighbors(region_id) - own
+
+
+def test_saved_game_regenerates_same_map(controller):
+    restored = GameController.from_saved_state(controller.get_saved_state())
+    assert restored.map_options == OPTIONS
+    assert layout(restored) == layout(controller)
+    assert restored.game_state.conflict_regions == controller.game_state.conflict_regions
+
+
+def test_demo_map_keeps_default_factions():
+    generator = MapGenerator()
+    assert generator.map_name == "demo"
+    assert generator.get_options() is None
+    game_state = GameController(generator).game_state
+    assert game_state.conflict_regions == {"德军": "GE-3", "协约国": "FR-3"}
+    assert len(game_state.get_player_regions("德军")) == 8
+
+
+@pytest.mark.parametrize("options", [
+    {"factions": 1},
+    {"regions": 2, "factions": 3},
+    {"tiles_per_region": 0},
+    {"conflict_regions": 0},
+    {"conflict_regions": 3}
+])
+def test_rejects_invalid_options(options):
+    with pytest.raises(ValueError):
+        ProceduralMapGenerator(**options)
@@ -0,0 +1,173 @@
+"""
+游戏模型的测试
+"""
+
+from game.controller import GameController
+import pytest
+
+from game.models import ECONOMY_KEYS, HexGrid, HexTile, Town, TownConnectivity, new_economy
+
+PLAYER = "德军"
+
+
+def towns(count):
+    """若干个村落"""
+    return [Town(f"城镇{i}", Town.VILLAGE, PLAYER) for i in range(count)]
+
+
+def test_town_connectivity_union_and_replace():
+    a, b, c, d = towns(4)
+    connectivity = TownConnectivity()
+    for town in (a, b, c, d):
+        connectivity.add(town)
+        
+    connectivity.union(a, b)
+    connectivity.union(c, b)
+    assert connectivity.connected(a, c)
+    assert not connectivity.connected(a, d)
+    assert connectivity.all_connected([a, b, c])
+    assert not connectivity.all_connected([a, d])
+    assert not connectivity.connected(a, Town("未登记", Town.VILLAGE, PLAYER))
+    
+    # 合并后的新城镇继承原有城镇的连通关系
+    merged = Town("合并", Town.SMALL_CITY, PLAYER)
+    connectivity.replace((a, b), merged)
+    assert connectivity.connected(merged, c)
+    assert not connectivity.connected(merged, d)
+
+
+def test_region_connects_towns_when_railway_completes():
+    controller = GameController()
+    controller.player_resources[PLAYER]["gdp"] = 10000
+    town_a, town_b = (5, -1, -4), (5, 0, -5)
+    assert controller.build_town("GE-1", town_a, "甲", PLAYER)
+    assert controller.build_town("GE-1", town_b, "乙", PLAYER)
+    region = controller.game_state.regions["GE-1"]
+    a = controller.game_state.get_hex(town_a).town
+    b = controller.game_state.get_hex(town_b).town
+    
+    assert controller.build_railway("GE-1", town_a, town_b, PLAYER)
+    assert not region.are_towns_connected(a, b)
+    for _ in range(3):
+        controller.next_round(controller.game_state.current_player)
+    assert region.are_towns_connected(a, b)
+
+
+def recount_economy(regions):
+    """从头统计各玩家在这些区域中的经济汇总，省略没有任何数据的玩家"""
+    totals = {}
+    for region in regions:
+        for town in region.towns:
+            economy = totals.setdefault(town.owner, new_economy())
+            for key, value in zip(ECONOMY_KEYS, town.get_economy()):
+                economy[key] += value
+            economy["towns"] += 1
+    return totals
+
+
+def nonzero(economies):
+    return {owner: economy for owner, economy in economies.items() if any(economy.values())}
+
+
+def assert_economy_matches_recount(game_state):
+    for region in game_state.regions.values():
+        assert nonzero(region.economy) == recount_economy([region])
+    assert nonzero(game_state.economy) == recount_economy(game_state.regions.values())
+
+
+def test_economy_aggregates_match_recount():
+    controller = GameController()
+    game_state = controller.game_state
+    controller.player_resources[PLAYER]["gdp"] = 10000
+    town_a, town_b, town_c = (5, -1, -4), (5, 0, -5), (6, -1, -5)
+    for coords, name in ((town_a, "甲"), (town_b, "乙"), (town_c, "丙")):
+        assert controller.build_town("GE-1", coords, name, PLAYER)
+    assert controller.build_railway("GE-1", town_a, town_b, PLAYER)
+    assert_economy_matches_recount(game_state)
+    
+    for _ in range(3):
+        controller.next_round(game_state.current_player)
+    assert_economy_matches_recount(game_state)
+    
+    assert controller.mobilize_troops("GE-1", "丙", 10, PLAYER) == 10
+    assert_economy_matches_recount(game_state)
+    assert controller.upgrade_town("GE-1", town_a, town_b, PLAYER, "village")
+    assert_economy_matches_recount(game_state)
+    assert controller.mobilize_troops("GE-1", player=PLAYER, is_region_mobilization=True)["success"]
+    assert_economy_matches_recount(game_state)
+    
+    for _ in range(3):
+        controller.next_round(game_state.current_player)
+    assert_economy_matches_recount(game_state)
+
+
+def assert_grid_matches_neighbor_coords(grid):
+    """相邻表的每个方向与neighbor_coords一致，地图外的方向为NO_NEIGHBOR"""
+    index = {(hex_tile.q, hex_tile.r): i for i, hex_tile in enumerate(grid.tiles)}
+    for i, hex_tile in enumerate(grid.tiles):
+        expected = [index.get(coords, HexGrid.NO_NEIGHBOR) for coords in hex_tile.neighbor_coords()]
+        assert list(grid.neighbor_indices(i)) == expected
+        for j in expected:
+            if j >= 0:
+                # 相邻关系是对称的，且与按坐标计算的结果一致
+                assert grid.are_adjacent(j, i)
+                assert (hex_tile.q, hex_tile.r) in grid.tiles[j].neighbor_coords()
+        assert not grid.are_adjacent(i, HexGrid.NO_NEIGHBOR)
+
+
+@pytest.mark.parametrize("columns", [range(-3, 4), range(0, 6), range(1, 6)])
+def test_hex_grid_matches_neighbor_coords_at_column_edges(columns):
+    # 矩形区域的首末列分别为奇数列或偶数列
+    tiles = [HexTile(q, r, -q - r) for q in columns for r in range(-2, 3)]
+    grid = HexGrid(tiles)
+    assert_grid_matches_neighbor_coords(grid)
+    
+    corner = grid.tiles[0]
+    assert sum(i >= 0 for i in grid.neighbor_indices(corner.index)) == len(corner.neighbors()) < 6
+
+
+def test_hex_grid_neighbors_of_odd_and_even_columns():
+    tiles = {(q, r): HexTile(q, r, -q - r) for q in range(-1, 3) for r in range(-1, 2)}
+    grid = HexGrid(tiles.values())
+    
+    def neighbors(q, r):
+        return {(tile.q, tile.r) for tile in grid.neighbors(tiles[(q, r)].index)}
+        
+    # 偶数列的左右邻格在同一行和下一行，奇数列的在上一行和同一行
+    assert neighbors(0, 0) == {(0, -1), (0, 1), (-1, 0), (1, 0), (-1, 1), (1, 1)}
+    assert neighbors(1, 0) == {(1, -1), (1, 1), (0, -1), (2, -1), (0, 0), (2, 0)}
+    assert neighbors(-1, 1) == {(-1, 0), (0, 0), (0, 1)}  # 负数列同样按奇偶区分
+    assert neighbors(2, -1) == {(2, 0), (1, -1), (1, 0)}
+
+
+def test_map_grid_matches_neighbor_coords():
+    assert_grid_matches_neighbor_coords(GameController().game_state.hex_grid)
+
+
+def brute_force_nearest_border(game_state, region_id, hex_tile):
+    """逐个比较区域的全部边界格子，距离相同时取编号靠前的格子"""
+    tiles = game_state.hex_grid.tiles
+    return min(
+        game_state.region_borders.border_indices[region_id],
+        key=lambda index: (hex_tile.distance(tiles[index]), index)
+    )
+
+
+def test_region_borders_match_brute_force():
+    game_state = GameController().game_state
+    borders = game_state.region_borders
+    grid = game_state.hex_grid
+    
+    for region_id, region in game_state.regions.items():
+        # 边界格子恰好是与其他区域相邻的格子
+        expected = sorted(
+            hex_tile.index for hex_tile in region.hex_tiles
+            if any(neighbor.region_id != region_id for neighbor in grid.neighbors(hex_tile.index))
+        )
+        assert borders.border_indices[region_id] == expected
+        for other in borders.neighbors(region_id):
+            assert region_id in borders.neighbors(other)
+            
+        for hex_tile in grid.tiles:
+            assert (borders.nearest_border(region_id, hex_tile) ==
+                    brute_force_nearest_border(game_state, region_id, hex_tile))
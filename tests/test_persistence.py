@@ -0,0 +1,83 @@
+"""
+后台状态文件写入器的测试：合并连续的保存、原子替换、flush和close
+"""
+
+import json
+import os
+
+import pytest
+
+from game import persistence
+from game.persistence import StateFileWriter
+
+
+@pytest.fixture
+def replaced(monkeypatch):
+    """记录每次os.replace的目标文件"""
+    targets = []
+    replace = os.replace
+    
+    def record(src, dst):
+        targets.append(dst)
+        replace(src, dst)
+        
+    monkeypatch.setattr(persistence.os, "replace", record)
+    return targets
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_consecutive_saves_are_coalesced(tmp_path, replaced):
+    writer = StateFileWriter(delay=0.2)
+    path = str(tmp_path / "game.json")
+    for version in range(3):
+        writer.save(path, {"version": version})
+    assert writer.flush(timeout=5)
+    
+    assert read(path) == {"version": 2}
+    assert replaced == [path]
+    assert os.listdir(tmp_path) == ["game.json"]  # 不留下临时文件
+    writer.close()
+
+
+def test_save_captures_state_at_call_time(tmp_path):
+    writer = StateFileWriter(delay=0.2)
+    path = str(tmp_path / "game.json")
+    state = {"player_resources": {"德军": {"gdp": 100}}}
+    writer.save(path, state)
+    state["player_resources"]["德军"]["gdp"] = 0  # 下一个请求修改了同一份数据
+    assert writer.flush(timeout=5)
+    
+    assert read(path) == {"player_resources": {"德军": {"gdp": 100}}}
+    writer.close()
+
+
+def test_failed_write_keeps_previous_file(tmp_path, monkeypatch):
+    writer = StateFileWriter(delay=0)
+    path = str(tmp_path / "game.json")
+    writer.save(path, {"version": 1})
+    assert writer.flush(timeout=5)
+    
+    def fail(src, dst):
+        raise OSError("disk full")
+        
+    monkeypatch.setattr(persistence.os, "replace", fail)
+    writer.save(path, {"version": 2})
+    assert writer.flush(timeout=5)
+    
+    assert read(path) == {"version": 1}
+    writer.close()
+
+
+def test_close_writes_pending_state_and_stops_thread(tmp_path):
+    writer = StateFileWriter(delay=10)
+    path = str(tmp_path / "saved" / "game.json")
+    writer.save(path, {"version": 1})
+    writer.close()
+    
+    assert not writer.thread.is_alive()
+    assert read(path) == {"version": 1}
+    assert writer.flush(timeout=0)
@@ -0,0 +1,111 @@
+"""
+铁路网络、距离场和运量账本的测试
+"""
+
+import pytest
+
+from game.models import HexTile, Railway
+from game.railway_network import RailwayNetwork
+
+
+def tile(q, r):
+    """按奇偶列坐标创建格子"""
+    return HexTile(q, r, -q - r)
+
+
+def completed(start, end):
+    """已建成的一级铁路"""
+    railway = Railway(start, end)
+    railway.is_under_construction = False
+    return railway
+
+
+def chain(network, tiles):
+    """沿格子序列逐段建成铁路"""
+    railways = [completed(a, b) for a, b in zip(tiles, tiles[1:])]
+    for railway in railways:
+        network.add_railway(railway)
+    return railways
+
+
+def test_ledger_counters_use_64_bit_arrays():
+    ledger = RailwayNetwork().ledger
+    assert {ledger.load.typecode, ledger.total.typecode,
+            ledger.peak.typecode, ledger.saturated.typecode} == {'q'}
+
+
+def test_ledger_zero_amount_does_not_touch_railway():
+    network = RailwayNetwork()
+    railway, = chain(network, [tile(0, 0), tile(0, 1)])
+    ledger = network.ledger
+    
+    ledger.add(railway, 0)
+    ledger.add(railway, 30)
+    ledger.add(railway, 20)
+    assert ledger.loaded_railways() == [railway]
+    assert railway.troops == 50
+    assert ledger.remaining(railway) == 50
+
+
+def test_ledger_reset_accumulates_stats():
+    network = RailwayNetwork()
+    busy, idle = chain(network, [tile(0, 0), tile(0, 1), tile(0, 2)])
+    ledger = network.ledger
+    
+    ledger.add(busy, 100)
+    ledger.reset()
+    ledger.add(busy, 40)
+    ledger.reset()
+    
+    assert ledger.loaded_railways() == []
+    assert busy.troops == 0
+    assert ledger.stats(busy) == {
+        "load": 0,
+        "capacity": 100,
+        "utilization": 0,
+        "average_utilization": 0.7,
+        "peak": 100,
+        "saturated_rounds": 1
+    }
+    assert ledger.stats(idle)["peak"] == 0
+
+
+def test_route_field_gives_distances_and_paths_to_target():
+    network = RailwayNetwork()
+    a, b, c, d = tile(0, 0), tile(0, 1), tile(0, 2), tile(5, 5)
+    chain(network, [a, b, c])
+    
+    field = network.route_field("T", [c])
+    assert field.distance == {c: 0, b: 1, a: 2}
+    assert field.path_from(a) == [a, b, c]
+    assert not field.reaches(d)
+    assert field.path_from(d) == []
+
+
+def test_route_field_cached_until_network_changes():
+    network = RailwayNetwork()
+    a, b, c = tile(0, 0), tile(0, 1), tile(0, 2)
+    chain(network, [a, b])
+    field = network.route_field("T", [a])
+    assert network.route_field("T", [a]) is field
+    
+    # 建设中的铁路不改变连通关系，完工后距离场失效
+    railway = Railway(b, c)
+    network.add_railway(railway)
+    assert network.route_field("T", [a]) is field
+    railway.is_under_construction = False
+    network.on_railway_completed(railway)
+    assert network.route_field("T", [a]).distance[c] == 2
+
+
+def test_network_rejects_second_railway_on_same_edge():
+    network = RailwayNetwork()
+    a, b = tile(0, 0), tile(0, 1)
+    railway = Railway(a, b)
+    network.add_railway(railway)
+    
+    # 建设中的铁路同样占据这条边，方向无关
+    with pytest.raises(ValueError):
+        network.add_railway(Railway(b, a))
+    assert network.find_railway(b, a) is railway
+    assert network.railways == [railway]
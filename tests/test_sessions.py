@@ -0,0 +1,98 @@
+"""
+游戏会话和状态存储的测试：另一个注册表（相当于另一个工作进程）从存储读取的状态应与提交时一致
+"""
+
+import pytest
+
+from game.sessions import GameRegistry
+
+PLAYER = "德军"
+TOWN_A = (5, -1, -4)
+TOWN_B = (5, 0, -5)
+
+
+def open_registry(tmp_path, snapshot_interval=50):
+    """在同一个存放目录上新建注册表"""
+    return GameRegistry(storage_dir=str(tmp_path), snapshot_interval=snapshot_interval)
+
+
+def load_state(tmp_path, game_id):
+    """用新的注册表读取游戏，返回完整游戏状态"""
+    registry = open_registry(tmp_path)
+    session = registry.acquire(game_id)
+    try:
+        return session.controller.get_game_state()
+    finally:
+        registry.release(session)
+
+
+def test_create_game_persists_current_player(tmp_path):
+    registry = open_registry(tmp_path)
+    session = registry.create_game("协约国")
+    registry.release(session)
+    
+    assert load_state(tmp_path, session.game_id)["current_player"] == "协约国"
+
+
+@pytest.mark.parametrize("snapshot_interval", [50, 3])
+def test_journal_replay_restores_state(tmp_path, snapshot_interval):
+    registry = open_registry(tmp_path, snapshot_interval)
+    session = registry.create_game()
+    controller = session.controller
+    try:
+        # 每个请求提交一次；间隔较小时中途会保存新快照，恢复时读取快照再重放之后的命令
+        assert controller.build_town("GE-1", TOWN_A, "甲", PLAYER)
+        registry.commit(session)
+        assert controller.build_town("GE-1", TOWN_B, "乙", PLAYER)
+        assert controller.build_railway("GE-1", TOWN_A, TOWN_B, PLAYER)
+        registry.commit(session)
+        for _ in range(4):
+            controller.next_round(controller.game_state.current_player)
+            registry.commit(session)
+        assert controller.upgrade_town("GE-1", TOWN_A, TOWN_B, PLAYER, "village")
+        controller.mobilize_troops("GE-3", player=PLAYER, is_region_mobilization=True)
+        registry.commit(session)
+        expected = controller.get_game_state()
+    finally:
+        registry.release(session)
+        
+    assert load_state(tmp_path, session.game_id) == expected
+
+
+def test_evicted_game_is_reloaded_from_store(tmp_path):
+    registry = GameRegistry(storage_dir=str(tmp_path), max_active=1)
+    first = registry.create_game()
+    assert first.controller.build_town("GE-1", TOWN_A, "甲", PLAYER)
+    registry.commit(first)
+    expected = first.controller.get_game_state()
+    registry.release(first)
+    
+    # 超出数量上限，最久未访问的游戏移出内存
+    second = registry.create_game()
+    registry.release(second)
+    assert list(registry.sessions) == [second.game_id]
+    assert first.evicted
+    
+    session = registry.acquire(first.game_id)
+    try:
+        assert session is not first
+        assert session.controller.get_game_state() == expected
+    finally:
+        registry.release(session)
+    assert list(registry.sessions) == [first.game_id]
+    assert second.evicted
+
+
+def test_idle_game_is_evicted(tmp_path):
+    registry = GameRegistry(storage_dir=str(tmp_path), idle_seconds=60)
+    idle = registry.create_game()
+    registry.release(idle)
+    recent = registry.create_game()
+    registry.release(recent)
+    idle.last_access -= 120
+    
+    # 下一次访问注册表时移出空闲超时的游戏
+    session = registry.acquire(recent.game_id)
+    registry.release(session)
+    assert idle.evicted
+    assert list(registry.sessions) == [recent.game_id]
@@ -0,0 +1,38 @@
+"""
+无界面整局模拟的测试
+"""
+
+from game.models import GameState
+from game.simulation import play_game, run_batch
+
+POLICIES = {"德军": "random", "协约国": "ai"}
+
+
+def test_play_game_finishes_whole_game():
+    result = play_game(POLICIES, seed=3)
+    
+    # 战争结算后提前结束
+    assert result["winner"] in POLICIES
+    assert 0 < result["rounds"] < GameState().max_rounds
+    assert sum(result["arrived_forces"].values()) > 0
+    for player in POLICIES:
+        assert len(result["gdp_curves"][player]) == result["rounds"]
+        
+    # 相同的种子得到相同的对局
+    assert play_game(POLICIES, seed=3) == result
+
+
+def test_idle_game_runs_until_round_limit():
+    result = play_game({}, seed=0)
+    assert result["winner"] is None
+    assert result["rounds"] == GameState().max_rounds
+    assert result["arrived_forces"] == {"德军": 0, "协约国": 0}
+
+
+def test_run_batch_summarizes_games():
+    summary = run_batch(3, POLICIES, workers=1, seed=3)
+    
+    assert summary["games"] == 3
+    assert sum(summary["win_rates"].values()) == 1
+    assert set(summary["arrived_forces"]) == set(POLICIES)
+    assert summary["mean_rounds"] > 0
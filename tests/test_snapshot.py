@@ -0,0 +1,70 @@
+"""
+二进制快照的测试
+"""
+
+import struct
+
+import pytest
+
+from game.ai_player import AIPlayer
+from game.controller import GameController
+from game.log import suppressed
+from game.snapshot import SNAPSHOT_MAGIC, dump_snapshot, load_snapshot
+
+
+def advance(controller, rounds, players=()):
+    """推进若干回合，players中的电脑玩家先行动"""
+    game_state = controller.game_state
+    with suppressed():
+        for _ in range(rounds):
+            for ai_player in players:
+                ai_player.take_turn(controller)
+            controller.next_round(game_state.current_player)
+            controller.take_journal()
+
+
+def assert_same_game(loaded, controller):
+    """两个控制器的完整状态和存档一致"""
+    assert loaded.get_game_state() == controller.get_game_state()
+    assert loaded.get_saved_state() == controller.get_saved_state()
+    assert loaded.map_name == controller.map_name
+
+
+@pytest.fixture(scope="module")
+def controller():
+    """双方电脑玩家进行到紧张期，地图上有城镇、铁路和运输中的军队"""
+    controller = GameController()
+    players = [AIPlayer(player) for player in controller.game_state.players]
+    advance(controller, 33, players)
+    return controller
+
+
+def test_snapshot_round_trip(controller):
+    loaded = load_snapshot(dump_snapshot(controller))
+    assert_same_game(loaded, controller)
+    assert dump_snapshot(loaded) == dump_snapshot(controller)
+
+
+def test_restored_game_plays_on_identically(controller):
+    original = load_snapshot(dump_snapshot(controller))
+    loaded = load_snapshot(dump_snapshot(controller))
+    advance(original, 5)
+    advance(loaded, 5)
+    assert_same_game(loaded, original)
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"not a snapshot at all",
+])
+def test_rejects_data_that_is_not_a_snapshot(data):
+    with pytest.raises(ValueError):
+        load_snapshot(data)
+
+
+def test_rejects_unsupported_version(controller):
+    # 魔数之后是格式版本号
+    data = bytearray(dump_snapshot(controller))
+    data[len(SNAPSHOT_MAGIC):len(SNAPSHOT_MAGIC) + 2] = struct.pack("<H", 99)
+    with pytest.raises(ValueError):
+        load_snapshot(bytes(data))
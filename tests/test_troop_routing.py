@@ -0,0 +1,68 @@
+"""
+军队批量调度的测试
+"""
+
+from types import SimpleNamespace
+
+from game.models import Army, HexTile, Railway, Region, Town
+from game.railway_network import RailwayNetwork
+from game.troop_routing import TroopRouter
+
+PLAYER = "德军"
+
+
+def tile(q, r):
+    """按奇偶列坐标创建格子"""
+    return HexTile(q, r, -q - r)
+
+
+def build(tiles, edges, regions):
+    """由格子、已建成铁路（一级，运力100）和目标区域组成的最小游戏状态"""
+    network = RailwayNetwork()
+    for a, b in edges:
+        railway = Railway(tiles[a], tiles[b])
+        railway.is_under_construction = False
+        network.add_railway(railway)
+    return SimpleNamespace(
+        railway_network=network,
+        regions={
+            region_id: Region(region_id, region_id, [tiles[key] for key in keys])
+            for region_id, keys in regions.items()
+        }
+    )
+
+
+def army(position, target_id, amount=100):
+    """位于某个格子、前往目标区域的运输中军队"""
+    army = Army(Town("城镇", Town.VILLAGE, PLAYER), amount, PLAYER)
+    army.status = Army.TRANSPORTING
+    army.current_position = position
+    army.target_region_id = target_id
+    return army
+
+
+def test_min_cost_flow_splits_armies_over_parallel_routes():
+    tiles = {key: tile(*key) for key in [(0, 0), (0, 1), (0, 2), (1, 1), (1, 2)]}
+    game_state = build(tiles, [((0, 0), (0, 1)), ((0, 1), (0, 2)),
+                               ((0, 0), (1, 1)), ((1, 1), (1, 2)), ((1, 2), (0, 2))],
+                       {"T": [(0, 2)]})
+    armies = [army(tiles[(0, 0)], "T"), army(tiles[(0, 0)], "T")]
+    
+    plans = TroopRouter(game_state).plan(armies)
+    
+    assert sorted(len(plans[a]) for a in armies) == [3, 4]
+    assert plans[armies[0]][1] is not plans[armies[1]][1]
+
+
+def test_reservation_covers_only_hops_reachable_this_round():
+    # 一列格子上的铁路；A前往最远处，第8段铁路要到下一回合才会用到
+    tiles = {(0, r): tile(0, r) for r in range(10)}
+    game_state = build(tiles, [((0, r), (0, r + 1)) for r in range(9)],
+                       {"far": [(0, 9)], "near": [(0, 8)]})
+    far = army(tiles[(0, 0)], "far")
+    near = army(tiles[(0, 7)], "near")
+    
+    plans = TroopRouter(game_state).plan([far, near])
+    
+    assert len(plans[far]) == 10
+    assert plans[near] == [tiles[(0, 7)], tiles[(0, 8)]]